@@ -0,0 +1,301 @@
+import discord
+from discord.ext import commands, tasks
+import config
+import asyncio
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from utils.search import TrigramIndex
+
+PLACEHOLDER_PATTERN = re.compile(r"\{([a-z]+(?:\.[a-z]+)?|arg[1-9][0-9]?)\}")
+
+# Values available to custom command templates
+PLACEHOLDERS = {
+    'user': lambda ctx, args: ctx.author.mention,
+    'user.name': lambda ctx, args: ctx.author.display_name,
+    'user.id': lambda ctx, args: str(ctx.author.id),
+    'channel': lambda ctx, args: ctx.channel.mention,
+    'channel.name': lambda ctx, args: ctx.channel.name,
+    'server': lambda ctx, args: ctx.guild.name,
+    'server.members': lambda ctx, args: f"{ctx.guild.member_count:,}",
+    'args': lambda ctx, args: " ".join(args),
+}
+
+class Template:
+    """A custom command response, parsed once into literal text and placeholders."""
+
+    __slots__ = ('source', 'parts')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts = []  # (is_placeholder, text)
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            name = match.group(1)
+            if name not in PLACEHOLDERS and not name.startswith('arg'):
+                continue  # Leave unknown {words} untouched
+            if match.start() > pos:
+                self.parts.append((False, source[pos:match.start()]))
+            self.parts.append((True, name))
+            pos = match.end()
+        if pos < len(source):
+            self.parts.append((False, source[pos:]))
+
+    def render(self, ctx, args: List[str]) -> str:
+        out = []
+        for is_placeholder, text in self.parts:
+            if not is_placeholder:
+                out.append(text)
+            elif text in PLACEHOLDERS:
+                out.append(PLACEHOLDERS[text](ctx, args))
+            else:
+                index = int(text[3:]) - 1
+                out.append(args[index] if index < len(args) else "")
+        return "".join(out)
+
+class CustomCommand:
+    """A guild's custom command as kept in memory."""
+
+    __slots__ = ('name', 'template', 'creator_id', 'created_at', 'uses')
+
+    def __init__(self, name, response, creator_id, created_at, uses):
+        self.name = name
+        self.template = Template(response)
+        self.creator_id = creator_id
+        self.created_at = created_at
+        self.uses = uses
+
+class CustomCommands(commands.Cog):
+    """📝 Commands created by server staff.
+
+    Each guild's commands are loaded from the database the first time one is
+    needed and kept in memory until they are edited, so running a custom
+    command never waits on SQLite. Usage counts are written in batches.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.guild_commands: Dict[int, Dict[str, CustomCommand]] = {}
+        self.guild_indexes: Dict[int, TrigramIndex] = {}
+        self.load_locks: Dict[int, asyncio.Lock] = {}
+        self.pending_uses = Counter()
+        self.cooldown = commands.CooldownMapping.from_cooldown(
+            1, config.CUSTOM_COMMAND_COOLDOWN, commands.BucketType.member
+        )
+
+    async def cog_load(self):
+        self.flush_usage_task.start()
+
+    async def cog_unload(self):
+        self.flush_usage_task.cancel()
+        await self.flush_usage()
+
+    async def get_commands_for(self, guild_id: int) -> Dict[str, CustomCommand]:
+        """Get a guild's custom commands, loading them on first use."""
+        cached = self.guild_commands.get(guild_id)
+        if cached is not None:
+            return cached
+
+        lock = self.load_locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            if guild_id not in self.guild_commands:
+                async with self.bot.db.execute("""
+                    SELECT command_name, response, creator_id, created_at, uses
+                    FROM custom_commands
+                    WHERE guild_id = ?
+                """, (guild_id,)) as cursor:
+                    rows = await cursor.fetchall()
+
+                self.guild_commands[guild_id] = {
+                    name: CustomCommand(name, response, creator_id, created_at, uses or 0)
+                    for name, response, creator_id, created_at, uses in rows
+                }
+        self.load_locks.pop(guild_id, None)
+        return self.guild_commands[guild_id]
+
+    def invalidate(self, guild_id: int):
+        """Drop a guild's cached commands after they change."""
+        self.guild_commands.pop(guild_id, None)
+        self.guild_indexes.pop(guild_id, None)
+
+    async def resolve(self, guild_id: int, name: str) -> Optional[CustomCommand]:
+        return (await self.get_commands_for(guild_id)).get(name.lower())
+
+    async def search(self, guild_id: int, query: str, limit=3, threshold=0.4):
+        """Fuzzy search a guild's custom command names."""
+        index = self.guild_indexes.get(guild_id)
+        if index is None:
+            index = TrigramIndex()
+            for name in await self.get_commands_for(guild_id):
+                index.add(name, name)
+            self.guild_indexes[guild_id] = index
+        return index.search(query, limit=limit, threshold=threshold)
+
+    @commands.Cog.listener()
+    async def on_unknown_command(self, ctx):
+        """Run a custom command when the invoked name isn't a real command."""
+        if not ctx.guild or not ctx.invoked_with:
+            return
+
+        command = await self.resolve(ctx.guild.id, ctx.invoked_with)
+        if not command:
+            return
+
+        if self.cooldown.get_bucket(ctx.message).update_rate_limit():
+            return
+
+        args = ctx.view.read_rest().split()
+        content = command.template.render(ctx, args)[:2000]
+        if not content.strip():
+            return
+
+        command.uses += 1
+        self.pending_uses[(ctx.guild.id, command.name)] += 1
+        await ctx.send(
+            content,
+            allowed_mentions=discord.AllowedMentions(everyone=False, roles=False)
+        )
+
+    @tasks.loop(seconds=config.CUSTOM_COMMAND_FLUSH_INTERVAL)
+    async def flush_usage_task(self):
+        await self.flush_usage()
+
+    async def flush_usage(self):
+        """Write accumulated usage counts in one batch."""
+        if not self.pending_uses:
+            return
+        pending, self.pending_uses = self.pending_uses, Counter()
+        await self.bot.db.executemany("""
+            UPDATE custom_commands
+            SET uses = uses + ?
+            WHERE guild_id = ? AND command_name = ?
+        """, [(count, guild_id, name) for (guild_id, name), count in pending.items()])
+        await self.bot.db.commit()
+
+    def _validate_name(self, name: str) -> Optional[str]:
+        """Return an error message if a name can't be used."""
+        if len(name) > config.CUSTOM_COMMAND_MAX_NAME:
+            return f"❌ Command names can be at most {config.CUSTOM_COMMAND_MAX_NAME} characters!"
+        if self.bot.get_command(name):
+            return f"❌ `{name}` is already a bot command!"
+        return None
+
+    @commands.group(name="customcommand", aliases=["cc"], invoke_without_command=True)
+    @commands.guild_only()
+    async def customcommand(self, ctx):
+        """Manage this server's custom commands."""
+        await ctx.send_help(ctx.command)
+
+    @customcommand.command(name="create", aliases=["add"])
+    @commands.has_permissions(manage_guild=True)
+    async def cc_create(self, ctx, name: str, *, response: str):
+        """Create a custom command. Use {user}, {channel}, {server}, {args} or {arg1} in the response."""
+        name = name.lower()
+        error = self._validate_name(name)
+        if error:
+            return await ctx.send(error)
+        if len(response) > config.CUSTOM_COMMAND_MAX_LENGTH:
+            return await ctx.send(f"❌ Responses can be at most {config.CUSTOM_COMMAND_MAX_LENGTH} characters!")
+
+        existing = await self.get_commands_for(ctx.guild.id)
+        if name in existing:
+            return await ctx.send(f"❌ `{name}` already exists! Use `{ctx.clean_prefix}cc edit` to change it.")
+        if len(existing) >= config.MAX_CUSTOM_COMMANDS:
+            return await ctx.send(f"❌ This server already has {config.MAX_CUSTOM_COMMANDS} custom commands!")
+
+        await self.bot.db.execute("""
+            INSERT INTO custom_commands (guild_id, command_name, response, creator_id, created_at, uses)
+            VALUES (?, ?, ?, ?, ?, 0)
+        """, (ctx.guild.id, name, response, ctx.author.id, discord.utils.utcnow().isoformat()))
+        await self.bot.db.commit()
+        self.invalidate(ctx.guild.id)
+
+        await ctx.send(f"✅ Created custom command `{ctx.clean_prefix}{name}`!")
+
+    @customcommand.command(name="edit")
+    @commands.has_permissions(manage_guild=True)
+    async def cc_edit(self, ctx, name: str, *, response: str):
+        """Change the response of a custom command."""
+        name = name.lower()
+        if len(response) > config.CUSTOM_COMMAND_MAX_LENGTH:
+            return await ctx.send(f"❌ Responses can be at most {config.CUSTOM_COMMAND_MAX_LENGTH} characters!")
+
+        async with self.bot.db.execute("""
+            UPDATE custom_commands
+            SET response = ?
+            WHERE guild_id = ? AND command_name = ?
+        """, (response, ctx.guild.id, name)) as cursor:
+            updated = cursor.rowcount
+        await self.bot.db.commit()
+
+        if not updated:
+            return await ctx.send(f"❌ There's no custom command called `{name}`!")
+        self.invalidate(ctx.guild.id)
+        await ctx.send(f"✅ Updated `{ctx.clean_prefix}{name}`!")
+
+    @customcommand.command(name="delete", aliases=["remove"])
+    @commands.has_permissions(manage_guild=True)
+    async def cc_delete(self, ctx, name: str):
+        """Delete a custom command."""
+        name = name.lower()
+        async with self.bot.db.execute("""
+            DELETE FROM custom_commands
+            WHERE guild_id = ? AND command_name = ?
+        """, (ctx.guild.id, name)) as cursor:
+            deleted = cursor.rowcount
+        await self.bot.db.commit()
+
+        if not deleted:
+            return await ctx.send(f"❌ There's no custom command called `{name}`!")
+        self.pending_uses.pop((ctx.guild.id, name), None)
+        self.invalidate(ctx.guild.id)
+        await ctx.send(f"🗑️ Deleted `{ctx.clean_prefix}{name}`!")
+
+    @customcommand.command(name="list")
+    async def cc_list(self, ctx):
+        """List this server's custom commands."""
+        guild_commands = await self.get_commands_for(ctx.guild.id)
+        if not guild_commands:
+            return await ctx.send("No custom commands set up yet!")
+
+        names = sorted(guild_commands)
+        embed = discord.Embed(
+            title=f"📝 Custom Commands ({len(names)}/{config.MAX_CUSTOM_COMMANDS})",
+            description=", ".join(f"`{name}`" for name in names)[:4096],
+            color=config.INFO_COLOR
+        )
+        await ctx.send(embed=embed)
+
+    @customcommand.command(name="info")
+    async def cc_info(self, ctx, name: str):
+        """Show details about a custom command."""
+        command = await self.resolve(ctx.guild.id, name)
+        if not command:
+            return await ctx.send(f"❌ There's no custom command called `{name.lower()}`!")
+
+        creator = ctx.guild.get_member(command.creator_id) or f"Unknown User ({command.creator_id})"
+        embed = discord.Embed(
+            title=f"📝 {ctx.clean_prefix}{command.name}",
+            description=f"```\n{command.template.source[:4000]}\n```",
+            color=config.INFO_COLOR
+        )
+        embed.add_field(name="Creator", value=str(creator))
+        embed.add_field(name="Uses", value=f"{command.uses:,}")
+        if command.created_at:
+            created = datetime.fromisoformat(command.created_at)
+            if created.tzinfo is None:
+                # Commands created before timestamps carried an offset were stored in UTC
+                created = created.replace(tzinfo=timezone.utc)
+            embed.add_field(name="Created", value=discord.utils.format_dt(created, 'R'))
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    # Usage counter for existing custom_commands tables
+    async with bot.db.execute("PRAGMA table_info(custom_commands)") as cursor:
+        columns = {row[1] for row in await cursor.fetchall()}
+    if "uses" not in columns:
+        await bot.db.execute("ALTER TABLE custom_commands ADD COLUMN uses INTEGER DEFAULT 0")
+    await bot.db.commit()
+
+    await bot.add_cog(CustomCommands(bot))
@@ -2,17 +2,17 @@ import discord
 from discord.ext import commands
 import config
 import random
-import aiohttp
 import asyncio
 from datetime import datetime, timedelta
 import json
+from utils.http import HTTPError
+from utils.prefetch import Prefetcher
 
 class Fun(commands.Cog):
     """Fun and entertainment commands."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.session = aiohttp.ClientSession()
         self.eight_ball_responses = [
             "It is certain.", "It is decidedly so.", "Without a doubt.",
             "Yes - definitely.", "You may rely on it.", "As I see it, yes.",
@@ -23,9 +23,50 @@ class Fun(commands.Cog):
             "Outlook not so good.", "Very doubtful."
         ]
 
-    def cog_unload(self):
-        if self.session and not self.session.closed:
-            self.bot.loop.create_task(self.session.close())
+        # Buffers of ready content so commands don't wait on slow APIs
+        self.prefetchers = {
+            name: Prefetcher(
+                name,
+                fetch,
+                size=config.PREFETCH_BUFFER_SIZE,
+                low_watermark=config.PREFETCH_LOW_WATERMARK,
+                dedupe_window=config.PREFETCH_DEDUPE_WINDOW,
+                key=key
+            )
+            for name, fetch, key in (
+                ("meme", self.fetch_memes, lambda meme: meme["postLink"]),
+                ("joke", self.fetch_jokes, lambda joke: joke["id"]),
+                ("fact", self.fetch_facts, lambda fact: fact["id"]),
+            )
+        }
+
+    async def cog_load(self):
+        for prefetcher in self.prefetchers.values():
+            prefetcher.start()
+
+    async def cog_unload(self):
+        for prefetcher in self.prefetchers.values():
+            await prefetcher.stop()
+
+    def _api_url(self, name):
+        return config.FUN_API_URLS[name].format(count=config.PREFETCH_BATCH_SIZE)
+
+    async def fetch_memes(self):
+        """Fetch a batch of SFW memes."""
+        data = await self.bot.http_client.get_json(self._api_url("meme"), cache=True)
+        memes = data.get("memes", [data])
+        return [meme for meme in memes if not meme.get("nsfw")]
+
+    async def fetch_jokes(self):
+        """Fetch a batch of safe-mode jokes."""
+        data = await self.bot.http_client.get_json(self._api_url("joke"), cache=True)
+        if data.get("error"):
+            raise HTTPError(data.get("message", "Joke API returned an error"))
+        return data.get("jokes", [data])
+
+    async def fetch_facts(self):
+        """Fetch a random fact."""
+        return [await self.bot.http_client.get_json(self._api_url("fact"), cache=True)]
 
     @commands.command(name="8ball")
     async def eight_ball(self, ctx, *, question: str):
@@ -112,20 +153,18 @@ class Fun(commands.Cog):
     @commands.cooldown(1, 30, commands.BucketType.user)
     async def meme(self, ctx):
         """Get a random meme from Reddit."""
-        async with self.session.get("https://meme-api.com/gimme") as response:
-            if response.status != 200:
-                return await ctx.send("Failed to get meme!")
-            
-            data = await response.json()
-            
-            embed = discord.Embed(
-                title=data["title"],
-                url=data["postLink"],
-                color=config.INFO_COLOR
-            )
-            embed.set_image(url=data["url"])
-            embed.set_footer(text=f"👍 {data['ups']} | From r/{data['subreddit']}")
-            await ctx.send(embed=embed)
+        data = await self.prefetchers["meme"].get()
+        if not data:
+            return await ctx.send("Failed to get meme!")
+
+        embed = discord.Embed(
+            title=data["title"],
+            url=data["postLink"],
+            color=config.INFO_COLOR
+        )
+        embed.set_image(url=data["url"])
+        embed.set_footer(text=f"👍 {data['ups']} | From r/{data['subreddit']}")
+        await ctx.send(embed=embed)
 
     @commands.command()
     async def poll(self, ctx, question: str, *options):
@@ -196,40 +235,36 @@ class Fun(commands.Cog):
     @commands.cooldown(1, 60, commands.BucketType.user)
     async def joke(self, ctx):
         """Get a random joke."""
-        async with self.session.get("https://v2.jokeapi.dev/joke/Any?safe-mode") as response:
-            if response.status != 200:
-                return await ctx.send("Failed to get joke!")
-            
-            data = await response.json()
-            
-            embed = discord.Embed(
-                title="😄 Random Joke",
-                color=config.INFO_COLOR
-            )
-            
-            if data["type"] == "single":
-                embed.description = data["joke"]
-            else:
-                embed.add_field(name="Setup", value=data["setup"], inline=False)
-                embed.add_field(name="Punchline", value=data["delivery"], inline=False)
-                
-            await ctx.send(embed=embed)
+        data = await self.prefetchers["joke"].get()
+        if not data:
+            return await ctx.send("Failed to get joke!")
+
+        embed = discord.Embed(
+            title="😄 Random Joke",
+            color=config.INFO_COLOR
+        )
+
+        if data["type"] == "single":
+            embed.description = data["joke"]
+        else:
+            embed.add_field(name="Setup", value=data["setup"], inline=False)
+            embed.add_field(name="Punchline", value=data["delivery"], inline=False)
+
+        await ctx.send(embed=embed)
 
     @commands.command()
     async def fact(self, ctx):
         """Get a random fact."""
-        async with self.session.get("https://uselessfacts.jsph.pl/random.json?language=en") as response:
-            if response.status != 200:
-                return await ctx.send("Failed to get fact!")
-            
-            data = await response.json()
-            
-            embed = discord.Embed(
-                title="📚 Random Fact",
-                description=data["text"],
-                color=config.INFO_COLOR
-            )
-            await ctx.send(embed=embed)
+        data = await self.prefetchers["fact"].get()
+        if not data:
+            return await ctx.send("Failed to get fact!")
+
+        embed = discord.Embed(
+            title="📚 Random Fact",
+            description=data["text"],
+            color=config.INFO_COLOR
+        )
+        await ctx.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Fun(bot)) 
@@ -1,310 +1,497 @@
-import discord
-from discord.ext import commands
-import config
-from typing import Dict, List, Optional
-
-# Menu timeout in seconds
-MENU_TIMEOUT = 60
-
-class HelpMenu(discord.ui.View):
-    """Interactive help menu with category selection."""
-    def __init__(self, help_cmd):
-        super().__init__(timeout=MENU_TIMEOUT)
-        self.help_cmd = help_cmd
-        self.add_item(CategoryDropdown(help_cmd))
-
-class CategoryDropdown(discord.ui.Select):
-    """Dropdown for selecting help categories."""
-    def __init__(self, help_cmd):
-        self.help_cmd = help_cmd
-        
-        # Define available categories
-        cats = [
-            ("mod", "Moderation", "Server moderation tools", "🛡️"),
-            ("lvl", "Leveling", "Experience and ranks", "⭐"),
-            ("welcome", "Welcome", "Greeting configuration", "👋"),
-            ("fun", "Fun", "Entertainment features", "🎮"),
-            ("util", "Utility", "General server tools", "🔧"),
-        ]
-        
-        options = []
-        for value, label, desc, emoji in cats:
-            options.append(discord.SelectOption(
-                value=value,
-                label=label, 
-                description=desc,
-                emoji=emoji
-            ))
-
-        super().__init__(
-            placeholder="Pick a category...",
-            min_values=1,
-            max_values=1,
-            options=options
-        )
-
-    async def callback(self, interaction):
-        embed = await self.help_cmd.make_category_embed(self.values[0])
-        await interaction.response.edit_message(embed=embed, view=self.view)
-
-class CustomHelp(commands.HelpCommand):
-    """Custom help command implementation with category-based navigation."""
-    
-    def __init__(self):
-        # Set up base attributes
-        super().__init__(
-            command_attrs={
-                'help': 'Shows command help',
-                'cooldown': commands.CooldownMapping.from_cooldown(1, 3, commands.BucketType.member)
-            }
-        )
-        self.command_attrs['name'] = 'help'
-        self.verify_checks = True
-
-    def _format_cmd_name(self, cmd):
-        """Make command name look nice."""
-        return cmd.name.replace('_', ' ').title()
-
-    def _format_cmd_usage(self, cmd):
-        """Format command usage with proper argument styling."""
-        if not cmd.signature:
-            return f"`{self.context.clean_prefix}{cmd.name}`"
-        
-        # Replace ugly brackets with nice unicode ones
-        sig = cmd.signature.replace('[', '⟦').replace(']', '⟧')
-        sig = sig.replace('<', '⟨').replace('>', '⟩')
-        
-        return f"`{self.context.clean_prefix}{cmd.name}` {sig}"
-
-    def _get_cmd_desc(self, cmd):
-        """Get a short description of the command."""
-        if cmd.brief:
-            return cmd.brief
-        if cmd.help:
-            # Just get first line/sentence
-            desc = cmd.help.split('.')[0].split('\n')[0]
-            return desc + '.'
-        return "No description."
-
-    def _get_cmd_perms(self, cmd):
-        """Get required permissions for a command."""
-        needed_perms = []
-        for check in cmd.checks:
-            try:
-                check_name = check.__qualname__.split('.')[0]
-                if check_name == 'has_permissions':
-                    perms = check.predicate.permissions
-                    for perm, value in perms.items():
-                        if value:
-                            # Clean up perm name
-                            perm = perm.replace('_', ' ').title()
-                            needed_perms.append(perm)
-            except AttributeError:
-                continue
-        return needed_perms
-
-    async def send_bot_help(self, mapping):
-        """Show main help menu."""
-        embed = discord.Embed(
-            title="Command Categories",
-            description=(
-                "Pick a category below to see available commands.\n\n"
-                "**Quick Tips:**\n"
-                "⟨stuff⟩ = Required\n"
-                "⟦stuff⟧ = Optional\n"
-            ),
-            color=config.INFO_COLOR
-        )
-
-        # Show available categories
-        cats = {
-            "🛡️ Mod": "Ban, kick, warn, and other mod tools",
-            "⭐ Leveling": "XP system with ranks and rewards",
-            "👋 Welcome": "Custom welcome messages",
-            "🎮 Fun": "Games and entertainment",
-            "🔧 Utility": "Helpful server tools"
-        }
-        
-        for cat, desc in cats.items():
-            cmd = f"{self.context.clean_prefix}help {cat.split()[1].lower()}"
-            embed.add_field(
-                name=cat,
-                value=f"{desc}\nTry `{cmd}`",
-                inline=True
-            )
-
-        # Add quick stats
-        cmd_count = len(self.context.bot.commands)
-        embed.set_footer(text=f"{cmd_count} Commands • Use {self.context.clean_prefix}help <command> for details")
-
-        view = HelpMenu(self)
-        await self.context.send(embed=embed, view=view)
-
-    async def send_command_help(self, cmd):
-        """Show help for a specific command."""
-        embed = discord.Embed(
-            title=f"Command: {self._format_cmd_name(cmd)}",
-            color=config.INFO_COLOR
-        )
-
-        # Add description
-        embed.description = cmd.help or "No description available."
-
-        # Show how to use it
-        embed.add_field(
-            name="Usage",
-            value=self._format_cmd_usage(cmd),
-            inline=False
-        )
-
-        # Add examples if we have them
-        if hasattr(cmd, 'examples'):
-            examples = '\n'.join(f"• `{self.context.clean_prefix}{ex}`" for ex in cmd.examples)
-            embed.add_field(name="Examples", value=examples, inline=False)
-
-        # Show required perms
-        perms = self._get_cmd_perms(cmd)
-        if perms:
-            embed.add_field(
-                name="Required Permissions",
-                value='\n'.join(f"• {perm}" for perm in perms),
-                inline=False
-            )
-
-        # List aliases
-        if cmd.aliases:
-            aliases = ', '.join(f"`{alias}`" for alias in cmd.aliases)
-            embed.add_field(name="Aliases", value=aliases, inline=False)
-
-        # Show cooldown
-        if cmd.cooldown:
-            cd = f"{cmd.cooldown.rate} uses per {cmd.cooldown.per:.0f} seconds"
-            embed.add_field(name="Cooldown", value=cd, inline=False)
-
-        await self.context.send(embed=embed)
-
-    async def make_category_embed(self, category):
-        """Create embed for a command category."""
-        # Map short names to full names
-        cat_map = {
-            'mod': 'Moderation',
-            'lvl': 'Leveling',
-            'welcome': 'Welcome',
-            'fun': 'Fun',
-            'util': 'Utility'
-        }
-        
-        # Get the cog
-        cog_name = cat_map.get(category, category).title()
-        cog = self.context.bot.get_cog(cog_name)
-        if not cog:
-            return discord.Embed(
-                title="Whoops!",
-                description="Category not found!",
-                color=config.ERROR_COLOR
-            )
-
-        # Category styling
-        cat_styles = {
-            "Moderation": {
-                "emoji": "🛡️",
-                "desc": "Keep your server safe",
-                "color": discord.Color.red()
-            },
-            "Leveling": {
-                "emoji": "⭐",
-                "desc": "Level up and earn rewards",
-                "color": discord.Color.gold()
-            },
-            "Welcome": {
-                "emoji": "👋",
-                "desc": "Greet new members",
-                "color": discord.Color.green()
-            },
-            "Fun": {
-                "emoji": "🎮",
-                "desc": "Have some fun",
-                "color": discord.Color.blue()
-            },
-            "Utility": {
-                "emoji": "🔧",
-                "desc": "Useful tools",
-                "color": discord.Color.greyple()
-            }
-        }
-
-        style = cat_styles.get(cog.qualified_name, {
-            "emoji": "📁",
-            "desc": "Misc commands",
-            "color": config.INFO_COLOR
-        })
-
-        embed = discord.Embed(
-            title=f"{style['emoji']} {cog.qualified_name}",
-            description=f"{style['desc']}\nUse `{self.context.clean_prefix}help <command>` for details",
-            color=style['color']
-        )
-
-        # Sort commands by name
-        cmds = sorted(cog.get_commands(), key=lambda x: x.name)
-        
-        def chunk_commands(cmd_list, chunk_size=5):
-            """Split commands into chunks for fields."""
-            for i in range(0, len(cmd_list), chunk_size):
-                yield cmd_list[i:i + chunk_size]
-
-        # Add commands in chunks
-        for i, chunk in enumerate(chunk_commands(cmds)):
-            # Format each command
-            cmd_text = []
-            for cmd in chunk:
-                if cmd.hidden:
-                    continue
-                    
-                desc = self._get_cmd_desc(cmd)
-                usage = self._format_cmd_usage(cmd)
-                
-                cmd_text.append(f"**{self._format_cmd_name(cmd)}**")
-                cmd_text.append(f"{desc}")
-                cmd_text.append(f"{usage}\n")
-            
-            if cmd_text:  # Only add field if we have visible commands
-                embed.add_field(
-                    name=f"Commands {i+1}" if i > 0 else "Commands",
-                    value='\n'.join(cmd_text),
-                    inline=False
-                )
-
-        return embed
-
-    async def send_error_message(self, error):
-        """Handle command errors."""
-        embed = discord.Embed(
-            title="Error",
-            description=str(error),
-            color=config.ERROR_COLOR
-        )
-        await self.context.send(embed=embed)
-
-    def command_not_found(self, string):
-        return f"Command '{string}' not found."
-
-    def subcommand_not_found(self, command, string):
-        if isinstance(command, commands.Group) and len(command.all_commands) > 0:
-            return f"Subcommand '{string}' for command '{command.qualified_name}' not found."
-        return f"Command '{command.qualified_name}' has no subcommands."
-
-class Help(commands.Cog):
-    """Help command cog."""
-    
-    def __init__(self, bot):
-        self.bot = bot
-        self._original_help_command = bot.help_command
-        bot.help_command = CustomHelp()
-        bot.help_command.cog = self
-
-    def cog_unload(self):
-        self.bot.help_command = self._original_help_command
-
-async def setup(bot):
-    await bot.add_cog(Help(bot)) 
\ No newline at end of file
+import discord
+from discord.ext import commands
+import config
+import inspect
+from utils.search import TrigramIndex
+from typing import Dict, List, Optional
+
+# Help categories: (dropdown value, cog name, dropdown description, emoji, embed description, color)
+CATEGORIES = [
+    ("mod", "Moderation", "Server moderation tools", "🛡️", "Keep your server safe", discord.Color.red()),
+    ("lvl", "Leveling", "Experience and ranks", "⭐", "Level up and earn rewards", discord.Color.gold()),
+    ("welcome", "Welcome", "Greeting configuration", "👋", "Greet new members", discord.Color.green()),
+    ("fun", "Fun", "Entertainment features", "🎮", "Have some fun", discord.Color.blue()),
+    ("util", "Utility", "General server tools", "🔧", "Useful tools", discord.Color.greyple()),
+    ("custom", "CustomCommands", "Server-made commands", "📝", "Commands made by server staff", discord.Color.purple()),
+]
+
+# Map short names to full names
+CATEGORY_NAMES = {value: cog_name for value, cog_name, *_ in CATEGORIES}
+
+# What `help <name>` accepts for a category: the short name or the cog name, any case
+CATEGORY_LOOKUP = {
+    **{cog_name.lower(): value for value, cog_name, *_ in CATEGORIES},
+    **{value: value for value in CATEGORY_NAMES},
+}
+
+class HelpMenu(discord.ui.View):
+    """Interactive help menu with category selection.
+
+    Its only item is dynamic: interactions are routed by custom ID to the
+    item class the Help cog registers, so nothing is kept per message and
+    the menu keeps working after a restart.
+    """
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.add_item(CategoryDropdown())
+
+class CategoryDropdown(discord.ui.DynamicItem[discord.ui.Select], template=r'help:category'):
+    """Dropdown for selecting help categories."""
+
+    OPTIONS = [
+        discord.SelectOption(value=value, label=label, description=desc, emoji=emoji)
+        for value, label, desc, emoji, *_ in CATEGORIES
+    ]
+
+    def __init__(self):
+        super().__init__(discord.ui.Select(
+            custom_id="help:category",
+            placeholder="Pick a category...",
+            min_values=1,
+            max_values=1,
+            options=self.OPTIONS
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
+
+    async def callback(self, interaction):
+        help_cog = interaction.client.get_cog("Help")
+        if help_cog is None:
+            return await interaction.response.send_message("Help isn't available right now.", ephemeral=True)
+        category = self.item.values[0]
+
+        # The prefix only matters for usage strings, so resolve it from the
+        # help message the menu is attached to
+        prefix = await interaction.client.get_prefix(interaction.message)
+        if isinstance(prefix, list):
+            prefix = prefix[-1]
+
+        embed = await help_cog.render_category(
+            category, prefix, interaction.permissions, interaction.user, interaction.channel
+        )
+        # The message keeps its components when only the embed changes
+        await interaction.response.edit_message(embed=embed)
+
+class CachedCommand:
+    """Pre-rendered help text for one command."""
+
+    __slots__ = ('command', 'name', 'desc', 'usage', 'required', 'needs_check')
+
+    def __init__(self, command, name, desc, usage, required, needs_check):
+        self.command = command
+        self.name = name
+        self.desc = desc
+        self.usage = usage
+        self.required = required
+        self.needs_check = needs_check
+
+class CustomHelp(commands.HelpCommand):
+    """Custom help command implementation with category-based navigation.
+
+    discord.py copies the help command for every invocation, so everything
+    worth caching lives on the Help cog instead of on this instance.
+    """
+
+    def __init__(self):
+        # Set up base attributes
+        super().__init__(
+            command_attrs={
+                'help': 'Shows command help',
+                'cooldown': commands.CooldownMapping.from_cooldown(1, 3, commands.BucketType.member)
+            }
+        )
+        self.command_attrs['name'] = 'help'
+        self.verify_checks = True
+
+    async def command_callback(self, ctx, /, *, command=None):
+        # Let `help mod`, `help fun` etc. open a category
+        category = CATEGORY_LOOKUP.get(command.lower()) if command else None
+        if category:
+            embed = await self.make_category_embed(category)
+            return await ctx.send(embed=embed, view=HelpMenu())
+        return await super().command_callback(ctx, command=command)
+
+    async def send_bot_help(self, mapping):
+        """Show main help menu."""
+        embed = self.cog.get_bot_embed(self.context.clean_prefix)
+        await self.context.send(embed=embed, view=HelpMenu())
+
+    async def send_command_help(self, cmd):
+        """Show help for a specific command."""
+        embed = self.cog.get_command_embed(cmd, self.context.clean_prefix)
+        await self.context.send(embed=embed)
+
+    async def make_category_embed(self, category):
+        """Create embed for a command category."""
+        ctx = self.context
+        return await self.cog.render_category(
+            category,
+            ctx.clean_prefix,
+            ctx.channel.permissions_for(ctx.author),
+            ctx.author,
+            ctx.channel
+        )
+
+    async def send_error_message(self, error):
+        """Handle command errors."""
+        embed = discord.Embed(
+            title="Error",
+            description=str(error),
+            color=config.ERROR_COLOR
+        )
+        await self.context.send(embed=embed)
+
+    def command_not_found(self, string):
+        # Treat unknown names as a search over command names and help text
+        results = self.cog.search(string, limit=5, threshold=0.25)
+        if not results:
+            return f"Command '{string}' not found."
+
+        prefix = self.context.clean_prefix
+        lines = [
+            f"• `{prefix}{cmd.qualified_name}` - {self.cog._get_cmd_desc(cmd)}"
+            for cmd, _ in results
+        ]
+        return f"Command '{string}' not found. Closest matches:\n" + "\n".join(lines)
+
+    def subcommand_not_found(self, command, string):
+        if isinstance(command, commands.Group) and len(command.all_commands) > 0:
+            return f"Subcommand '{string}' for command '{command.qualified_name}' not found."
+        return f"Command '{command.qualified_name}' has no subcommands."
+
+class Help(commands.Cog):
+    """Help command cog.
+
+    Builds the static parts of every help embed once per prefix and keeps
+    them until an extension is loaded, unloaded or reloaded.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._original_help_command = bot.help_command
+        bot.help_command = CustomHelp()
+        bot.help_command.cog = self
+        self.command_cache: Dict[tuple, CachedCommand] = {}
+        self.category_cache: Dict[tuple, List[CachedCommand]] = {}
+        self.embed_cache: Dict[tuple, discord.Embed] = {}
+        self.search_index: Optional[TrigramIndex] = None
+        self.name_index: Optional[TrigramIndex] = None
+
+    async def cog_load(self):
+        self.bot.add_dynamic_items(CategoryDropdown)
+
+    def cog_unload(self):
+        self.bot.remove_dynamic_items(CategoryDropdown)
+        self.bot.help_command = self._original_help_command
+
+    @commands.Cog.listener()
+    async def on_extension_change(self, name):
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop every cached embed; they are rebuilt on next use."""
+        self.command_cache.clear()
+        self.category_cache.clear()
+        self.embed_cache.clear()
+        self.search_index = None
+        self.name_index = None
+
+    def _build_search_indexes(self):
+        """Index every visible command.
+
+        The search index covers names, aliases and help text; the name index
+        only names and aliases, for typo suggestions.
+        """
+        search_index = TrigramIndex()
+        name_index = TrigramIndex()
+        for cmd in self.bot.walk_commands():
+            if cmd.hidden:
+                continue
+            key = cmd.qualified_name
+            for index in (search_index, name_index):
+                index.add(key, cmd.name, 1.0)
+                for alias in cmd.aliases:
+                    index.add(key, alias, 0.9)
+            if cmd.parent:
+                search_index.add(key, cmd.parent.name, 0.6)
+            search_index.add_text(key, cmd.help or cmd.brief or "", 0.5)
+        self.search_index = search_index
+        self.name_index = name_index
+
+    def search(self, query, limit=5, threshold=0.3, names_only=False):
+        """Fuzzy search over commands, returning (command, score) pairs."""
+        if self.search_index is None:
+            self._build_search_indexes()
+        index = self.name_index if names_only else self.search_index
+        results = []
+        for name, score in index.search(query, limit=limit, threshold=threshold):
+            cmd = self.bot.get_command(name)
+            if cmd:
+                results.append((cmd, score))
+        return results
+
+    @commands.Cog.listener()
+    async def on_unknown_command(self, ctx):
+        """Suggest the closest command names when someone makes a typo."""
+        name = ctx.invoked_with
+        if not name or len(name) < 2:
+            return
+
+        # Only match on names here; help text matches are too loose for a typo
+        suggestions = [
+            (cmd.qualified_name, score)
+            for cmd, score in self.search(name, limit=3, threshold=0.4, names_only=True)
+        ]
+
+        # Include this server's custom commands, unless the name is one of them
+        custom = self.bot.get_cog('CustomCommands')
+        if custom and ctx.guild:
+            if await custom.resolve(ctx.guild.id, name):
+                return
+            suggestions += await custom.search(ctx.guild.id, name)
+
+        if not suggestions:
+            return
+
+        suggestions.sort(key=lambda item: -item[1])
+        names = ", ".join(f"`{ctx.clean_prefix}{cmd_name}`" for cmd_name, _ in suggestions[:3])
+        await ctx.send(f"❓ Unknown command `{name}`. Did you mean {names}?")
+
+    def _format_cmd_name(self, cmd):
+        """Make command name look nice."""
+        return cmd.name.replace('_', ' ').title()
+
+    def _format_cmd_usage(self, cmd, prefix):
+        """Format command usage with proper argument styling."""
+        if not cmd.signature:
+            return f"`{prefix}{cmd.name}`"
+
+        # Replace ugly brackets with nice unicode ones
+        sig = cmd.signature.replace('[', '⟦').replace(']', '⟧')
+        sig = sig.replace('<', '⟨').replace('>', '⟩')
+
+        return f"`{prefix}{cmd.name}` {sig}"
+
+    def _get_cmd_desc(self, cmd):
+        """Get a short description of the command."""
+        if cmd.brief:
+            return cmd.brief
+        if cmd.help:
+            # Just get first line/sentence
+            desc = cmd.help.split('.')[0].split('\n')[0]
+            return desc + '.'
+        return "No description."
+
+    def _get_cmd_perms(self, cmd):
+        """Get required user permissions and whether other checks exist.
+
+        ``has_permissions`` keeps its permissions in the predicate's closure,
+        so they can be compared against a member's permissions later without
+        running the check. Any other user-facing check has to be run.
+        """
+        required = discord.Permissions.none()
+        needs_check = False
+        for check in cmd.checks:
+            check_name = check.__qualname__.split('.')[0]
+            if check_name == 'has_permissions':
+                perms = inspect.getclosurevars(check).nonlocals.get('perms', {})
+                required.update(**{perm: True for perm, value in perms.items() if value})
+            elif check_name != 'bot_has_permissions':
+                needs_check = True
+        return required, needs_check
+
+    def _perm_names(self, required):
+        """Clean up perm names for display."""
+        return [perm.replace('_', ' ').title() for perm, value in required if value]
+
+    def _cached_command(self, cmd, prefix):
+        key = (cmd.qualified_name, prefix)
+        cached = self.command_cache.get(key)
+        if cached is None:
+            required, needs_check = self._get_cmd_perms(cmd)
+            cached = self.command_cache[key] = CachedCommand(
+                cmd,
+                self._format_cmd_name(cmd),
+                self._get_cmd_desc(cmd),
+                self._format_cmd_usage(cmd, prefix),
+                required,
+                needs_check
+            )
+        return cached
+
+    def get_bot_embed(self, prefix):
+        """Main help menu embed."""
+        key = ('bot', prefix)
+        embed = self.embed_cache.get(key)
+        if embed is not None:
+            return embed
+
+        embed = discord.Embed(
+            title="Command Categories",
+            description=(
+                "Pick a category below to see available commands.\n\n"
+                "**Quick Tips:**\n"
+                "⟨stuff⟩ = Required\n"
+                "⟦stuff⟧ = Optional\n"
+            ),
+            color=config.INFO_COLOR
+        )
+
+        # Show available categories
+        cats = {
+            "🛡️ Mod": "Ban, kick, warn, and other mod tools",
+            "⭐ Leveling": "XP system with ranks and rewards",
+            "👋 Welcome": "Custom welcome messages",
+            "🎮 Fun": "Games and entertainment",
+            "🔧 Utility": "Helpful server tools",
+            "📝 Custom": "Server-made commands"
+        }
+
+        for cat, desc in cats.items():
+            cmd = f"{prefix}help {cat.split()[1].lower()}"
+            embed.add_field(
+                name=cat,
+                value=f"{desc}\nTry `{cmd}`",
+                inline=True
+            )
+
+        # Add quick stats
+        cmd_count = len(self.bot.commands)
+        embed.set_footer(text=f"{cmd_count} Commands • Use {prefix}help <command> for details")
+
+        self.embed_cache[key] = embed
+        return embed
+
+    def get_command_embed(self, cmd, prefix):
+        """Help embed for a specific command."""
+        key = ('command', cmd.qualified_name, prefix)
+        embed = self.embed_cache.get(key)
+        if embed is not None:
+            return embed
+
+        embed = discord.Embed(
+            title=f"Command: {self._format_cmd_name(cmd)}",
+            color=config.INFO_COLOR
+        )
+
+        # Add description
+        embed.description = cmd.help or "No description available."
+
+        # Show how to use it
+        embed.add_field(
+            name="Usage",
+            value=self._format_cmd_usage(cmd, prefix),
+            inline=False
+        )
+
+        # Add examples if we have them
+        if hasattr(cmd, 'examples'):
+            examples = '\n'.join(f"• `{prefix}{ex}`" for ex in cmd.examples)
+            embed.add_field(name="Examples", value=examples, inline=False)
+
+        # Show required perms
+        perms = self._perm_names(self._cached_command(cmd, prefix).required)
+        if perms:
+            embed.add_field(
+                name="Required Permissions",
+                value='\n'.join(f"• {perm}" for perm in perms),
+                inline=False
+            )
+
+        # List aliases
+        if cmd.aliases:
+            aliases = ', '.join(f"`{alias}`" for alias in cmd.aliases)
+            embed.add_field(name="Aliases", value=aliases, inline=False)
+
+        # Show cooldown
+        if cmd.cooldown:
+            cd = f"{cmd.cooldown.rate} uses per {cmd.cooldown.per:.0f} seconds"
+            embed.add_field(name="Cooldown", value=cd, inline=False)
+
+        self.embed_cache[key] = embed
+        return embed
+
+    def _category_commands(self, cog, prefix):
+        """Sorted, visible commands of a cog with their pre-rendered text."""
+        key = (cog.qualified_name, prefix)
+        cached = self.category_cache.get(key)
+        if cached is None:
+            cmds = sorted(cog.get_commands(), key=lambda x: x.name)
+            cached = self.category_cache[key] = [
+                self._cached_command(cmd, prefix) for cmd in cmds if not cmd.hidden
+            ]
+        return cached
+
+    async def render_category(self, category, prefix, permissions, user, channel):
+        """Create embed for a command category.
+
+        Only the permission filtering for ``user`` happens here; commands with
+        checks other than ``has_permissions`` still have their checks run.
+        """
+        cog_name = CATEGORY_NAMES.get(category) or category.title()
+        cog = self.bot.get_cog(cog_name)
+        if not cog:
+            return discord.Embed(
+                title="Whoops!",
+                description="Category not found!",
+                color=config.ERROR_COLOR
+            )
+
+        # Category styling
+        style = next(
+            ((emoji, desc, color) for _, name, _, emoji, desc, color in CATEGORIES if name == cog.qualified_name),
+            ("📁", "Misc commands", config.INFO_COLOR)
+        )
+        emoji, desc, color = style
+
+        embed = discord.Embed(
+            title=f"{emoji} {cog.qualified_name}",
+            description=f"{desc}\nUse `{prefix}help <command>` for details",
+            color=color
+        )
+
+        visible = []
+        for cached in self._category_commands(cog, prefix):
+            if not cached.required <= permissions:
+                continue
+            if cached.needs_check and not await self._passes_checks(cached.command, user, channel):
+                continue
+            visible.append(cached)
+
+        # Add commands in chunks of 5
+        for i in range(0, len(visible), 5):
+            cmd_text = []
+            for cached in visible[i:i + 5]:
+                cmd_text.append(f"**{cached.name}**")
+                cmd_text.append(f"{cached.desc}")
+                cmd_text.append(f"{cached.usage}\n")
+
+            embed.add_field(
+                name=f"Commands {i // 5 + 1}" if i > 0 else "Commands",
+                value='\n'.join(cmd_text),
+                inline=False
+            )
+
+        return embed
+
+    async def _passes_checks(self, command, user, channel):
+        """Run the non-permission checks of a command for a user."""
+        for check in command.checks:
+            check_name = check.__qualname__.split('.')[0]
+            if check_name in ('has_permissions', 'bot_has_permissions'):
+                continue
+            if check_name == 'is_owner':
+                if not await self.bot.is_owner(user):
+                    return False
+            elif check_name == 'guild_only':
+                if not getattr(channel, 'guild', None):
+                    return False
+            else:
+                # Unknown checks need a real context; keep the command visible
+                continue
+        return True
+
+async def setup(bot):
+    await bot.add_cog(Help(bot))
@@ -1,357 +1,2501 @@
-import discord
-from discord.ext import commands
-import asyncio
-from datetime import datetime, timedelta
-import re
-from collections import defaultdict
-import config
-import json
-
-def is_dev():
-    """Check if the user is a developer."""
-    async def predicate(ctx):
-        # First check if user is in dev list
-        if ctx.author.id in config.DEV_IDS:
-            return True
-        # If not in dev list, check normal permissions
-        return await ctx.command.parent_check(ctx) if ctx.command.parent else True
-    return commands.check(predicate)
-
-class Moderation(commands.Cog):
-    """🛡️ Server moderation and management commands.
-    
-    Keep your server safe and organized with these commands:
-    • Ban/Kick members
-    • Warn system with tracking
-    • Message purging
-    • Mute system with duration
-    • Server prefix management
-    """
-
-    def __init__(self, bot):
-        self.bot = bot
-        self.spam_control = defaultdict(lambda: defaultdict(int))
-        self.url_pattern = re.compile(
-            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        )
-        self.active_mutes = {}
-
-    async def log_action(self, guild, action_type, user, moderator, reason=None, duration=None):
-        """Log moderation actions to the designated logging channel."""
-        if not guild.id:
-            return
-
-        async with self.bot.db.execute(
-            "SELECT log_channel_id FROM guild_settings WHERE guild_id = ?",
-            (guild.id,)
-        ) as cursor:
-            result = await cursor.fetchone()
-
-        if not result or not result[0]:
-            return
-
-        log_channel = guild.get_channel(result[0])
-        if not log_channel:
-            return
-
-        embed = discord.Embed(
-            title=f"Moderation Action: {action_type}",
-            color=config.WARNING_COLOR,
-            timestamp=datetime.utcnow()
-        )
-        embed.add_field(name="User", value=f"{user} ({user.id})", inline=False)
-        embed.add_field(name="Moderator", value=f"{moderator} ({moderator.id})", inline=False)
-        if reason:
-            embed.add_field(name="Reason", value=reason, inline=False)
-        if duration:
-            embed.add_field(name="Duration", value=duration, inline=False)
-
-        await log_channel.send(embed=embed)
-
-    @commands.command()
-    @commands.has_permissions(kick_members=True)
-    @commands.bot_has_permissions(kick_members=True)
-    async def kick(self, ctx, member: discord.Member, *, reason=None):
-        """Kick a member from the server."""
-        if member == ctx.author:
-            return await ctx.send("❌ You cannot kick yourself!")
-            
-        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
-            return await ctx.send("❌ You cannot kick someone with a higher or equal role!")
-
-        reason = reason or "No reason provided"
-        full_reason = f"Kicked by {ctx.author} (ID: {ctx.author.id}) - {reason}"
-
-        try:
-            # Send DM to user
-            embed = discord.Embed(
-                title="👢 You have been kicked",
-                description=f"You have been kicked from {ctx.guild.name}",
-                color=discord.Color.orange()
-            )
-            embed.add_field(name="Reason", value=reason)
-            try:
-                await member.send(embed=embed)
-            except:
-                pass  # User might have DMs disabled
-
-            # Kick user
-            await member.kick(reason=full_reason)
-            
-            # Log the kick
-            embed = discord.Embed(
-                title="👢 Member Kicked",
-                description=f"{member.mention} has been kicked",
-                color=discord.Color.orange(),
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="User", value=f"{member} (ID: {member.id})")
-            embed.add_field(name="Moderator", value=ctx.author.mention)
-            embed.add_field(name="Reason", value=reason, inline=False)
-            
-            await ctx.send(embed=embed)
-            
-            # Log to mod-log if exists
-            if hasattr(self.bot, 'mod_log'):
-                await self.bot.mod_log(ctx.guild, embed)
-
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to kick that user!")
-        except discord.HTTPException as e:
-            await ctx.send(f"❌ An error occurred: {e}")
-
-    @commands.command()
-    @commands.has_permissions(ban_members=True)
-    @commands.bot_has_permissions(ban_members=True)
-    async def ban(self, ctx, member: discord.Member, *, reason=None):
-        """Ban a member from the server."""
-        if member == ctx.author:
-            return await ctx.send("❌ You cannot ban yourself!")
-            
-        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
-            return await ctx.send("❌ You cannot ban someone with a higher or equal role!")
-
-        reason = reason or "No reason provided"
-        full_reason = f"Banned by {ctx.author} (ID: {ctx.author.id}) - {reason}"
-
-        try:
-            # Send DM to user
-            embed = discord.Embed(
-                title="🔨 You have been banned",
-                description=f"You have been banned from {ctx.guild.name}",
-                color=discord.Color.red()
-            )
-            embed.add_field(name="Reason", value=reason)
-            try:
-                await member.send(embed=embed)
-            except:
-                pass  # User might have DMs disabled
-
-            # Ban user
-            await member.ban(reason=full_reason, delete_message_days=1)
-            
-            # Log the ban
-            embed = discord.Embed(
-                title="🔨 Member Banned",
-                description=f"{member.mention} has been banned",
-                color=discord.Color.red(),
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="User", value=f"{member} (ID: {member.id})")
-            embed.add_field(name="Moderator", value=ctx.author.mention)
-            embed.add_field(name="Reason", value=reason, inline=False)
-            
-            await ctx.send(embed=embed)
-            
-            # Log to mod-log if exists
-            if hasattr(self.bot, 'mod_log'):
-                await self.bot.mod_log(ctx.guild, embed)
-
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to ban that user!")
-        except discord.HTTPException as e:
-            await ctx.send(f"❌ An error occurred: {e}")
-
-    @commands.command()
-    @commands.has_permissions(manage_messages=True)
-    @commands.bot_has_permissions(manage_messages=True)
-    async def warn(self, ctx, member: discord.Member, *, reason=None):
-        """Warn a member."""
-        if member == ctx.author:
-            return await ctx.send("❌ You cannot warn yourself!")
-            
-        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
-            return await ctx.send("❌ You cannot warn someone with a higher or equal role!")
-
-        reason = reason or "No reason provided"
-
-        # Add warning to database
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (ctx.guild.id, member.id, ctx.author.id, reason, datetime.utcnow().isoformat()))
-            
-            # Get warning count
-            await cursor.execute("""
-                SELECT COUNT(*) FROM warnings
-                WHERE guild_id = ? AND user_id = ?
-            """, (ctx.guild.id, member.id))
-            warning_count = (await cursor.fetchone())[0]
-            
-        await self.bot.db.commit()
-
-        # Send warning message
-        embed = discord.Embed(
-            title="⚠️ Warning Issued",
-            description=f"{member.mention} has been warned",
-            color=discord.Color.yellow(),
-            timestamp=datetime.utcnow()
-        )
-        embed.add_field(name="User", value=f"{member} (ID: {member.id})")
-        embed.add_field(name="Moderator", value=ctx.author.mention)
-        embed.add_field(name="Reason", value=reason, inline=False)
-        embed.add_field(name="Warning Count", value=f"This user now has {warning_count} warning(s)")
-        
-        await ctx.send(embed=embed)
-
-        # DM the warned user
-        try:
-            user_embed = discord.Embed(
-                title="⚠️ You have been warned",
-                description=f"You have received a warning in {ctx.guild.name}",
-                color=discord.Color.yellow()
-            )
-            user_embed.add_field(name="Reason", value=reason)
-            user_embed.add_field(name="Warning Count", value=f"You now have {warning_count} warning(s)")
-            await member.send(embed=user_embed)
-        except:
-            pass  # User might have DMs disabled
-
-    @commands.command()
-    @commands.has_permissions(manage_messages=True)
-    async def warnings(self, ctx, member: discord.Member):
-        """View warnings for a member."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                SELECT moderator_id, reason, timestamp
-                FROM warnings
-                WHERE guild_id = ? AND user_id = ?
-                ORDER BY timestamp DESC
-            """, (ctx.guild.id, member.id))
-            warnings = await cursor.fetchall()
-
-        if not warnings:
-            return await ctx.send(f"✨ {member} has no warnings!")
-
-        embed = discord.Embed(
-            title=f"Warnings for {member}",
-            color=discord.Color.yellow()
-        )
-
-        for i, (mod_id, reason, timestamp) in enumerate(warnings, 1):
-            moderator = ctx.guild.get_member(mod_id) or f"Unknown Moderator ({mod_id})"
-            warn_time = datetime.fromisoformat(timestamp)
-            
-            embed.add_field(
-                name=f"Warning #{i}",
-                value=f"**Moderator:** {moderator}\n"
-                      f"**Reason:** {reason}\n"
-                      f"**Time:** <t:{int(warn_time.timestamp())}:R>",
-                inline=False
-            )
-
-        embed.set_footer(text=f"Total Warnings: {len(warnings)}")
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    @commands.has_permissions(manage_messages=True)
-    async def clearwarnings(self, ctx, member: discord.Member):
-        """Clear all warnings for a member."""
-        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
-            return await ctx.send("❌ You cannot clear warnings for someone with a higher or equal role!")
-
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                DELETE FROM warnings
-                WHERE guild_id = ? AND user_id = ?
-            """, (ctx.guild.id, member.id))
-        await self.bot.db.commit()
-
-        embed = discord.Embed(
-            title="✨ Warnings Cleared",
-            description=f"All warnings have been cleared for {member.mention}",
-            color=discord.Color.green()
-        )
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    @commands.has_permissions(manage_messages=True)
-    @commands.bot_has_permissions(manage_messages=True)
-    async def purge(self, ctx, amount: int, member: discord.Member = None):
-        """Delete a specified number of messages."""
-        if amount < 1:
-            return await ctx.send("❌ Please specify a positive number of messages to delete!")
-        
-        if amount > 1000:
-            return await ctx.send("❌ Cannot delete more than 1000 messages at once!")
-
-        def check_message(message):
-            return member is None or message.author == member
-
-        try:
-            # Delete command message
-            await ctx.message.delete()
-            
-            # Delete messages
-            deleted = await ctx.channel.purge(
-                limit=amount,
-                check=check_message,
-                before=ctx.message
-            )
-            
-            # Send confirmation
-            confirmation = await ctx.send(
-                embed=discord.Embed(
-                    title="🗑️ Messages Purged",
-                    description=f"Deleted {len(deleted)} messages" + (f" from {member.mention}" if member else ""),
-                    color=discord.Color.blue()
-                )
-            )
-            
-            # Delete confirmation after 5 seconds
-            await asyncio.sleep(5)
-            await confirmation.delete()
-            
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to delete messages!")
-        except discord.HTTPException as e:
-            await ctx.send(f"❌ An error occurred: {e}")
-
-async def setup(bot):
-    # Create necessary tables
-    async with bot.db.cursor() as cursor:
-        # Warnings table
-        await cursor.execute("""
-            CREATE TABLE IF NOT EXISTS warnings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                moderator_id INTEGER,
-                reason TEXT,
-                timestamp TEXT
-            )
-        """)
-        
-        # Channel locks table
-        await cursor.execute("""
-            CREATE TABLE IF NOT EXISTS channel_locks (
-                guild_id INTEGER,
-                channel_id INTEGER,
-                permissions TEXT,
-                PRIMARY KEY (guild_id, channel_id)
-            )
-        """)
-        
-    await bot.db.commit()
+import discord
+from discord.ext import commands, tasks
+import asyncio
+from datetime import datetime, timedelta, timezone
+import io
+import random
+import re
+import string
+import time
+import typing
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import config
+import json
+import logging
+import sqlite3
+from utils.archive import MessageArchive
+from utils.automod import AutoModEngine, AutoModSettings, LatencyTracker
+from utils.domains import ALLOW, DENY, DomainBlocklist, normalize_domain
+from utils.duplicates import DuplicateTracker
+from utils.durations import Duration, format_duration
+from utils.http import HTTPError
+from utils.purge import (
+    PurgeProgress, all_of, from_bots, from_user, has_attachments, has_embeds, has_links, matches, purge_channel
+)
+from utils.imagehash import BKTree, hamming, hash_image, to_signed, to_unsigned
+from utils.matching import GlobPattern
+from utils.ratelimit import RateWindow
+from utils.slowmode import SlowmodeController
+
+logger = logging.getLogger('DiscordBot')
+
+def is_dev():
+    """Check if the user is a developer."""
+    async def predicate(ctx):
+        # First check if user is in dev list
+        if ctx.author.id in config.DEV_IDS:
+            return True
+        # If not in dev list, check normal permissions
+        return await ctx.command.parent_check(ctx) if ctx.command.parent else True
+    return commands.check(predicate)
+
+class MassActionFlags(commands.FlagConverter, prefix='--', delimiter=' '):
+    """Who a mass ban or kick targets. IDs are always included; --joined and
+    --match narrow down the cached members together."""
+    ids: str = None
+    joined: Duration = None
+    match: str = None  # Name pattern, * and ? as wildcards
+    reason: str = None
+
+class PurgeFlags(commands.FlagConverter, prefix='--', delimiter=' '):
+    """Which messages a purge deletes. Every filter given must match."""
+    user: discord.User = commands.flag(default=None, positional=True)
+    match: str = None  # Content pattern, * and ? as wildcards
+    has: str = None  # links, files and/or embeds
+    bots: bool = None  # yes for bots only, no for humans only
+    newer: Duration = None
+    older: Duration = None
+    channels: str = None  # Channel mentions/IDs, or "all"
+
+class ConfirmView(discord.ui.View):
+    """Confirm/cancel buttons only the invoking moderator can press."""
+
+    def __init__(self, author):
+        super().__init__(timeout=60)
+        self.author = author
+        self.confirmed = False
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author.id
+
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.confirmed = True
+        await interaction.response.defer()
+        self.stop()
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
+        self.stop()
+
+# action -> (emoji, label) for moderation cases
+CASE_ACTIONS = {
+    'warn': ("⚠️", "Warn"),
+    'kick': ("👢", "Kick"),
+    'ban': ("🔨", "Ban"),
+    'unban': ("🔓", "Unban"),
+    'mute': ("🔇", "Mute"),
+    'unmute': ("🔊", "Unmute"),
+}
+CASE_COLUMNS = "id, action, user_id, moderator_id, reason, duration, created"
+
+def fts_query(text):
+    """Quote each word so user input can't break FTS5 syntax; a trailing * keeps prefix search."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+class CasePages(discord.ui.View):
+    """Newer/Older buttons over a list of cases, newest first.
+
+    ``fetch(cursor, limit)`` returns the cases after ``cursor``, a
+    (created, id) pair taken from the last case of the previous page, so
+    each page is one index range scan rather than an OFFSET that reads
+    and discards every earlier page.
+    """
+
+    def __init__(self, author, title, fetch, format_case):
+        super().__init__(timeout=180)
+        self.author = author
+        self.title = title
+        self.fetch = fetch
+        self.format_case = format_case
+        self.cursors = [None]  # Start cursor of each page visited so far
+        self.cases = []
+        self.message = None
+
+    async def load(self):
+        cases = await self.fetch(self.cursors[-1], config.CASES_PER_PAGE + 1)
+        self.cases = cases[:config.CASES_PER_PAGE]
+        self.newer.disabled = len(self.cursors) == 1
+        self.older.disabled = len(cases) <= config.CASES_PER_PAGE
+
+    def embed(self):
+        embed = discord.Embed(
+            title=self.title,
+            description="\n\n".join(self.format_case(case) for case in self.cases),
+            color=config.INFO_COLOR
+        )
+        embed.set_footer(text=f"Page {len(self.cursors)}")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author.id
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursors.pop()
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last = self.cases[-1]
+        self.cursors.append((last[6], last[0]))
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+class Moderation(commands.Cog):
+    """🛡️ Server moderation and management commands.
+    
+    Keep your server safe and organized with these commands:
+    • Ban/Kick members
+    • Warn system with tracking
+    • Message purging
+    • Mute system with duration
+    • Server prefix management
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        # (guild_id, user_id) / channel_id -> RateWindow of recent message times
+        self.spam_control = {}
+        self.channel_rates = {}
+        self.url_pattern = re.compile(
+            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+        )
+        self.active_mutes = {}  # (guild_id, user_id) -> pending tempmute Timer
+        self.automod = AutoModEngine(self.url_pattern)
+        self.automod_settings = {}
+        self.automod_latency = LatencyTracker(config.AUTOMOD_BUDGET_MS / 1000)
+        self.flood_alerts = {}
+        self.duplicate_trackers = {}  # guild_id -> DuplicateTracker
+        self.global_images = BKTree()  # Image blocklist shared by every guild
+        self.image_hashes = OrderedDict()  # (url, size) -> hashes, least recently used first
+        self.hash_pool = None  # Started on the first image scan
+        self.case_fts = False  # Whether SQLite has FTS5 for case search
+        self.warning_counts = {}  # (guild_id, user_id) -> active warnings, loaded on first use
+        self.slowmode_settings = {}  # guild_id -> {channel_id or 0 for the default: (target, max_delay)}
+        self.slowmode_controllers = {}  # channel_id -> SlowmodeController
+        self.message_archive = MessageArchive(bot)
+
+    async def cog_load(self):
+        self.prune_rate_windows.start()
+        self.adjust_slowmode.start()
+        await self.load_blocklist()
+        self.global_images = await self.load_image_blocklist(0)
+        for timer in self.bot.scheduler.pending('tempmute'):
+            self.active_mutes[(timer.guild_id, timer.data['user_id'])] = timer
+        async with self.bot.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'cases_fts'"
+        ) as cursor:
+            self.case_fts = await cursor.fetchone() is not None
+        await self.message_archive.start()
+
+    async def load_blocklist(self):
+        """(Re)load the shared domain blocklist off the event loop."""
+        self.automod.blocklist = await asyncio.to_thread(
+            DomainBlocklist.from_file, config.DOMAIN_BLOCKLIST_FILE
+        )
+        return len(self.automod.blocklist)
+
+    async def cog_unload(self):
+        self.prune_rate_windows.cancel()
+        self.adjust_slowmode.cancel()
+        if self.hash_pool:
+            self.hash_pool.shutdown(wait=False, cancel_futures=True)
+        await self.message_archive.close()
+
+    async def get_automod_settings(self, guild_id):
+        """Get a guild's automod settings, loading and compiling them on first use."""
+        settings = self.automod_settings.get(guild_id)
+        if settings is not None:
+            return settings
+
+        async with self.bot.db.execute(
+            "SELECT automod_enabled FROM guild_settings WHERE guild_id = ?",
+            (guild_id,)
+        ) as cursor:
+            result = await cursor.fetchone()
+        enabled = bool(result[0]) if result else True
+
+        options = dict(config.AUTOMOD_DEFAULTS)
+        async with self.bot.db.execute(
+            "SELECT option, value FROM automod_settings WHERE guild_id = ?",
+            (guild_id,)
+        ) as cursor:
+            for option, value in await cursor.fetchall():
+                if option in options:
+                    options[option] = type(config.AUTOMOD_DEFAULTS[option])(value)
+
+        async with self.bot.db.execute(
+            "SELECT word FROM banned_words WHERE guild_id = ?",
+            (guild_id,)
+        ) as cursor:
+            words = [word for word, in await cursor.fetchall()]
+
+        async with self.bot.db.execute(
+            "SELECT domain, action FROM domain_rules WHERE guild_id = ?",
+            (guild_id,)
+        ) as cursor:
+            domain_rules = await cursor.fetchall()
+
+        settings = AutoModSettings(
+            enabled=enabled, banned_words=words, domain_rules=domain_rules, **options
+        )
+        images = await self.load_image_blocklist(guild_id)
+        settings.images = images if images else None
+        self.automod_settings[guild_id] = settings
+        return settings
+
+    async def load_image_blocklist(self, guild_id):
+        """Build a BK-tree of a guild's blocked image hashes (guild 0 is the global list)."""
+        async with self.bot.db.execute(
+            "SELECT id, dhash, phash, reason FROM image_blocklist WHERE guild_id = ?",
+            (guild_id,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return BKTree(
+            (to_unsigned(phash), (entry_id, to_unsigned(dhash), reason))
+            for entry_id, dhash, phash, reason in rows
+        )
+
+    def invalidate_automod(self, guild_id):
+        """Drop cached settings and rate windows after the config changes."""
+        self.automod_settings.pop(guild_id, None)
+        for key in [key for key in self.spam_control if key[0] == guild_id]:
+            del self.spam_control[key]
+        self.duplicate_trackers.pop(guild_id, None)
+
+    @tasks.loop(minutes=5)
+    async def prune_rate_windows(self):
+        """Forget rate windows that have gone quiet, keeping memory bounded."""
+        now = time.monotonic()
+        for windows in (self.spam_control, self.channel_rates):
+            for key in [key for key, window in windows.items() if window.idle(now)]:
+                del windows[key]
+
+        for guild_id, tracker in list(self.duplicate_trackers.items()):
+            tracker.expire(now)
+            if not tracker:
+                del self.duplicate_trackers[guild_id]
+
+    async def get_slowmode_settings(self, guild_id):
+        """A guild's adaptive slowmode settings, loaded on first use."""
+        settings = self.slowmode_settings.get(guild_id)
+        if settings is None:
+            async with self.bot.db.execute(
+                "SELECT channel_id, target, max_delay FROM slowmode_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                settings = {
+                    channel_id: (target, max_delay)
+                    for channel_id, target, max_delay in await cursor.fetchall()
+                }
+            self.slowmode_settings[guild_id] = settings
+        return settings
+
+    def slowmode_config(self, settings, channel_id):
+        """(target, max_delay) for a channel, or None if adaptive slowmode is off there."""
+        slowmode = settings.get(channel_id) or settings.get(0)
+        return slowmode if slowmode and slowmode[0] else None
+
+    async def track_slowmode(self, message):
+        settings = self.slowmode_settings.get(message.guild.id)
+        if settings is None:
+            settings = await self.get_slowmode_settings(message.guild.id)
+        if not settings or not isinstance(message.channel, discord.TextChannel):
+            return
+        if self.slowmode_config(settings, message.channel.id) is None:
+            return
+
+        controller = self.slowmode_controllers.get(message.channel.id)
+        if controller is None:
+            controller = self.slowmode_controllers[message.channel.id] = SlowmodeController(
+                message.channel.slowmode_delay
+            )
+        controller.estimator.add()
+
+    @tasks.loop(seconds=config.SLOWMODE_CHECK_INTERVAL)
+    async def adjust_slowmode(self):
+        """Step slowmode up or down in tracked channels, within an edit budget per run."""
+        now = time.monotonic()
+        budget = config.SLOWMODE_MAX_EDITS
+        for channel_id, controller in list(self.slowmode_controllers.items()):
+            channel = self.bot.get_channel(channel_id)
+            settings = self.slowmode_settings.get(channel.guild.id) if channel else None
+            slowmode = self.slowmode_config(settings, channel_id) if settings else None
+            if slowmode is None or controller.idle(now):
+                del self.slowmode_controllers[channel_id]
+                continue
+
+            controller.observe(channel.slowmode_delay, now)
+            if budget <= 0:
+                continue
+            target, max_delay = slowmode
+            delay = controller.decide(
+                target, config.SLOWMODE_STEPS, max_delay, config.SLOWMODE_MIN_CHANGE_INTERVAL, now
+            )
+            if delay is None:
+                continue
+
+            budget -= 1
+            rate = controller.estimator.per_minute(now)
+            try:
+                await channel.edit(
+                    slowmode_delay=delay,
+                    reason=f"Adaptive slowmode: {rate:.0f} messages/min (target {target})"
+                )
+            except discord.HTTPException as e:
+                logger.warning(f"Couldn't change slowmode in {channel_id}: {e}")
+                delay = controller.delay  # Wait a full interval before trying again
+            controller.applied(delay, now)
+
+    @adjust_slowmode.before_loop
+    async def before_adjust_slowmode(self):
+        await self.bot.wait_until_ready()
+
+    def check_message(self, settings, message):
+        """Run every automod check on a message, returning a reason or None."""
+        now = time.monotonic()
+
+        # Per-channel flood counter (logged, not punished)
+        channel_window = self.channel_rates.get(message.channel.id)
+        if channel_window is None:
+            channel_window = self.channel_rates[message.channel.id] = RateWindow(
+                config.AUTOMOD_CHANNEL_LIMIT, config.AUTOMOD_CHANNEL_PER
+            )
+        if channel_window.hit(now):
+            self.bot.dispatch('channel_flood', message.channel)
+
+        # Per-member spam counter
+        if settings.spam_limit:
+            key = (message.guild.id, message.author.id)
+            window = self.spam_control.get(key)
+            if window is None:
+                window = self.spam_control[key] = RateWindow(settings.spam_limit, settings.spam_per)
+            if window.hit(now):
+                return "Spam"
+
+        mention_count = len(message.raw_mentions) + len(message.raw_role_mentions)
+        if message.mention_everyone:
+            mention_count += 1
+        return self.automod.analyze(settings, message.content, mention_count)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Automod pipeline, run for every guild message."""
+        if message.guild:
+            self.message_archive.add(message)
+        if message.author.bot or not message.guild or not isinstance(message.author, discord.Member):
+            return
+
+        await self.track_slowmode(message)
+
+        settings = self.automod_settings.get(message.guild.id) or await self.get_automod_settings(message.guild.id)
+        if not settings.enabled or message.author.guild_permissions.manage_messages:
+            return
+
+        with self.automod_latency.timer():
+            reason = self.check_message(settings, message)
+            cluster = None
+            if not reason and settings.duplicate_limit and message.content:
+                cluster, first = self.track_duplicate(settings, message)
+
+        if reason:
+            await self.automod_action(message, reason)
+        elif cluster:
+            await self.duplicate_action(message, cluster, first)
+        elif message.attachments and settings.scan_images and (settings.images or self.global_images):
+            await self.scan_attachments(message, settings)
+
+    async def get_image_hashes(self, attachment):
+        """Download and hash an image attachment, reusing earlier results for the same file.
+
+        Hashing runs in a process pool so large images never block the event
+        loop. Failures are cached too, so a broken file is only fetched once.
+        """
+        key = (attachment.url.split('?', 1)[0], attachment.size)
+        if key in self.image_hashes:
+            self.image_hashes.move_to_end(key)
+            return self.image_hashes[key]
+
+        hashes = None
+        try:
+            response = await self.bot.http_client.request(
+                'GET', attachment.url, retries=1, max_size=config.IMAGE_SCAN_MAX_BYTES
+            )
+            if response.status == 200:
+                if self.hash_pool is None:
+                    self.hash_pool = ProcessPoolExecutor(max_workers=config.IMAGE_HASH_WORKERS)
+                hashes = await asyncio.get_running_loop().run_in_executor(
+                    self.hash_pool, hash_image, response.body
+                )
+        except HTTPError:
+            pass
+
+        self.image_hashes[key] = hashes
+        if len(self.image_hashes) > config.IMAGE_HASH_CACHE_SIZE:
+            self.image_hashes.popitem(last=False)
+        return hashes
+
+    def match_image(self, settings, hashes):
+        """Find a blocklist entry close to an image's hashes.
+
+        Candidates come from the pHash BK-trees; the dHash must be close as
+        well, which weeds out chance pHash matches between flat images.
+        """
+        _, dhash, phash = hashes
+        for tree in (settings.images, self.global_images):
+            if not tree:
+                continue
+            for distance, (entry_id, entry_dhash, reason) in tree.search(phash, config.IMAGE_MATCH_DISTANCE):
+                if hamming(dhash, entry_dhash) <= config.IMAGE_MATCH_DISTANCE * 2:
+                    return entry_id, reason, distance
+        return None
+
+    async def scan_attachments(self, message, settings):
+        """Remove a message if any of its images is on the image blocklist."""
+        for attachment in message.attachments:
+            if not (attachment.content_type or '').startswith('image/'):
+                continue
+            if attachment.size > config.IMAGE_SCAN_MAX_BYTES:
+                continue
+
+            hashes = await self.get_image_hashes(attachment)
+            match = hashes and self.match_image(settings, hashes)
+            if match:
+                entry_id, reason, distance = match
+                await self.automod_action(
+                    message, "Blocked image",
+                    detail=f"`{attachment.filename}` matched blocked image #{entry_id}"
+                           f" ({reason or 'no reason given'}, distance {distance})"
+                )
+                return
+
+    def track_duplicate(self, settings, message):
+        """Fingerprint a message; return its cluster once it counts as a copy-paste flood.
+
+        The second value is True only for the message that tipped the
+        cluster over the limit, so the flood is logged once.
+        """
+        tracker = self.duplicate_trackers.get(message.guild.id)
+        if tracker is None:
+            tracker = self.duplicate_trackers[message.guild.id] = DuplicateTracker(
+                config.DUPLICATE_WINDOW, config.DUPLICATE_SIMILARITY, config.DUPLICATE_MAX_TRACKED
+            )
+
+        cluster = tracker.add(message.content, message.channel.id, message.id, message.author.id)
+        if cluster is None:
+            return None, False
+        if cluster.flagged:
+            return cluster, False
+        if cluster.is_flood(settings.duplicate_limit):
+            cluster.flagged = True
+            return cluster, True
+        return None, False
+
+    @staticmethod
+    def is_flood_sender(cluster, member, now):
+        """Whether a member is worth timing out for a flood: they repeated it, or their account is new.
+
+        Anyone else most likely joined in on a chat train, so only their copy goes.
+        """
+        return (
+            cluster.authors[member.id] > 1
+            or (now - member.created_at).total_seconds() < config.RAID_NEW_ACCOUNT_AGE
+        )
+
+    async def duplicate_action(self, message, cluster, first):
+        """Bulk delete every tracked copy of a flooded message and time out repeat or new senders."""
+        guild = message.guild
+        by_channel = defaultdict(list)
+        authors = set()
+        for channel_id, message_id, author_id in self.duplicate_trackers[guild.id].drain(cluster):
+            by_channel[channel_id].append(discord.Object(id=message_id))
+            authors.add(author_id)
+
+        deleted = 0
+        for channel_id, messages in by_channel.items():
+            channel = guild.get_channel_or_thread(channel_id)
+            if channel is None:
+                continue
+            for i in range(0, len(messages), 100):
+                chunk = messages[i:i + 100]
+                try:
+                    await channel.delete_messages(chunk, reason="AutoMod: copy-paste flood")
+                    deleted += len(chunk)
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException:
+                    break
+
+        timed_out = []
+        if guild.me.guild_permissions.moderate_members:
+            now = discord.utils.utcnow()
+            for author_id in authors:
+                member = guild.get_member(author_id)
+                if member is None or member.is_timed_out() or not self.is_flood_sender(cluster, member, now):
+                    continue
+                try:
+                    await member.timeout(
+                        timedelta(seconds=config.AUTOMOD_SPAM_TIMEOUT),
+                        reason="AutoMod: copy-paste flood"
+                    )
+                    timed_out.append(author_id)
+                except discord.HTTPException:
+                    pass
+            if timed_out:
+                await self.create_cases(
+                    guild, 'mute', timed_out, guild.me,
+                    reason="AutoMod: copy-paste flood", duration=config.AUTOMOD_SPAM_TIMEOUT
+                )
+
+        if first:
+            await self.log_action(
+                guild, "AutoMod (Copy-Paste Flood)", message.author, guild.me,
+                reason=(
+                    f"{len(cluster)} copies from {len(cluster.authors)} member(s) in "
+                    f"{len(cluster.channels)} channel(s); deleted {deleted}, timed out {len(timed_out)}\n"
+                    f"{message.content[:200]}"
+                ),
+                duration=f"{config.AUTOMOD_SPAM_TIMEOUT // 60} minutes" if timed_out else None
+            )
+
+    async def automod_action(self, message, reason, detail=None):
+        """Delete an offending message, warn the author and log it."""
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            return
+
+        duration = case_id = None
+        if reason == "Spam" and message.guild.me.guild_permissions.moderate_members:
+            try:
+                await message.author.timeout(
+                    timedelta(seconds=config.AUTOMOD_SPAM_TIMEOUT),
+                    reason="AutoMod: spam"
+                )
+                duration = f"{config.AUTOMOD_SPAM_TIMEOUT // 60} minutes"
+                case_id = await self.create_case(
+                    message.guild, 'mute', message.author, message.guild.me,
+                    reason="AutoMod: spam", duration=config.AUTOMOD_SPAM_TIMEOUT
+                )
+            except discord.HTTPException:
+                pass
+
+        try:
+            await message.channel.send(
+                f"⚠️ {message.author.mention}, your message was removed: {reason.lower()}.",
+                delete_after=5
+            )
+        except discord.HTTPException:
+            pass
+
+        await self.log_action(
+            message.guild, f"AutoMod ({reason})", message.author, message.guild.me,
+            reason=f"In {message.channel.mention}: {detail or message.content[:200]}" if detail or message.content else None,
+            duration=duration, case_id=case_id
+        )
+
+    @commands.Cog.listener()
+    async def on_channel_flood(self, channel):
+        """Log a channel flood at most once a minute per channel."""
+        now = time.monotonic()
+        if now - self.flood_alerts.get(channel.id, 0) < 60:
+            return
+        self.flood_alerts[channel.id] = now
+        await self.log_action(
+            channel.guild, "AutoMod (Channel Flood)", channel.guild.me, channel.guild.me,
+            reason=f"{config.AUTOMOD_CHANNEL_LIMIT}+ messages in {config.AUTOMOD_CHANNEL_PER}s in {channel.mention}"
+        )
+
+    async def fetch_user(self, user_id):
+        """Fetch a user for the logs, falling back to a bare ID if Discord won't say who it was."""
+        try:
+            return await self.bot.fetch_user(user_id)
+        except discord.HTTPException:
+            return discord.Object(id=user_id)
+
+    async def create_case(self, guild, action, user, moderator, reason=None, duration=None):
+        """Record a moderation case and return its number. ``duration`` is in seconds."""
+        async with self.bot.db.execute("""
+            INSERT INTO cases (guild_id, action, user_id, moderator_id, reason, duration, created)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (guild.id, action, user.id, moderator.id, reason, duration, time.time())) as cursor:
+            case_id = cursor.lastrowid
+        await self.bot.db.commit()
+        return case_id
+
+    async def create_cases(self, guild, action, user_ids, moderator, reason=None, duration=None):
+        """Record the same action against many users in one statement."""
+        now = time.time()
+        await self.bot.db.executemany("""
+            INSERT INTO cases (guild_id, action, user_id, moderator_id, reason, duration, created)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(guild.id, action, user_id, moderator.id, reason, duration, now) for user_id in user_ids])
+        await self.bot.db.commit()
+
+    async def log_action(self, guild, action_type, user, moderator, reason=None, duration=None, case_id=None):
+        """Queue a moderation action for the server's log channel."""
+        embed = discord.Embed(
+            title=f"Moderation Action: {action_type}",
+            color=config.WARNING_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        if user is not None:
+            name = "Unknown User" if isinstance(user, discord.Object) else user
+            embed.add_field(name="User", value=f"{name} ({user.id})", inline=False)
+        embed.add_field(name="Moderator", value=f"{moderator} ({moderator.id})", inline=False)
+        if reason:
+            embed.add_field(name="Reason", value=reason, inline=False)
+        if duration:
+            embed.add_field(name="Duration", value=duration, inline=False)
+        if case_id:
+            embed.set_footer(text=f"Case #{case_id}")
+
+        await self.bot.mod_log.send(guild, embed)
+
+    @commands.command()
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    async def kick(self, ctx, member: discord.Member, *, reason=None):
+        """Kick a member from the server."""
+        if member == ctx.author:
+            return await ctx.send("❌ You cannot kick yourself!")
+            
+        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
+            return await ctx.send("❌ You cannot kick someone with a higher or equal role!")
+
+        reason = reason or "No reason provided"
+        full_reason = f"Kicked by {ctx.author} (ID: {ctx.author.id}) - {reason}"
+
+        try:
+            # Send DM to user
+            embed = discord.Embed(
+                title="👢 You have been kicked",
+                description=f"You have been kicked from {ctx.guild.name}",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Reason", value=reason)
+            try:
+                await member.send(embed=embed)
+            except:
+                pass  # User might have DMs disabled
+
+            # Kick user
+            await member.kick(reason=full_reason)
+            
+            # Log the kick
+            embed = discord.Embed(
+                title="👢 Member Kicked",
+                description=f"{member.mention} has been kicked",
+                color=discord.Color.orange(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="User", value=f"{member} (ID: {member.id})")
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            embed.add_field(name="Reason", value=reason, inline=False)
+            
+            await ctx.send(embed=embed)
+            case_id = await self.create_case(ctx.guild, 'kick', member, ctx.author, reason=reason)
+            await self.log_action(ctx.guild, "Kick", member, ctx.author, reason=reason, case_id=case_id)
+
+        except discord.Forbidden:
+            await ctx.send("❌ I don't have permission to kick that user!")
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ An error occurred: {e}")
+
+    @commands.command()
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def ban(self, ctx, member: discord.Member, *, reason=None):
+        """Ban a member from the server."""
+        if member == ctx.author:
+            return await ctx.send("❌ You cannot ban yourself!")
+            
+        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
+            return await ctx.send("❌ You cannot ban someone with a higher or equal role!")
+
+        reason = reason or "No reason provided"
+        full_reason = f"Banned by {ctx.author} (ID: {ctx.author.id}) - {reason}"
+
+        try:
+            # Send DM to user
+            embed = discord.Embed(
+                title="🔨 You have been banned",
+                description=f"You have been banned from {ctx.guild.name}",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Reason", value=reason)
+            try:
+                await member.send(embed=embed)
+            except:
+                pass  # User might have DMs disabled
+
+            # Ban user
+            await member.ban(reason=full_reason, delete_message_days=1)
+            
+            # Log the ban
+            embed = discord.Embed(
+                title="🔨 Member Banned",
+                description=f"{member.mention} has been banned",
+                color=discord.Color.red(),
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="User", value=f"{member} (ID: {member.id})")
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            embed.add_field(name="Reason", value=reason, inline=False)
+            
+            await ctx.send(embed=embed)
+            case_id = await self.create_case(ctx.guild, 'ban', member, ctx.author, reason=reason)
+            await self.log_action(ctx.guild, "Ban", member, ctx.author, reason=reason, case_id=case_id)
+
+        except discord.Forbidden:
+            await ctx.send("❌ I don't have permission to ban that user!")
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ An error occurred: {e}")
+
+    def resolve_mass_targets(self, ctx, flags, members_only):
+        """Turn mass action flags into (targets, skipped count) or an error message."""
+        guild = ctx.guild
+        ids = {int(match) for match in re.findall(r'\d{15,21}', flags.ids or '')}
+        if not (ids or flags.joined or flags.match):
+            return "❌ Give at least one of `--ids`, `--joined` or `--match`!"
+
+        pattern = None
+        if flags.match:
+            try:
+                pattern = GlobPattern(flags.match)
+            except ValueError as e:
+                return f"❌ {e}"
+
+        targets = {}
+        if flags.joined or pattern:
+            cutoff = discord.utils.utcnow() - flags.joined if flags.joined else None
+            for member in guild.members:
+                if cutoff and (member.joined_at is None or member.joined_at < cutoff):
+                    continue
+                if pattern and not any(
+                    pattern.matches(name)
+                    for name in (member.name, member.display_name, member.global_name) if name
+                ):
+                    continue
+                targets[member.id] = member
+
+        skipped = 0
+        for user_id in ids:
+            member = guild.get_member(user_id)
+            if member is None and members_only:
+                skipped += 1  # Can't kick someone who isn't here
+                continue
+            targets[user_id] = member or discord.Object(id=user_id)
+
+        allowed = []
+        for target in targets.values():
+            if target.id in (ctx.author.id, guild.me.id, guild.owner_id):
+                skipped += 1
+            elif isinstance(target, discord.Member) and (
+                target.top_role >= guild.me.top_role
+                or (target.top_role >= ctx.author.top_role and ctx.author != guild.owner)
+            ):
+                skipped += 1
+            else:
+                allowed.append(target)
+
+        if len(allowed) > config.MASS_ACTION_MAX:
+            return f"❌ That matches {len(allowed):,} members; the limit is {config.MASS_ACTION_MAX:,} at once!"
+        return allowed, skipped
+
+    async def mass_action(self, ctx, flags, action):
+        """Shared flow for massban/masskick: preview, confirm, run with progress, log once.
+
+        Returns the IDs that were actioned, or None if nothing was run.
+        """
+        banning = action == "ban"
+        past = "banned" if banning else "kicked"
+        result = self.resolve_mass_targets(ctx, flags, members_only=not banning)
+        if isinstance(result, str):
+            await ctx.send(result)
+            return None
+        targets, skipped = result
+        if not targets:
+            await ctx.send(f"❌ Nobody to {action}" + (f" ({skipped} skipped)." if skipped else "."))
+            return None
+
+        verb = "Ban" if banning else "Kick"
+        sample = ", ".join(str(target) if isinstance(target, discord.Member) else str(target.id) for target in targets[:15])
+        embed = discord.Embed(
+            title=f"{'🔨' if banning else '👢'} Mass {verb}: {len(targets):,} member(s)",
+            description=f"{sample}{' …' if len(targets) > 15 else ''}",
+            color=discord.Color.red() if banning else discord.Color.orange()
+        )
+        if skipped:
+            embed.set_footer(text=f"{skipped} skipped (you, me, the owner, higher roles or not in the server)")
+        view = ConfirmView(ctx.author)
+        status = await ctx.send(embed=embed, view=view)
+        await view.wait()
+        if not view.confirmed:
+            await status.edit(content="Cancelled.", embed=None, view=None)
+            return None
+
+        reason = flags.reason or "No reason provided"
+        full_reason = f"Mass {action} by {ctx.author} (ID: {ctx.author.id}) - {reason}"[:512]
+        done, failed = [], []
+        started = time.monotonic()
+
+        def progress_embed(final=False):
+            processed = len(done) + len(failed)
+            progress = discord.Embed(
+                title=f"Mass {verb} {'Complete' if final else 'in Progress'}",
+                description=f"{processed:,}/{len(targets):,} processed · {len(done):,} {past}"
+                            f"{' · ' + format(len(failed), ',') + ' failed' if failed else ''}",
+                color=config.SUCCESS_COLOR if final else config.INFO_COLOR
+            )
+            if final:
+                progress.set_footer(text=f"Took {format_duration(time.monotonic() - started)}")
+            return progress
+
+        async def report():
+            while True:
+                await asyncio.sleep(config.MASS_ACTION_PROGRESS_INTERVAL)
+                try:
+                    await status.edit(embed=progress_embed())
+                except discord.HTTPException:
+                    pass
+
+        await status.edit(embed=progress_embed(), view=None)
+        reporter = asyncio.create_task(report())
+        try:
+            if banning and ctx.guild.me.guild_permissions.manage_guild:
+                # One request per 200 users instead of one per user
+                for i in range(0, len(targets), 200):
+                    chunk = targets[i:i + 200]
+                    try:
+                        outcome = await ctx.guild.bulk_ban(chunk, reason=full_reason, delete_message_seconds=86400)
+                    except discord.HTTPException:
+                        failed.extend(target.id for target in chunk)
+                        continue
+                    done.extend(user.id for user in outcome.banned)
+                    failed.extend(user.id for user in outcome.failed)
+            else:
+                pending = iter(targets)
+
+                async def worker():
+                    # Workers share one iterator, so each target is taken exactly once
+                    for target in pending:
+                        try:
+                            if banning:
+                                await ctx.guild.ban(target, reason=full_reason, delete_message_seconds=86400)
+                            else:
+                                await ctx.guild.kick(target, reason=full_reason)
+                            done.append(target.id)
+                        except discord.HTTPException:
+                            failed.append(target.id)
+
+                await asyncio.gather(*(worker() for _ in range(min(config.MASS_ACTION_WORKERS, len(targets)))))
+        finally:
+            reporter.cancel()
+
+        await status.edit(embed=progress_embed(final=True))
+        if done:
+            await self.create_cases(ctx.guild, action, done, ctx.author, reason=f"Mass {action}: {reason}")
+        await self.log_action(
+            ctx.guild, f"Mass {verb}", None, ctx.author,
+            reason=f"{reason}\n{len(done):,} {past}, {len(failed):,} failed, {skipped:,} skipped"
+        )
+        return done
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def massban(self, ctx, *, flags: MassActionFlags):
+        """Ban many users at once: --ids <ids> --joined <10m> --match <pattern> --reason <text>."""
+        await self.mass_action(ctx, flags, "ban")
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    async def masskick(self, ctx, *, flags: MassActionFlags):
+        """Kick many members at once: --ids <ids> --joined <10m> --match <pattern> --reason <text>."""
+        await self.mass_action(ctx, flags, "kick")
+
+    async def mute_member(self, member, moderator, duration, reason):
+        """Time a member out, schedule the expiry log and record the case."""
+        guild = member.guild
+        await member.timeout(duration, reason=f"Muted by {moderator} (ID: {moderator.id}) - {reason}")
+
+        # A new mute replaces the old one's expiry
+        previous = self.active_mutes.pop((guild.id, member.id), None)
+        if previous:
+            await self.bot.scheduler.cancel(previous.id)
+        self.active_mutes[(guild.id, member.id)] = await self.bot.scheduler.create(
+            'tempmute', discord.utils.utcnow() + duration, guild_id=guild.id,
+            user_id=member.id, moderator_id=moderator.id, reason=reason
+        )
+
+        case_id = await self.create_case(
+            guild, 'mute', member, moderator, reason=reason, duration=int(duration.total_seconds())
+        )
+        await self.log_action(
+            guild, "Mute", member, moderator, reason=reason,
+            duration=format_duration(duration.total_seconds()), case_id=case_id
+        )
+
+    @commands.command()
+    @commands.has_permissions(moderate_members=True)
+    @commands.bot_has_permissions(moderate_members=True)
+    async def tempmute(self, ctx, member: discord.Member, duration: Duration, *, reason=None):
+        """Mute (time out) a member for a while, e.g. tempmute @user 2h spamming. Up to 28 days."""
+        if member == ctx.author:
+            return await ctx.send("❌ You cannot mute yourself!")
+
+        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
+            return await ctx.send("❌ You cannot mute someone with a higher or equal role!")
+
+        if duration > timedelta(days=28):
+            return await ctx.send("❌ Mutes can last at most 28 days!")
+
+        reason = reason or "No reason provided"
+        try:
+            await self.mute_member(member, ctx.author, duration, reason)
+        except discord.Forbidden:
+            return await ctx.send("❌ I don't have permission to mute that user!")
+
+        embed = discord.Embed(
+            title="🔇 Member Muted",
+            description=f"{member.mention} has been muted for {format_duration(duration.total_seconds())}",
+            color=discord.Color.orange(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="User", value=f"{member} (ID: {member.id})")
+        embed.add_field(name="Moderator", value=ctx.author.mention)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.has_permissions(moderate_members=True)
+    @commands.bot_has_permissions(moderate_members=True)
+    async def unmute(self, ctx, member: discord.Member, *, reason=None):
+        """Unmute a member before their mute runs out."""
+        timer = self.active_mutes.pop((ctx.guild.id, member.id), None)
+        if timer:
+            await self.bot.scheduler.cancel(timer.id)
+        elif not member.is_timed_out():
+            return await ctx.send(f"❌ {member} isn't muted!")
+
+        reason = reason or "No reason provided"
+        try:
+            await member.timeout(None, reason=f"Unmuted by {ctx.author} (ID: {ctx.author.id}) - {reason}")
+        except discord.Forbidden:
+            return await ctx.send("❌ I don't have permission to unmute that user!")
+        await ctx.send(f"🔊 {member.mention} has been unmuted!")
+        case_id = await self.create_case(ctx.guild, 'unmute', member, ctx.author, reason=reason)
+        await self.log_action(ctx.guild, "Unmute", member, ctx.author, reason=reason, case_id=case_id)
+
+    @commands.Cog.listener()
+    async def on_tempmute_timer_complete(self, timer):
+        """Discord lifts the timeout itself; just forget and log it."""
+        user_id = timer.data['user_id']
+        self.active_mutes.pop((timer.guild_id, user_id), None)
+        guild = self.bot.get_guild(timer.guild_id)
+        if guild:
+            user = guild.get_member(user_id) or await self.fetch_user(user_id)
+            case_id = await self.create_case(guild, 'unmute', user, guild.me, reason="Mute expired")
+            await self.log_action(
+                guild, "Unmute (Expired)", user, guild.me, reason=timer.data.get('reason'), case_id=case_id
+            )
+
+    @commands.command()
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def tempban(self, ctx, member: discord.Member, duration: Duration, *, reason=None):
+        """Ban a member for a while, e.g. tempban @user 7d raiding."""
+        if member == ctx.author:
+            return await ctx.send("❌ You cannot ban yourself!")
+
+        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
+            return await ctx.send("❌ You cannot ban someone with a higher or equal role!")
+
+        if duration > timedelta(days=config.MAX_TEMPBAN_DAYS):
+            return await ctx.send(f"❌ Tempbans can last at most {config.MAX_TEMPBAN_DAYS} days!")
+
+        reason = reason or "No reason provided"
+        length = format_duration(duration.total_seconds())
+        try:
+            embed = discord.Embed(
+                title="🔨 You have been temporarily banned",
+                description=f"You have been banned from {ctx.guild.name} for {length}",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Reason", value=reason)
+            try:
+                await member.send(embed=embed)
+            except discord.HTTPException:
+                pass  # User might have DMs disabled
+
+            await member.ban(
+                reason=f"Tempbanned by {ctx.author} (ID: {ctx.author.id}) for {length} - {reason}",
+                delete_message_days=1
+            )
+        except discord.Forbidden:
+            return await ctx.send("❌ I don't have permission to ban that user!")
+
+        await self.bot.scheduler.create(
+            'tempban', discord.utils.utcnow() + duration, guild_id=ctx.guild.id,
+            user_id=member.id, moderator_id=ctx.author.id, reason=reason
+        )
+
+        embed = discord.Embed(
+            title="🔨 Member Tempbanned",
+            description=f"{member.mention} has been banned for {length}",
+            color=discord.Color.red(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="User", value=f"{member} (ID: {member.id})")
+        embed.add_field(name="Moderator", value=ctx.author.mention)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        await ctx.send(embed=embed)
+        case_id = await self.create_case(
+            ctx.guild, 'ban', member, ctx.author, reason=reason, duration=int(duration.total_seconds())
+        )
+        await self.log_action(ctx.guild, "Tempban", member, ctx.author, reason=reason, duration=length, case_id=case_id)
+
+    @commands.Cog.listener()
+    async def on_tempban_timer_complete(self, timer):
+        guild = self.bot.get_guild(timer.guild_id)
+        if guild is None:
+            return
+        user_id = timer.data['user_id']
+        try:
+            await guild.unban(discord.Object(id=user_id), reason="Tempban expired")
+        except discord.NotFound:
+            return  # Already unbanned by hand
+        except discord.HTTPException as e:
+            logger.error(f"Failed to lift tempban of {user_id} in {guild.id}: {e}")
+            return
+        user = await self.fetch_user(user_id)
+        case_id = await self.create_case(guild, 'unban', user, guild.me, reason="Tempban expired")
+        await self.log_action(
+            guild, "Unban (Tempban Expired)", user, guild.me, reason=timer.data.get('reason'), case_id=case_id
+        )
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild, user):
+        """A manual unban makes any pending tempban expiry pointless."""
+        for timer in self.bot.scheduler.pending('tempban', guild.id):
+            if timer.data['user_id'] == user.id:
+                await self.bot.scheduler.cancel(timer.id)
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    @commands.bot_has_permissions(manage_messages=True)
+    async def warn(self, ctx, member: discord.Member, *, reason=None):
+        """Warn a member."""
+        if member == ctx.author:
+            return await ctx.send("❌ You cannot warn yourself!")
+            
+        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
+            return await ctx.send("❌ You cannot warn someone with a higher or equal role!")
+
+        reason = reason or "No reason provided"
+
+        # Record the warning and bump the member's active count
+        case_id = await self.create_case(ctx.guild, 'warn', member, ctx.author, reason=reason)
+        warning_count = await self.add_warnings(ctx.guild.id, member.id, 1)
+        if config.WARNING_EXPIRY_DAYS:
+            await self.bot.scheduler.create(
+                'warning_expiry', discord.utils.utcnow() + timedelta(days=config.WARNING_EXPIRY_DAYS),
+                guild_id=ctx.guild.id, user_id=member.id, case_id=case_id
+            )
+        step = config.WARNING_ESCALATION.get(warning_count)
+        consequence = self.describe_escalation(step) if step else None
+
+        # DM the warned user first, escalating may remove them from the server
+        try:
+            user_embed = discord.Embed(
+                title="⚠️ You have been warned",
+                description=f"You have received a warning in {ctx.guild.name}",
+                color=discord.Color.yellow()
+            )
+            user_embed.add_field(name="Reason", value=reason)
+            user_embed.add_field(name="Warning Count", value=f"You now have {warning_count} warning(s)")
+            if consequence:
+                user_embed.add_field(name="Consequence", value=f"You have been {consequence}", inline=False)
+            await member.send(embed=user_embed)
+        except:
+            pass  # User might have DMs disabled
+
+        if step and not await self.escalate(member, warning_count, step):
+            consequence = None
+
+        # Send warning message
+        embed = discord.Embed(
+            title="⚠️ Warning Issued",
+            description=f"{member.mention} has been warned",
+            color=discord.Color.yellow(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="User", value=f"{member} (ID: {member.id})")
+        embed.add_field(name="Moderator", value=ctx.author.mention)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Warning Count", value=f"This user now has {warning_count} warning(s)")
+        if consequence:
+            embed.add_field(name="Escalation", value=f"Automatically {consequence}", inline=False)
+        embed.set_footer(text=f"Case #{case_id}")
+        
+        await ctx.send(embed=embed)
+        await self.log_action(ctx.guild, "Warn", member, ctx.author, reason=reason, case_id=case_id)
+
+    async def get_warning_count(self, guild_id, user_id):
+        """A member's active warnings, read from warning_counts once and then kept in memory."""
+        key = (guild_id, user_id)
+        if key not in self.warning_counts:
+            async with self.bot.db.execute(
+                "SELECT count FROM warning_counts WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            ) as cursor:
+                result = await cursor.fetchone()
+            # Another warn may have loaded it while we waited
+            self.warning_counts.setdefault(key, result[0] if result else 0)
+        return self.warning_counts[key]
+
+    async def add_warnings(self, guild_id, user_id, amount):
+        """Change a member's active warning count by ``amount`` and return the new count."""
+        await self.get_warning_count(guild_id, user_id)
+        key = (guild_id, user_id)
+        count = self.warning_counts[key] = max(self.warning_counts[key] + amount, 0)
+        await self.bot.db.execute("""
+            INSERT INTO warning_counts (guild_id, user_id, count) VALUES (?, ?, ?)
+            ON CONFLICT (guild_id, user_id) DO UPDATE SET count = excluded.count
+        """, (guild_id, user_id, count))
+        await self.bot.db.commit()
+        return count
+
+    @staticmethod
+    def describe_escalation(step):
+        action, seconds = step
+        if action == 'mute':
+            return f"muted for {format_duration(seconds)}"
+        return "kicked" if action == 'kick' else "banned"
+
+    async def escalate(self, member, count, step):
+        """Apply the escalation ladder step for reaching ``count`` warnings. Returns whether it worked."""
+        action, seconds = step
+        guild = member.guild
+        reason = f"Reached {count} warnings"
+        try:
+            if action == 'mute':
+                await self.mute_member(member, guild.me, timedelta(seconds=seconds), reason)
+                return True
+            if action == 'kick':
+                await member.kick(reason=f"Automatic escalation: {reason}")
+            else:
+                await member.ban(reason=f"Automatic escalation: {reason}", delete_message_days=0)
+        except discord.HTTPException as e:
+            logger.warning(f"Couldn't escalate warnings for {member.id} in {guild.id}: {e}")
+            return False
+
+        case_id = await self.create_case(guild, action, member, guild.me, reason=reason)
+        await self.log_action(guild, f"{action.title()} (Escalation)", member, guild.me, reason=reason, case_id=case_id)
+        return True
+
+    @commands.Cog.listener()
+    async def on_warning_expiry_timer_complete(self, timer):
+        await self.add_warnings(timer.guild_id, timer.data['user_id'], -1)
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    async def warnings(self, ctx, member: discord.Member):
+        """View warnings for a member."""
+        active = await self.get_warning_count(ctx.guild.id, member.id)
+        await self.send_cases(
+            ctx, f"Warnings for {member} ({active} active)",
+            "guild_id = ? AND user_id = ? AND action = 'warn'", (ctx.guild.id, member.id),
+            empty=f"✨ {member} has no warnings!"
+        )
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    async def clearwarnings(self, ctx, member: discord.Member):
+        """Clear all warnings for a member."""
+        if member.top_role >= ctx.author.top_role and not ctx.author == ctx.guild.owner:
+            return await ctx.send("❌ You cannot clear warnings for someone with a higher or equal role!")
+
+        await self.bot.db.execute("""
+            DELETE FROM cases
+            WHERE guild_id = ? AND user_id = ? AND action = 'warn'
+        """, (ctx.guild.id, member.id))
+        await self.bot.db.execute(
+            "DELETE FROM warning_counts WHERE guild_id = ? AND user_id = ?", (ctx.guild.id, member.id)
+        )
+        await self.bot.db.commit()
+        self.warning_counts[(ctx.guild.id, member.id)] = 0
+        for timer in self.bot.scheduler.pending('warning_expiry', ctx.guild.id):
+            if timer.data['user_id'] == member.id:
+                await self.bot.scheduler.cancel(timer.id)
+
+        embed = discord.Embed(
+            title="✨ Warnings Cleared",
+            description=f"All warnings have been cleared for {member.mention}",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    async def query_cases(self, where, params, cursor, limit):
+        """Cases matching ``where``, newest first, starting after a (created, id) cursor.
+
+        Every index on cases ends in ``created`` (and implicitly the rowid),
+        so the cursor comparison is a range on the index and no sort is needed.
+        """
+        if cursor is not None:
+            where += " AND (created, id) < (?, ?)"
+            params = (*params, *cursor)
+        async with self.bot.db.execute(
+            f"SELECT {CASE_COLUMNS} FROM cases WHERE {where} ORDER BY created DESC, id DESC LIMIT ?",
+            (*params, limit)
+        ) as db_cursor:
+            return await db_cursor.fetchall()
+
+    @staticmethod
+    def format_case(case):
+        case_id, action, user_id, moderator_id, reason, duration, created = case
+        emoji, label = CASE_ACTIONS.get(action, ("📋", action.title()))
+        line = f"**#{case_id}** {emoji} {label} · <@{user_id}> by <@{moderator_id}> · <t:{int(created)}:R>"
+        if duration:
+            line += f" · {format_duration(duration)}"
+        if reason:
+            line += f"\n{reason[:150]}{'…' if len(reason) > 150 else ''}"
+        return line
+
+    async def send_cases(self, ctx, title, where, params, empty):
+        """Send a page of cases, with buttons if there's more than one page."""
+        async def fetch(cursor, limit):
+            return await self.query_cases(where, params, cursor, limit)
+
+        view = CasePages(ctx.author, title, fetch, self.format_case)
+        await view.load()
+        if not view.cases:
+            return await ctx.send(empty)
+        if view.older.disabled:
+            return await ctx.send(embed=view.embed())
+        view.message = await ctx.send(embed=view.embed(), view=view)
+
+    @commands.command(name="case")
+    @commands.has_permissions(manage_messages=True)
+    async def case_info(self, ctx, case_id: int):
+        """Show one moderation case by its number."""
+        async with self.bot.db.execute(
+            f"SELECT {CASE_COLUMNS} FROM cases WHERE id = ? AND guild_id = ?",
+            (case_id, ctx.guild.id)
+        ) as cursor:
+            case = await cursor.fetchone()
+        if not case:
+            return await ctx.send(f"❌ There's no case #{case_id} in this server!")
+
+        _, action, user_id, moderator_id, reason, duration, created = case
+        emoji, label = CASE_ACTIONS.get(action, ("📋", action.title()))
+        embed = discord.Embed(
+            title=f"{emoji} Case #{case_id}: {label}",
+            color=config.INFO_COLOR,
+            timestamp=datetime.fromtimestamp(created, timezone.utc)
+        )
+        embed.add_field(name="User", value=f"<@{user_id}> (ID: {user_id})")
+        embed.add_field(name="Moderator", value=f"<@{moderator_id}>")
+        if duration:
+            embed.add_field(name="Duration", value=format_duration(duration))
+        embed.add_field(name="Reason", value=reason or "No reason provided", inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    async def history(self, ctx, user: discord.User = None):
+        """Show a user's moderation history, or the server's latest cases."""
+        if user is None:
+            return await self.send_cases(
+                ctx, "Recent Cases", "guild_id = ?", (ctx.guild.id,),
+                empty="✨ This server has no moderation cases yet!"
+            )
+        await self.send_cases(
+            ctx, f"Moderation History for {user}",
+            "guild_id = ? AND user_id = ?", (ctx.guild.id, user.id),
+            empty=f"✨ {user} has a clean record!"
+        )
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    async def modhistory(self, ctx, moderator: discord.User):
+        """Show the cases a moderator has handled."""
+        await self.send_cases(
+            ctx, f"Cases Handled by {moderator}",
+            "guild_id = ? AND moderator_id = ?", (ctx.guild.id, moderator.id),
+            empty=f"❌ {moderator} hasn't handled any cases here!"
+        )
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    async def modsearch(self, ctx, *, query):
+        """Search case reasons, e.g. modsearch scam link or modsearch raid*."""
+        if self.case_fts:
+            match = fts_query(query)
+            if not match:
+                return await ctx.send("❌ Give me some words to search for!")
+            where = "guild_id = ? AND id IN (SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?)"
+        else:
+            # SQLite built without FTS5: a slower substring scan of the server's cases
+            match = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where = "guild_id = ? AND reason LIKE ? ESCAPE '\\'"
+        await self.send_cases(
+            ctx, f"Cases Matching \"{query[:100]}\"", where, (ctx.guild.id, match),
+            empty="❌ No cases match that search!"
+        )
+
+    async def edit_overwrites(self, edits, reason):
+        """Apply (channel, overwrite) pairs with a few requests in flight.
+
+        Overwrite edits are rate limited per channel, so parallel edits to
+        different channels don't slow each other down; discord.py waits out
+        any 429s itself. Returns the channels that were edited.
+        """
+        done = []
+        pending = iter(edits)
+
+        async def worker():
+            for channel, overwrite in pending:
+                try:
+                    await channel.set_permissions(channel.guild.default_role, overwrite=overwrite, reason=reason)
+                    done.append(channel)
+                except discord.NotFound:
+                    done.append(channel)  # Deleted meanwhile; nothing left to restore
+                except discord.HTTPException as e:
+                    logger.warning(f"Couldn't edit overwrites of {channel.id}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(min(config.LOCKDOWN_CONCURRENCY, len(edits)))))
+        return done
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_channels=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def lockdown(self, ctx, channels: commands.Greedy[discord.TextChannel] = None, *, reason=None):
+        """Stop @everyone from talking in the given channels, or in every channel."""
+        reason = reason or "No reason provided"
+        everyone = ctx.guild.default_role
+        candidates = channels or ctx.guild.text_channels
+
+        async with self.bot.db.execute(
+            "SELECT channel_id FROM channel_locks WHERE guild_id = ?", (ctx.guild.id,)
+        ) as cursor:
+            locked = {row[0] for row in await cursor.fetchall()}
+
+        # Channels @everyone already can't talk in don't need locking (or unlocking later)
+        targets = [
+            channel for channel in candidates
+            if channel.id not in locked
+            and channel.permissions_for(everyone).send_messages
+            and channel.permissions_for(ctx.guild.me).manage_roles
+        ]
+        if not targets:
+            return await ctx.send("❌ There's nothing left to lock!")
+
+        # Snapshot the current @everyone overwrites in one transaction first, so
+        # unlock can restore them exactly even if the bot stops halfway
+        snapshots, edits = [], []
+        for channel in targets:
+            overwrite = channel.overwrites_for(everyone)
+            if everyone not in channel.overwrites:
+                saved = None
+            else:
+                allow, deny = overwrite.pair()
+                saved = json.dumps({'allow': allow.value, 'deny': deny.value})
+            snapshots.append((ctx.guild.id, channel.id, saved))
+
+            overwrite.update(
+                send_messages=False, add_reactions=False, send_messages_in_threads=False,
+                create_public_threads=False, create_private_threads=False
+            )
+            edits.append((channel, overwrite))
+
+        await self.bot.db.executemany(
+            "INSERT OR IGNORE INTO channel_locks (guild_id, channel_id, permissions) VALUES (?, ?, ?)",
+            snapshots
+        )
+        await self.bot.db.commit()
+
+        status = await ctx.send(f"🔒 Locking {len(targets)} channel(s)...")
+        started = time.monotonic()
+        done = await self.edit_overwrites(edits, f"Lockdown by {ctx.author} (ID: {ctx.author.id}) - {reason}")
+
+        # Channels that couldn't be edited are still unlocked; forget their snapshots
+        failed = [(ctx.guild.id, channel.id) for channel, _ in edits if channel not in done]
+        if failed:
+            await self.bot.db.executemany(
+                "DELETE FROM channel_locks WHERE guild_id = ? AND channel_id = ?", failed
+            )
+            await self.bot.db.commit()
+
+        await status.edit(
+            content=f"🔒 Locked {len(done)} channel(s) in {time.monotonic() - started:.1f}s"
+                    + (f" ({len(failed)} failed)" if failed else "")
+                    + f". Use `{ctx.clean_prefix}unlock` to restore them."
+        )
+        await self.log_action(
+            ctx.guild, "Lockdown", None, ctx.author,
+            reason=f"{reason}\n{len(done)} channel(s) locked" + (f", {len(failed)} failed" if failed else "")
+        )
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_channels=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def unlock(self, ctx, channels: commands.Greedy[discord.TextChannel] = None, *, reason=None):
+        """Restore channels locked by lockdown (all of them if none are given)."""
+        reason = reason or "No reason provided"
+        async with self.bot.db.execute(
+            "SELECT channel_id, permissions FROM channel_locks WHERE guild_id = ?", (ctx.guild.id,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        if channels:
+            wanted = {channel.id for channel in channels}
+            rows = [row for row in rows if row[0] in wanted]
+        if not rows:
+            return await ctx.send("❌ None of those channels are locked!")
+
+        edits, gone = [], []
+        for channel_id, saved in rows:
+            channel = ctx.guild.get_channel(channel_id)
+            if channel is None:
+                gone.append(channel_id)
+                continue
+            if saved is None:
+                overwrite = None  # There was no @everyone overwrite before; remove ours
+            else:
+                saved = json.loads(saved)
+                overwrite = discord.PermissionOverwrite.from_pair(
+                    discord.Permissions(saved['allow']), discord.Permissions(saved['deny'])
+                )
+            edits.append((channel, overwrite))
+
+        status = await ctx.send(f"🔓 Unlocking {len(edits)} channel(s)...")
+        started = time.monotonic()
+        done = await self.edit_overwrites(edits, f"Unlocked by {ctx.author} (ID: {ctx.author.id}) - {reason}")
+
+        # Keep snapshots of channels that failed so unlock can be retried
+        await self.bot.db.executemany(
+            "DELETE FROM channel_locks WHERE guild_id = ? AND channel_id = ?",
+            [(ctx.guild.id, channel.id) for channel in done] + [(ctx.guild.id, channel_id) for channel_id in gone]
+        )
+        await self.bot.db.commit()
+
+        failed = len(edits) - len(done)
+        await status.edit(
+            content=f"🔓 Unlocked {len(done)} channel(s) in {time.monotonic() - started:.1f}s"
+                    + (f" ({failed} failed, run it again to retry)" if failed else "") + "."
+        )
+        await self.log_action(
+            ctx.guild, "Unlock", None, ctx.author,
+            reason=f"{reason}\n{len(done)} channel(s) unlocked" + (f", {failed} failed" if failed else "")
+        )
+
+    @commands.command()
+    @commands.has_permissions(manage_guild=True)
+    async def modlog(self, ctx, channel: discord.TextChannel = None):
+        """Set the channel moderation actions are logged to, or turn logging off."""
+        await self.bot.db.execute(
+            "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (ctx.guild.id,)
+        )
+        await self.bot.db.execute(
+            "UPDATE guild_settings SET log_channel_id = ? WHERE guild_id = ?",
+            (channel.id if channel else None, ctx.guild.id)
+        )
+        await self.bot.db.commit()
+        self.bot.mod_log.invalidate(ctx.guild.id)
+        self.bot.dispatch('guild_settings_update', ctx.guild.id)
+
+        if channel is None:
+            return await ctx.send("✅ Moderation logging disabled!")
+        if not channel.permissions_for(ctx.guild.me).manage_webhooks:
+            return await ctx.send(
+                f"✅ Moderation actions will be logged to {channel.mention}. "
+                "Give me **Manage Webhooks** there so logs can be delivered in batches."
+            )
+        await ctx.send(f"✅ Moderation actions will be logged to {channel.mention}!")
+
+    def build_purge_check(self, flags):
+        """Turn purge flags into one message predicate, or an error message."""
+        predicates = []
+        if flags.user:
+            predicates.append(from_user(flags.user.id))
+        if flags.match:
+            try:
+                predicates.append(matches(GlobPattern(flags.match)))
+            except ValueError as e:
+                return f"❌ {e}"
+        if flags.has:
+            kinds = {'links': has_links, 'files': has_attachments, 'embeds': has_embeds}
+            for kind in re.split(r'[\s,]+', flags.has.lower().strip()):
+                if kind not in kinds:
+                    return f"❌ `--has` takes {', '.join(f'`{name}`' for name in kinds)}!"
+                predicates.append(kinds[kind])
+        if flags.bots is not None:
+            predicates.append(from_bots(flags.bots))
+        return all_of(predicates)
+
+    def resolve_purge_channels(self, ctx, text):
+        """Channels to purge: the current one, the ones listed, or every one we can."""
+        if not text:
+            return [ctx.channel]
+        if text.strip().lower() == 'all':
+            channels = ctx.guild.text_channels
+        else:
+            channels = [
+                channel for channel_id in dict.fromkeys(int(match) for match in re.findall(r'\d{15,21}', text))
+                if isinstance(channel := ctx.guild.get_channel_or_thread(channel_id), discord.abc.Messageable)
+            ]
+        return [
+            channel for channel in channels
+            if channel.permissions_for(ctx.author).manage_messages
+            and (perms := channel.permissions_for(ctx.guild.me)).manage_messages
+            and perms.read_message_history
+        ]
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    @commands.bot_has_permissions(manage_messages=True)
+    async def purge(self, ctx, amount: int, *, flags: PurgeFlags):
+        """Delete matching messages among the last <amount> in each channel.
+
+        Filters: [user] --match <pattern> --has <links/files/embeds> --bots <yes/no>
+        --newer <2h> --older <1d> --channels <#channels or all>
+        """
+        if amount < 1:
+            return await ctx.send("❌ Please specify a positive number of messages to delete!")
+
+        if amount > config.PURGE_MAX_SCAN:
+            return await ctx.send(f"❌ Cannot search more than {config.PURGE_MAX_SCAN:,} messages per channel!")
+
+        check = self.build_purge_check(flags)
+        if isinstance(check, str):
+            return await ctx.send(check)
+
+        channels = self.resolve_purge_channels(ctx, flags.channels)
+        if not channels:
+            return await ctx.send("❌ None of those channels can be purged by both of us!")
+
+        now = discord.utils.utcnow()
+        after = now - flags.newer if flags.newer else None
+        # Only look at messages sent before this command, so the command and
+        # the progress message are never part of the purge
+        before = discord.Object(id=ctx.message.id)
+        if flags.older:
+            before = discord.Object(id=min(ctx.message.id, discord.utils.time_snowflake(now - flags.older)))
+
+        status = None
+        if len(channels) > 1:
+            view = ConfirmView(ctx.author)
+            status = await ctx.send(
+                f"🗑️ Search the last {amount:,} messages in **{len(channels)}** channels and delete the matches?",
+                view=view
+            )
+            await view.wait()
+            if not view.confirmed:
+                return await status.edit(content="Cancelled.", view=None)
+
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+
+        progress = PurgeProgress()
+        started = time.monotonic()
+
+        def progress_embed(final=False):
+            embed = discord.Embed(
+                title="🗑️ Messages Purged" if final else "🗑️ Purging...",
+                description=f"Deleted {progress.deleted:,} of {progress.scanned:,} messages searched"
+                            + (f" from {flags.user.mention}" if flags.user else "")
+                            + (f" · {progress.failed:,} failed" if progress.failed else ""),
+                color=discord.Color.blue()
+            )
+            if len(channels) > 1:
+                embed.add_field(name="Channels", value=f"{progress.channels_done}/{len(channels)} done")
+            if final:
+                embed.set_footer(text=f"Took {format_duration(time.monotonic() - started)}")
+            return embed
+
+        async def report():
+            while True:
+                await asyncio.sleep(config.MASS_ACTION_PROGRESS_INTERVAL)
+                try:
+                    await status.edit(embed=progress_embed())
+                except discord.HTTPException:
+                    pass
+
+        if status is None:
+            status = await ctx.send(embed=progress_embed())
+        else:
+            await status.edit(content=None, embed=progress_embed(), view=None)
+        reporter = asyncio.create_task(report())
+        reason = f"Purge by {ctx.author} (ID: {ctx.author.id})"
+        pending = iter(channels)
+
+        async def worker():
+            # Workers share one iterator, so each channel is purged exactly once
+            for channel in pending:
+                try:
+                    await purge_channel(channel, check, amount, before, after, progress, reason)
+                except discord.HTTPException as e:
+                    progress.channels_done += 1
+                    logger.warning(f"Purge of {channel.id} stopped early: {e}")
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(config.PURGE_CONCURRENCY, len(channels)))))
+        finally:
+            reporter.cancel()
+
+        # A single channel gets a short-lived confirmation, like before
+        await status.edit(embed=progress_embed(final=True), delete_after=5 if len(channels) == 1 else None)
+
+        busiest = sorted(progress.per_channel.items(), key=lambda item: item[1], reverse=True)
+        await self.log_action(
+            ctx.guild, "Purge", flags.user, ctx.author,
+            reason=f"{progress.deleted:,} deleted of {progress.scanned:,} searched in {len(channels)} channel(s)\n"
+                   + "\n".join(f"<#{channel_id}>: {count:,}" for channel_id, count in busiest[:10] if count)
+        )
+
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod(self, ctx):
+        """Show this server's automod settings."""
+        settings = await self.get_automod_settings(ctx.guild.id)
+        embed = discord.Embed(
+            title="🛡️ AutoMod",
+            description="Enabled ✅" if settings.enabled else "Disabled ❌",
+            color=config.INFO_COLOR
+        )
+        for option in config.AUTOMOD_DEFAULTS:
+            value = getattr(settings, option)
+            if isinstance(value, bool):
+                value = "on" if value else "off"
+            embed.add_field(name=option, value=str(value))
+        embed.add_field(name="banned_words", value=str(len(settings.matcher) if settings.matcher else 0))
+        embed.set_footer(text=f"Change a setting with {ctx.clean_prefix}automod set <option> <value>")
+        await ctx.send(embed=embed)
+
+    async def _set_automod_enabled(self, guild_id, enabled):
+        await self.bot.db.execute(
+            "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (guild_id,)
+        )
+        await self.bot.db.execute(
+            "UPDATE guild_settings SET automod_enabled = ? WHERE guild_id = ?",
+            (int(enabled), guild_id)
+        )
+        await self.bot.db.commit()
+        self.invalidate_automod(guild_id)
+        self.bot.dispatch('guild_settings_update', guild_id)
+
+    @automod.command(name="on", aliases=["enable"])
+    async def automod_on(self, ctx):
+        """Turn automod on."""
+        await self._set_automod_enabled(ctx.guild.id, True)
+        await ctx.send("✅ AutoMod enabled!")
+
+    @automod.command(name="off", aliases=["disable"])
+    async def automod_off(self, ctx):
+        """Turn automod off."""
+        await self._set_automod_enabled(ctx.guild.id, False)
+        await ctx.send("✅ AutoMod disabled!")
+
+    @automod.command(name="set")
+    async def automod_set(self, ctx, option: str, value: str):
+        """Change an automod option. Use 0 or off to disable a check."""
+        option = option.lower()
+        if option not in config.AUTOMOD_DEFAULTS:
+            return await ctx.send(f"❌ Unknown option! Options: {', '.join(config.AUTOMOD_DEFAULTS)}")
+
+        kind = type(config.AUTOMOD_DEFAULTS[option])
+        try:
+            if kind is bool:
+                if value.lower() not in ("on", "off", "true", "false", "1", "0"):
+                    raise ValueError
+                parsed = value.lower() in ("on", "true", "1")
+            else:
+                parsed = kind(value)
+                if parsed < 0:
+                    raise ValueError
+        except ValueError:
+            return await ctx.send(f"❌ `{value}` isn't a valid value for `{option}`!")
+
+        if option == 'caps_ratio' and parsed > 1:
+            return await ctx.send("❌ caps_ratio must be between 0 and 1!")
+        if option in ('spam_limit', 'spam_per', 'duplicate_limit') and parsed > 100:
+            return await ctx.send(f"❌ {option} can be at most 100!")
+        if option == 'duplicate_limit' and parsed == 1:
+            return await ctx.send("❌ duplicate_limit must be at least 2!")
+
+        await self.bot.db.execute("""
+            INSERT OR REPLACE INTO automod_settings (guild_id, option, value)
+            VALUES (?, ?, ?)
+        """, (ctx.guild.id, option, parsed))
+        await self.bot.db.commit()
+        self.invalidate_automod(ctx.guild.id)
+        await ctx.send(f"✅ Set `{option}` to `{value}`!")
+
+    @automod.group(name="words", invoke_without_command=True)
+    async def automod_words(self, ctx):
+        """List the banned words. Wrap a word in * to match it inside other words."""
+        settings = await self.get_automod_settings(ctx.guild.id)
+        if not settings.matcher:
+            return await ctx.send("No banned words set up yet!")
+        words = ", ".join(f"||{word}||" for word in sorted(settings.matcher.words))
+        await ctx.send(embed=discord.Embed(
+            title=f"🚫 Banned Words ({len(settings.matcher)})",
+            description=words[:4096],
+            color=config.INFO_COLOR
+        ))
+
+    @automod_words.command(name="add")
+    async def automod_words_add(self, ctx, *words: str):
+        """Ban one or more words."""
+        words = {word.lower() for word in words if word.strip('*')}
+        if not words:
+            return await ctx.send("❌ Give me at least one word to ban!")
+        await self.bot.db.executemany(
+            "INSERT OR IGNORE INTO banned_words (guild_id, word) VALUES (?, ?)",
+            [(ctx.guild.id, word) for word in words]
+        )
+        await self.bot.db.commit()
+        self.invalidate_automod(ctx.guild.id)
+        try:
+            await ctx.message.delete()  # Don't leave the list sitting in chat
+        except discord.HTTPException:
+            pass
+        await ctx.send(f"✅ Added {len(words)} banned word(s)!")
+
+    @automod_words.command(name="remove")
+    async def automod_words_remove(self, ctx, *words: str):
+        """Unban one or more words."""
+        await self.bot.db.executemany(
+            "DELETE FROM banned_words WHERE guild_id = ? AND word = ?",
+            [(ctx.guild.id, word.lower()) for word in words]
+        )
+        await self.bot.db.commit()
+        self.invalidate_automod(ctx.guild.id)
+        await ctx.send(f"✅ Removed {len(words)} banned word(s)!")
+
+    @automod.group(name="domains", invoke_without_command=True)
+    async def automod_domains(self, ctx):
+        """List the allowed and blocked domains. Rules cover subdomains too."""
+        settings = await self.get_automod_settings(ctx.guild.id)
+        if not settings.domains:
+            return await ctx.send("No domain rules set up yet!")
+
+        rules = settings.domains.rules
+        embed = discord.Embed(title=f"🌐 Domain Rules ({len(rules)})", color=config.INFO_COLOR)
+        for action, label in ((ALLOW, "✅ Allowed"), (DENY, "🚫 Blocked")):
+            domains = sorted(domain for domain, rule in rules.items() if rule == action)
+            if domains:
+                embed.add_field(name=label, value=", ".join(f"`{domain}`" for domain in domains)[:1024], inline=False)
+        embed.set_footer(text=f"Shared blocklist: {len(self.automod.blocklist):,} domains")
+        await ctx.send(embed=embed)
+
+    async def _set_domain_rule(self, ctx, domain, action):
+        normalized = normalize_domain(domain)
+        if not normalized:
+            return await ctx.send(f"❌ `{domain}` isn't a valid domain!")
+
+        settings = await self.get_automod_settings(ctx.guild.id)
+        if settings.domains and len(settings.domains) >= config.MAX_DOMAIN_RULES and normalized not in settings.domains.rules:
+            return await ctx.send(f"❌ This server already has {config.MAX_DOMAIN_RULES} domain rules!")
+
+        await self.bot.db.execute("""
+            INSERT OR REPLACE INTO domain_rules (guild_id, domain, action)
+            VALUES (?, ?, ?)
+        """, (ctx.guild.id, normalized, action))
+        await self.bot.db.commit()
+        self.invalidate_automod(ctx.guild.id)
+        await ctx.send(f"✅ {'Allowed' if action == ALLOW else 'Blocked'} `{normalized}` and its subdomains!")
+
+    @automod_domains.command(name="allow")
+    async def automod_domains_allow(self, ctx, domain: str):
+        """Allow links to a domain, even when links or its parent domain are blocked."""
+        await self._set_domain_rule(ctx, domain, ALLOW)
+
+    @automod_domains.command(name="deny", aliases=["block"])
+    async def automod_domains_deny(self, ctx, domain: str):
+        """Block links to a domain. Use a bare TLD like ru to block a whole country."""
+        await self._set_domain_rule(ctx, domain, DENY)
+
+    @automod_domains.command(name="remove")
+    async def automod_domains_remove(self, ctx, domain: str):
+        """Remove a domain rule."""
+        normalized = normalize_domain(domain) or domain.lower()
+        async with self.bot.db.execute(
+            "DELETE FROM domain_rules WHERE guild_id = ? AND domain = ?",
+            (ctx.guild.id, normalized)
+        ) as cursor:
+            deleted = cursor.rowcount
+        await self.bot.db.commit()
+
+        if not deleted:
+            return await ctx.send(f"❌ There's no rule for `{normalized}`!")
+        self.invalidate_automod(ctx.guild.id)
+        await ctx.send(f"🗑️ Removed the rule for `{normalized}`!")
+
+    @automod.group(name="images", invoke_without_command=True)
+    async def automod_images(self, ctx):
+        """List the blocked images."""
+        async with self.bot.db.execute("""
+            SELECT id, reason, added_by, added_at FROM image_blocklist
+            WHERE guild_id = ?
+            ORDER BY id DESC
+            LIMIT 15
+        """, (ctx.guild.id,)) as cursor:
+            rows = await cursor.fetchall()
+
+        settings = await self.get_automod_settings(ctx.guild.id)
+        embed = discord.Embed(
+            title=f"🖼️ Blocked Images ({len(settings.images) if settings.images else 0})",
+            description="\n".join(
+                f"**#{entry_id}** {reason or 'No reason'} · <@{added_by}> · "
+                f"{self.format_stored_time(added_at)}"
+                for entry_id, reason, added_by, added_at in rows
+            ) or "No blocked images yet!",
+            color=config.INFO_COLOR
+        )
+        embed.set_footer(text=f"Global blocklist: {len(self.global_images):,} images")
+        await ctx.send(embed=embed)
+
+    async def _add_blocked_images(self, ctx, guild_id, reason):
+        """Hash the images attached to (or replied to by) the command and block them."""
+        source = ctx.message
+        if not source.attachments and source.reference and source.reference.message_id:
+            try:
+                source = await ctx.channel.fetch_message(source.reference.message_id)
+            except discord.HTTPException:
+                pass
+
+        images = [
+            attachment for attachment in source.attachments
+            if (attachment.content_type or '').startswith('image/')
+        ]
+        if not images:
+            return await ctx.send("❌ Attach an image or reply to a message with one!")
+
+        rows = []
+        for attachment in images:
+            hashes = await self.get_image_hashes(attachment)
+            if hashes:
+                rows.append((
+                    guild_id, *(to_signed(value) for value in hashes),
+                    reason, ctx.author.id, discord.utils.utcnow().isoformat()
+                ))
+        if not rows:
+            return await ctx.send("❌ I couldn't read that image!")
+
+        await self.bot.db.executemany("""
+            INSERT INTO image_blocklist (guild_id, ahash, dhash, phash, reason, added_by, added_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        await self.bot.db.commit()
+        if guild_id:
+            self.invalidate_automod(guild_id)
+        else:
+            self.global_images = await self.load_image_blocklist(0)
+        await ctx.send(f"✅ Blocked {len(rows)} image(s) and close copies of them!")
+
+    @automod_images.command(name="add")
+    async def automod_images_add(self, ctx, *, reason: str = None):
+        """Block an image. Attach it or reply to a message that has it."""
+        await self._add_blocked_images(ctx, ctx.guild.id, reason)
+
+    @automod_images.command(name="addglobal", hidden=True)
+    @commands.is_owner()
+    async def automod_images_addglobal(self, ctx, *, reason: str = None):
+        """Block an image in every server."""
+        await self._add_blocked_images(ctx, 0, reason)
+
+    @automod_images.command(name="remove")
+    async def automod_images_remove(self, ctx, entry_id: int):
+        """Unblock an image by its number."""
+        async with self.bot.db.execute(
+            "DELETE FROM image_blocklist WHERE id = ? AND guild_id = ?",
+            (entry_id, ctx.guild.id)
+        ) as cursor:
+            deleted = cursor.rowcount
+        await self.bot.db.commit()
+
+        if not deleted:
+            return await ctx.send(f"❌ There's no blocked image #{entry_id}!")
+        self.invalidate_automod(ctx.guild.id)
+        await ctx.send(f"🗑️ Unblocked image #{entry_id}!")
+
+    @automod_domains.command(name="reload", hidden=True)
+    @commands.is_owner()
+    async def automod_domains_reload(self, ctx):
+        """Reload the shared domain blocklist from disk."""
+        count = await self.load_blocklist()
+        await ctx.send(f"✅ Loaded {count:,} blocked domains from `{config.DOMAIN_BLOCKLIST_FILE}`!")
+
+    @automod.command(name="stats")
+    async def automod_stats(self, ctx):
+        """Show how long automod spends on each message."""
+        latency = self.automod_latency
+        samples = latency.samples
+        average = sum(samples) / len(samples) if samples else 0
+        embed = discord.Embed(title="🛡️ AutoMod Stats", color=config.INFO_COLOR)
+        embed.add_field(name="Messages Checked", value=f"{latency.total:,}")
+        embed.add_field(name="Average", value=f"{average * 1000:.3f}ms")
+        embed.add_field(name="p50", value=f"{latency.percentile(50) * 1000:.3f}ms")
+        embed.add_field(name="p99", value=f"{latency.percentile(99) * 1000:.3f}ms")
+        embed.add_field(name="Budget", value=f"{config.AUTOMOD_BUDGET_MS}ms")
+        embed.add_field(name="Over Budget", value=f"{latency.over_budget:,}")
+        embed.add_field(name="Tracked Members", value=f"{len(self.spam_control):,}")
+        embed.add_field(name="Tracked Channels", value=f"{len(self.channel_rates):,}")
+        tracker = self.duplicate_trackers.get(ctx.guild.id)
+        embed.add_field(name="Recent Messages Fingerprinted", value=f"{len(tracker) if tracker else 0:,}")
+        await ctx.send(embed=embed)
+
+    @automod.command(name="benchmark", hidden=True)
+    @commands.is_owner()
+    async def automod_benchmark(self, ctx, count: int = 10000):
+        """Time the content checks against synthetic messages."""
+        count = max(1, min(count, 200000))
+        words = [
+            "".join(random.choices(string.ascii_lowercase, k=random.randint(4, 10)))
+            for _ in range(1000)
+        ]
+        settings = AutoModSettings(
+            banned_words=words[:500], **dict(config.AUTOMOD_DEFAULTS, filter_links=True)
+        )
+        samples = [
+            " ".join(random.choices(words[500:], k=random.randint(3, 60)))
+            + random.choice(("", " https://example.com", " discord.gg/abc", " 😀😀😀", " HELLO THERE EVERYONE"))
+            for _ in range(min(count, 1000))
+        ]
+
+        tracker = LatencyTracker(config.AUTOMOD_BUDGET_MS / 1000, samples=count)
+        hits = 0
+        started = time.perf_counter()
+        for i in range(count):
+            with tracker.timer():
+                if self.automod.analyze(settings, samples[i % len(samples)], i % 8):
+                    hits += 1
+            if i % 1000 == 999:
+                await asyncio.sleep(0)  # Stay responsive on long runs
+        elapsed = time.perf_counter() - started
+
+        await ctx.send(
+            f"⏱️ {count:,} messages in {elapsed * 1000:.1f}ms "
+            f"({count / elapsed:,.0f}/s) · p50 {tracker.percentile(50) * 1e6:.1f}µs · "
+            f"p99 {tracker.percentile(99) * 1e6:.1f}µs · {hits:,} flagged · "
+            f"{tracker.over_budget:,} over budget"
+        )
+
+    @commands.group(invoke_without_command=True, aliases=["adaptiveslowmode"])
+    @commands.guild_only()
+    @commands.has_permissions(manage_channels=True)
+    async def autoslow(self, ctx):
+        """Show adaptive slowmode settings and what each busy channel is doing."""
+        settings = await self.get_slowmode_settings(ctx.guild.id)
+        default = self.slowmode_config(settings, 0)
+        embed = discord.Embed(
+            title="🐢 Adaptive Slowmode",
+            description=(
+                f"Server default: keep channels under **{default[0]}** messages/min, "
+                f"slowmode up to **{format_duration(default[1])}**"
+                if default else "Server default: off"
+            ),
+            color=config.INFO_COLOR
+        )
+
+        overrides = [
+            f"<#{channel_id}>: " + (f"{target}/min, up to {format_duration(max_delay)}" if target else "off")
+            for channel_id, (target, max_delay) in settings.items() if channel_id
+        ]
+        if overrides:
+            embed.add_field(name="Channel Settings", value="\n".join(overrides[:20]), inline=False)
+
+        now = time.monotonic()
+        active = []
+        for channel in ctx.guild.text_channels:
+            controller = self.slowmode_controllers.get(channel.id)
+            if controller:
+                active.append(
+                    f"{channel.mention}: {controller.estimator.per_minute(now):.0f}/min "
+                    f"({controller.estimator.last_minute(now)} in the last minute) · "
+                    f"slowmode {format_duration(channel.slowmode_delay) if channel.slowmode_delay else 'off'}"
+                )
+        embed.add_field(name="Tracked Channels", value="\n".join(active[:15]) or "None right now", inline=False)
+        embed.set_footer(text=f"Change it with {ctx.clean_prefix}autoslow on [#channel] [messages/min] [max delay]")
+        await ctx.send(embed=embed)
+
+    async def _set_slowmode(self, guild_id, channel_id, target, max_delay):
+        await self.bot.db.execute("""
+            INSERT INTO slowmode_settings (guild_id, channel_id, target, max_delay) VALUES (?, ?, ?, ?)
+            ON CONFLICT (guild_id, channel_id) DO UPDATE SET target = excluded.target, max_delay = excluded.max_delay
+        """, (guild_id, channel_id, target, max_delay))
+        await self.bot.db.commit()
+        # Updated in place: the adjust loop drops controllers whose settings it can't find
+        settings = await self.get_slowmode_settings(guild_id)
+        settings[channel_id] = (target, max_delay)
+
+    async def _restore_slowmode(self, channels):
+        """Put channels back to the slowmode they had before we started adjusting it."""
+        # Take every controller first so the adjust loop can't move them while we edit
+        controllers = [(channel, self.slowmode_controllers.pop(channel.id, None)) for channel in channels]
+        for channel, controller in controllers:
+            if controller and channel.slowmode_delay != controller.baseline:
+                try:
+                    await channel.edit(slowmode_delay=controller.baseline, reason="Adaptive slowmode turned off")
+                except discord.HTTPException:
+                    pass
+
+    @autoslow.command(name="on", aliases=["enable", "set"])
+    async def autoslow_on(
+        self, ctx, channel: typing.Optional[discord.TextChannel] = None,
+        target: int = config.SLOWMODE_TARGET, max_delay: Duration = None
+    ):
+        """Adjust slowmode automatically in one channel, or every channel by default."""
+        max_delay = int(max_delay.total_seconds()) if max_delay else config.SLOWMODE_MAX_DELAY
+        if target < 1:
+            return await ctx.send("❌ The target has to be at least 1 message per minute!")
+        if not 0 < max_delay <= 21600:
+            return await ctx.send("❌ The longest slowmode can be anywhere up to 6h!")
+
+        await self._set_slowmode(ctx.guild.id, channel.id if channel else 0, target, max_delay)
+        where = channel.mention if channel else "every channel"
+        await ctx.send(
+            f"✅ Adaptive slowmode on in {where}: aiming for under {target} messages/min "
+            f"with slowmode up to {format_duration(max_delay)}."
+        )
+
+    @autoslow.command(name="off", aliases=["disable"])
+    async def autoslow_off(self, ctx, channel: discord.TextChannel = None):
+        """Stop adjusting slowmode in one channel, or everywhere."""
+        settings = await self.get_slowmode_settings(ctx.guild.id)
+        if channel is None:
+            await self.bot.db.execute("DELETE FROM slowmode_settings WHERE guild_id = ?", (ctx.guild.id,))
+            await self.bot.db.commit()
+            settings.clear()
+            await self._restore_slowmode(ctx.guild.text_channels)
+            return await ctx.send("✅ Adaptive slowmode off everywhere!")
+
+        if 0 in settings:
+            # Opt this channel out of the server default
+            await self._set_slowmode(ctx.guild.id, channel.id, 0, 0)
+        else:
+            await self.bot.db.execute(
+                "DELETE FROM slowmode_settings WHERE guild_id = ? AND channel_id = ?", (ctx.guild.id, channel.id)
+            )
+            await self.bot.db.commit()
+            settings.pop(channel.id, None)
+        await self._restore_slowmode([channel])
+        await ctx.send(f"✅ Adaptive slowmode off in {channel.mention}!")
+
+    @staticmethod
+    def format_stored_time(value):
+        """Render an ISO timestamp from the database; ones without an offset were stored in UTC."""
+        when = datetime.fromisoformat(value)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return discord.utils.format_dt(when, 'R')
+
+    @staticmethod
+    def describe_attachments(attachments):
+        return "\n".join(
+            f"`{filename}` ({size / 1024:,.1f} KB)" + (" · saved" if file_hash else "")
+            for filename, size, file_hash in attachments
+        )[:1024]
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        """Log deleted messages from archived channels, straight from the archive."""
+        if not payload.guild_id or not self.message_archive.covers(payload.channel_id):
+            return
+        message = await self.message_archive.get(payload.message_id)
+        guild = self.bot.get_guild(payload.guild_id)
+        if message is None or guild is None:
+            return
+
+        embed = discord.Embed(
+            title="🗑️ Message Deleted",
+            description=message.content[:4000] or "*No text*",
+            color=config.ERROR_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Author", value=f"<@{message.author_id}> ({message.author_id})")
+        embed.add_field(name="Channel", value=f"<#{message.channel_id}>")
+        if message.attachments:
+            embed.add_field(name="Attachments", value=self.describe_attachments(message.attachments), inline=False)
+        embed.set_footer(text=f"Message ID: {message.id}" + (" · edited" if message.edited else ""))
+        await self.bot.mod_log.send(guild, embed)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        if not payload.guild_id or not self.message_archive.covers(payload.channel_id):
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+
+        archived = []
+        for message_id in sorted(payload.message_ids):
+            message = await self.message_archive.get(message_id)
+            if message:
+                archived.append(message)
+        if not archived:
+            return
+
+        lines = [f"<@{message.author_id}>: {message.content[:100] or '*attachments*'}" for message in archived]
+        description = ""
+        for shown, line in enumerate(lines):
+            if len(description) + len(line) > 3900:
+                description += f"\n…and {len(lines) - shown} more"
+                break
+            description += line + "\n"
+        embed = discord.Embed(
+            title=f"🗑️ {len(payload.message_ids)} Messages Deleted",
+            description=description,
+            color=config.ERROR_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Channel", value=f"<#{payload.channel_id}>")
+        embed.add_field(name="Archived", value=f"{len(archived):,}")
+        await self.bot.mod_log.send(guild, embed)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        """Log edits in archived channels and keep the archived copy current."""
+        content = payload.data.get('content')
+        if content is None or not payload.guild_id or not self.message_archive.covers(payload.channel_id):
+            return
+        before = await self.message_archive.update(payload.message_id, content)
+        guild = self.bot.get_guild(payload.guild_id)
+        if before is None or guild is None:
+            return
+
+        embed = discord.Embed(
+            title="✏️ Message Edited",
+            description=f"[Jump to message](https://discord.com/channels/{guild.id}/{payload.channel_id}/{payload.message_id})",
+            color=config.WARNING_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Before", value=before.content[:1024] or "*No text*", inline=False)
+        embed.add_field(name="After", value=content[:1024] or "*No text*", inline=False)
+        embed.add_field(name="Author", value=f"<@{before.author_id}> ({before.author_id})")
+        embed.add_field(name="Channel", value=f"<#{payload.channel_id}>")
+        await self.bot.mod_log.send(guild, embed)
+
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def archive(self, ctx):
+        """Show which channels are archived for edit and delete logs, and how much is stored."""
+        channels = [
+            channel for channel in ctx.guild.channels if channel.id in self.message_archive.channels
+        ]
+        await self.message_archive.flush()
+        async with self.bot.db.execute("""
+            SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length(content)), 0)
+            FROM archived_messages WHERE guild_id = ?
+        """, (ctx.guild.id,)) as cursor:
+            count, original, stored = await cursor.fetchone()
+
+        embed = discord.Embed(
+            title="🗄️ Message Archive",
+            description=" ".join(channel.mention for channel in channels) or "No channels archived.",
+            color=config.INFO_COLOR
+        )
+        embed.add_field(name="Messages", value=f"{count:,}")
+        embed.add_field(
+            name="Stored",
+            value=f"{stored / 1024:,.1f} KB of {original / 1024:,.1f} KB"
+                  + (f" ({stored / original:.0%})" if original else "")
+        )
+        embed.add_field(
+            name="Dictionary",
+            value="Trained" if self.message_archive.guild_dictionaries.get(ctx.guild.id) else "Not yet"
+        )
+        embed.set_footer(text=f"Messages are kept for {config.ARCHIVE_RETENTION_DAYS} days")
+        await ctx.send(embed=embed)
+
+    @archive.command(name="add")
+    async def archive_add(self, ctx, channels: commands.Greedy[discord.TextChannel]):
+        """Start archiving channels so their edits and deletions can be logged."""
+        if not channels:
+            return await ctx.send("❌ Mention at least one channel!")
+        await self.bot.db.executemany(
+            "INSERT OR IGNORE INTO archive_channels (channel_id, guild_id) VALUES (?, ?)",
+            [(channel.id, ctx.guild.id) for channel in channels]
+        )
+        await self.bot.db.commit()
+        self.message_archive.channels.update(channel.id for channel in channels)
+        await ctx.send(f"✅ Archiving {', '.join(channel.mention for channel in channels)}.")
+
+    @archive.command(name="remove")
+    async def archive_remove(self, ctx, channels: commands.Greedy[discord.TextChannel]):
+        """Stop archiving channels. What's stored ages out with the retention period."""
+        if not channels:
+            return await ctx.send("❌ Mention at least one channel!")
+        await self.bot.db.executemany(
+            "DELETE FROM archive_channels WHERE channel_id = ?", [(channel.id,) for channel in channels]
+        )
+        await self.bot.db.commit()
+        self.message_archive.channels.difference_update(channel.id for channel in channels)
+        await ctx.send(f"✅ No longer archiving {', '.join(channel.mention for channel in channels)}.")
+
+    @archive.command(name="show")
+    async def archive_show(self, ctx, message_id: int):
+        """Show an archived message, with any attachments that were saved."""
+        message = await self.message_archive.get(message_id)
+        if message is None or message.guild_id != ctx.guild.id:
+            return await ctx.send("❌ That message isn't in the archive!")
+
+        embed = discord.Embed(
+            description=message.content[:4000] or "*No text*",
+            color=config.INFO_COLOR,
+            timestamp=discord.utils.snowflake_time(message.id)
+        )
+        embed.add_field(name="Author", value=f"<@{message.author_id}>")
+        embed.add_field(name="Channel", value=f"<#{message.channel_id}>")
+        if message.attachments:
+            embed.add_field(name="Attachments", value=self.describe_attachments(message.attachments), inline=False)
+
+        files = []
+        for filename, _, file_hash in message.attachments[:10]:
+            if not file_hash:
+                continue
+            async with self.bot.db.execute("SELECT data FROM archive_files WHERE hash = ?", (file_hash,)) as cursor:
+                row = await cursor.fetchone()
+            if row:
+                files.append(discord.File(io.BytesIO(row[0]), filename))
+        await ctx.send(embed=embed, files=files, allowed_mentions=discord.AllowedMentions.none())
+
+async def setup(bot):
+    # Create necessary tables
+    async with bot.db.cursor() as cursor:
+        # Moderation cases (warn/kick/ban/unban/mute/unmute); duration in seconds,
+        # created as a Unix timestamp. Each index ends in created for paging.
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                action TEXT,
+                user_id INTEGER,
+                moderator_id INTEGER,
+                reason TEXT,
+                duration INTEGER,
+                created REAL
+            )
+        """)
+        await cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cases_user ON cases (guild_id, user_id, created)"
+        )
+        await cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cases_moderator ON cases (guild_id, moderator_id, created)"
+        )
+        await cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cases_created ON cases (guild_id, created)"
+        )
+
+        # Full-text index over case reasons, kept in step by triggers
+        try:
+            await cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts
+                USING fts5(reason, content='cases', content_rowid='id')
+            """)
+            await cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+                    INSERT INTO cases_fts (rowid, reason) VALUES (new.id, new.reason);
+                END
+            """)
+            await cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+                    INSERT INTO cases_fts (cases_fts, rowid, reason) VALUES ('delete', old.id, old.reason);
+                END
+            """)
+            await cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF reason ON cases BEGIN
+                    INSERT INTO cases_fts (cases_fts, rowid, reason) VALUES ('delete', old.id, old.reason);
+                    INSERT INTO cases_fts (rowid, reason) VALUES (new.id, new.reason);
+                END
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite has no FTS5, modsearch will scan reasons instead: {e}")
+
+        # Active warning counts, so warn never has to COUNT(*) the cases table.
+        # Filled from existing warnings the first time the table is created.
+        await cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'warning_counts'")
+        backfill = await cursor.fetchone() is None
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS warning_counts (
+                guild_id INTEGER,
+                user_id INTEGER,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id)
+            )
+        """)
+
+        # Fold the old warnings table into cases in one statement, then drop it
+        await cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'warnings'")
+        if await cursor.fetchone():
+            await cursor.execute("""
+                INSERT INTO cases (guild_id, action, user_id, moderator_id, reason, created)
+                SELECT guild_id, 'warn', user_id, moderator_id, reason,
+                       COALESCE((julianday(timestamp) - 2440587.5) * 86400.0, strftime('%s', 'now'))
+                FROM warnings
+                ORDER BY timestamp, id
+            """)
+            logger.info(f"Migrated {cursor.rowcount} warnings to cases")
+            await cursor.execute("DROP TABLE warnings")
+
+        if backfill:
+            await cursor.execute("""
+                INSERT INTO warning_counts (guild_id, user_id, count)
+                SELECT guild_id, user_id, COUNT(*) FROM cases
+                WHERE action = 'warn'
+                GROUP BY guild_id, user_id
+            """)
+        
+        # @everyone overwrites saved by lockdown (NULL if there was none), restored by unlock
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS channel_locks (
+                guild_id INTEGER,
+                channel_id INTEGER,
+                permissions TEXT,
+                PRIMARY KEY (guild_id, channel_id)
+            )
+        """)
+
+        # AutoMod overrides (options without a row use config.AUTOMOD_DEFAULTS)
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS automod_settings (
+                guild_id INTEGER,
+                option TEXT,
+                value NUMERIC,
+                PRIMARY KEY (guild_id, option)
+            )
+        """)
+
+        # AutoMod domain allow/deny rules
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS domain_rules (
+                guild_id INTEGER,
+                domain TEXT,
+                action TEXT,
+                PRIMARY KEY (guild_id, domain)
+            )
+        """)
+
+        # AutoMod image blocklist (guild_id 0 applies everywhere)
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_blocklist (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                ahash INTEGER,
+                dhash INTEGER,
+                phash INTEGER,
+                reason TEXT,
+                added_by INTEGER,
+                added_at TEXT
+            )
+        """)
+        await cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_image_blocklist_guild ON image_blocklist (guild_id)"
+        )
+
+        # Adaptive slowmode (channel_id 0 is the server default, target 0 opts a channel out)
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS slowmode_settings (
+                guild_id INTEGER,
+                channel_id INTEGER,
+                target INTEGER,
+                max_delay INTEGER,
+                PRIMARY KEY (guild_id, channel_id)
+            )
+        """)
+
+        # Message archive for edit/delete logs. content is encoded per codec
+        # (see utils/archive.py); size is the original length in bytes.
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archive_channels (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER
+            )
+        """)
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archived_messages (
+                message_id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                channel_id INTEGER,
+                author_id INTEGER,
+                codec INTEGER,
+                dict_id INTEGER,
+                content BLOB,
+                size INTEGER,
+                edited INTEGER DEFAULT 0
+            )
+        """)
+        await cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archived_messages_guild ON archived_messages (guild_id)"
+        )
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archive_attachments (
+                message_id INTEGER,
+                position INTEGER,
+                filename TEXT,
+                size INTEGER,
+                hash BLOB,
+                PRIMARY KEY (message_id, position)
+            )
+        """)
+        await cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archive_attachments_hash ON archive_attachments (hash)"
+        )
+        # Attachment contents, stored once however many messages share them
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archive_files (
+                hash BLOB PRIMARY KEY,
+                content_type TEXT,
+                data BLOB
+            )
+        """)
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archive_dicts (
+                dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                data BLOB
+            )
+        """)
+
+        # AutoMod banned words
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS banned_words (
+                guild_id INTEGER,
+                word TEXT,
+                PRIMARY KEY (guild_id, word)
+            )
+        """)
+
+    await bot.db.commit()
     await bot.add_cog(Moderation(bot)) 
\ No newline at end of file
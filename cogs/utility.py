@@ -1,366 +1,533 @@
-import discord
-from discord.ext import commands
-import config
-from datetime import datetime
-import platform
-import psutil
-import os
-from typing import Optional, Union
-import time
-
-class Utility(commands.Cog):
-    """Utility and information commands."""
-
-    def __init__(self, bot):
-        self.bot = bot
-        self.start_time = datetime.utcnow()
-
-    def format_dt(self, dt: datetime) -> str:
-        """Format a datetime object to a readable string."""
-        return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-
-    @commands.command()
-    async def ping(self, ctx):
-        """Get the bot's latency."""
-        start = time.perf_counter()
-        message = await ctx.send("Pinging...")
-        end = time.perf_counter()
-        
-        duration = (end - start) * 1000
-        websocket_latency = self.bot.latency * 1000
-        
-        embed = discord.Embed(
-            title="🏓 Pong!",
-            color=config.INFO_COLOR
-        )
-        embed.add_field(name="Bot Latency", value=f"{duration:.2f}ms")
-        embed.add_field(name="Websocket Latency", value=f"{websocket_latency:.2f}ms")
-        
-        await message.edit(content=None, embed=embed)
-
-    @commands.command()
-    async def serverinfo(self, ctx):
-        """Get information about the server."""
-        guild = ctx.guild
-        
-        # Get channel counts
-        text_channels = len(guild.text_channels)
-        voice_channels = len(guild.voice_channels)
-        categories = len(guild.categories)
-        total_channels = text_channels + voice_channels
-        
-        # Get member counts
-        total_members = guild.member_count
-        online_members = len([m for m in guild.members if m.status != discord.Status.offline])
-        bot_count = len([m for m in guild.members if m.bot])
-        
-        # Create embed
-        embed = discord.Embed(
-            title=f"Server Information - {guild.name}",
-            color=config.INFO_COLOR
-        )
-        
-        if guild.icon:
-            embed.set_thumbnail(url=guild.icon.url)
-            
-        # General information
-        embed.add_field(
-            name="General",
-            value=f"**Owner:** {guild.owner.mention}\n"
-                  f"**Created:** {discord.utils.format_dt(guild.created_at, 'R')}\n"
-                  f"**Verification Level:** {str(guild.verification_level).title()}\n"
-                  f"**Server ID:** {guild.id}",
-            inline=False
-        )
-        
-        # Member information
-        embed.add_field(
-            name="Members",
-            value=f"**Total:** {total_members:,}\n"
-                  f"**Online:** {online_members:,}\n"
-                  f"**Humans:** {total_members - bot_count:,}\n"
-                  f"**Bots:** {bot_count:,}",
-            inline=True
-        )
-        
-        # Channel information
-        embed.add_field(
-            name="Channels",
-            value=f"**Total:** {total_channels:,}\n"
-                  f"**Text:** {text_channels:,}\n"
-                  f"**Voice:** {voice_channels:,}\n"
-                  f"**Categories:** {categories:,}",
-            inline=True
-        )
-        
-        # Emoji information
-        emoji_stats = f"**Regular:** {len([e for e in guild.emojis if not e.animated])}\n" \
-                     f"**Animated:** {len([e for e in guild.emojis if e.animated])}\n" \
-                     f"**Total:** {len(guild.emojis)}"
-        embed.add_field(name="Emojis", value=emoji_stats, inline=True)
-        
-        # Server features
-        if guild.features:
-            features_str = "\n".join(f"✓ {feature.replace('_', ' ').title()}" for feature in guild.features)
-            if len(features_str) > 1024:  # Discord embed field value limit
-                features_str = features_str[:1021] + "..."
-            embed.add_field(
-                name="Features",
-                value=features_str,
-                inline=False
-            )
-            
-        # Server boost status
-        embed.add_field(
-            name="Boost Status",
-            value=f"**Level:** {guild.premium_tier}\n"
-                  f"**Boosts:** {guild.premium_subscription_count or 0}\n"
-                  f"**Boosters:** {len(guild.premium_subscribers) if guild.premium_subscribers else 0}",
-            inline=False
-        )
-        
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    async def userinfo(self, ctx, member: discord.Member = None):
-        """Get information about a user."""
-        member = member or ctx.author
-        
-        roles = [role.mention for role in member.roles[1:]]  # All roles except @everyone
-        
-        embed = discord.Embed(
-            title=f"User Information - {member}",
-            color=member.color or config.INFO_COLOR
-        )
-        
-        embed.set_thumbnail(url=member.display_avatar.url)
-        
-        # General information
-        embed.add_field(
-            name="General",
-            value=f"**Username:** {member}\n"
-                  f"**ID:** {member.id}\n"
-                  f"**Nickname:** {member.nick or 'None'}\n"
-                  f"**Bot:** {'Yes' if member.bot else 'No'}",
-            inline=False
-        )
-        
-        # Time information
-        embed.add_field(
-            name="Time Information",
-            value=f"**Account Created:** {discord.utils.format_dt(member.created_at, 'R')}\n"
-                  f"**Joined Server:** {discord.utils.format_dt(member.joined_at, 'R')}",
-            inline=False
-        )
-        
-        # Roles
-        if roles:
-            embed.add_field(
-                name=f"Roles [{len(roles)}]",
-                value=" ".join(roles) if len(roles) <= 10 else " ".join(roles[:10]) + f" ... and {len(roles)-10} more",
-                inline=False
-            )
-            
-        # Permissions
-        key_permissions = []
-        if member.guild_permissions.administrator:
-            key_permissions.append("Administrator")
-        if member.guild_permissions.manage_guild:
-            key_permissions.append("Manage Server")
-        if member.guild_permissions.manage_roles:
-            key_permissions.append("Manage Roles")
-        if member.guild_permissions.manage_channels:
-            key_permissions.append("Manage Channels")
-        if member.guild_permissions.manage_messages:
-            key_permissions.append("Manage Messages")
-        if member.guild_permissions.kick_members:
-            key_permissions.append("Kick Members")
-        if member.guild_permissions.ban_members:
-            key_permissions.append("Ban Members")
-            
-        if key_permissions:
-            embed.add_field(
-                name="Key Permissions",
-                value="\n".join(f"✓ {perm}" for perm in key_permissions),
-                inline=False
-            )
-            
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    async def avatar(self, ctx, member: discord.Member = None):
-        """Get a user's avatar."""
-        member = member or ctx.author
-        
-        embed = discord.Embed(
-            title=f"Avatar - {member}",
-            color=member.color or config.INFO_COLOR
-        )
-        embed.set_image(url=member.display_avatar.url)
-        
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    async def roleinfo(self, ctx, role: discord.Role):
-        """Get information about a role."""
-        embed = discord.Embed(
-            title=f"Role Information - {role.name}",
-            color=role.color or config.INFO_COLOR
-        )
-        
-        # General information
-        embed.add_field(
-            name="General",
-            value=f"**Name:** {role.name}\n"
-                  f"**ID:** {role.id}\n"
-                  f"**Color:** {str(role.color)}\n"
-                  f"**Position:** {role.position}\n"
-                  f"**Created:** {discord.utils.format_dt(role.created_at, 'R')}\n"
-                  f"**Mentionable:** {'Yes' if role.mentionable else 'No'}\n"
-                  f"**Hoisted:** {'Yes' if role.hoist else 'No'}\n"
-                  f"**Managed:** {'Yes' if role.managed else 'No'}",
-            inline=False
-        )
-        
-        # Members with this role
-        members_with_role = len(role.members)
-        embed.add_field(
-            name="Members",
-            value=f"{members_with_role:,} member{'s' if members_with_role != 1 else ''} have this role",
-            inline=False
-        )
-        
-        # Key permissions
-        key_permissions = []
-        if role.permissions.administrator:
-            key_permissions.append("Administrator")
-        if role.permissions.manage_guild:
-            key_permissions.append("Manage Server")
-        if role.permissions.manage_roles:
-            key_permissions.append("Manage Roles")
-        if role.permissions.manage_channels:
-            key_permissions.append("Manage Channels")
-        if role.permissions.manage_messages:
-            key_permissions.append("Manage Messages")
-        if role.permissions.kick_members:
-            key_permissions.append("Kick Members")
-        if role.permissions.ban_members:
-            key_permissions.append("Ban Members")
-            
-        if key_permissions:
-            embed.add_field(
-                name="Key Permissions",
-                value="\n".join(f"✓ {perm}" for perm in key_permissions),
-                inline=False
-            )
-            
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    async def botinfo(self, ctx):
-        """Get information about the bot."""
-        embed = discord.Embed(
-            title="Bot Information",
-            color=config.INFO_COLOR
-        )
-        
-        # Calculate uptime
-        uptime = datetime.utcnow() - self.start_time
-        days = uptime.days
-        hours, remainder = divmod(uptime.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        # Get system info
-        process = psutil.Process()
-        memory_usage = process.memory_info().rss / 1024 / 1024  # Convert to MB
-        
-        # Bot stats
-        total_members = sum(guild.member_count for guild in self.bot.guilds)
-        total_channels = sum(len(guild.channels) for guild in self.bot.guilds)
-        
-        embed.add_field(
-            name="Bot Stats",
-            value=f"**Guilds:** {len(self.bot.guilds):,}\n"
-                  f"**Users:** {total_members:,}\n"
-                  f"**Channels:** {total_channels:,}\n"
-                  f"**Commands:** {len(self.bot.commands):,}",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="System Info",
-            value=f"**Python:** {platform.python_version()}\n"
-                  f"**Discord.py:** {discord.__version__}\n"
-                  f"**Memory:** {memory_usage:.1f} MB\n"
-                  f"**OS:** {platform.system()} {platform.release()}",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="Uptime",
-            value=f"{days}d {hours}h {minutes}m {seconds}s",
-            inline=True
-        )
-        
-        await ctx.send(embed=embed)
-
-    @commands.command()
-    async def channelinfo(self, ctx, channel: Union[discord.TextChannel, discord.VoiceChannel, discord.CategoryChannel] = None):
-        """Get information about a channel."""
-        channel = channel or ctx.channel
-        
-        embed = discord.Embed(
-            title=f"Channel Information - #{channel.name}",
-            color=config.INFO_COLOR
-        )
-        
-        # General information
-        channel_type = str(channel.type).replace('_', ' ').title()
-        
-        embed.add_field(
-            name="General",
-            value=f"**Name:** {channel.name}\n"
-                  f"**ID:** {channel.id}\n"
-                  f"**Type:** {channel_type}\n"
-                  f"**Created:** {discord.utils.format_dt(channel.created_at, 'R')}",
-            inline=False
-        )
-        
-        # Category
-        if isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
-            embed.add_field(
-                name="Category",
-                value=channel.category.name if channel.category else "None",
-                inline=False
-            )
-        
-        # Channel-specific information
-        if isinstance(channel, discord.TextChannel):
-            embed.add_field(
-                name="Text Channel Info",
-                value=f"**Topic:** {channel.topic or 'None'}\n"
-                      f"**NSFW:** {'Yes' if channel.is_nsfw() else 'No'}\n"
-                      f"**Slowmode:** {channel.slowmode_delay}s",
-                inline=False
-            )
-        elif isinstance(channel, discord.VoiceChannel):
-            embed.add_field(
-                name="Voice Channel Info",
-                value=f"**Bitrate:** {channel.bitrate//1000}kbps\n"
-                      f"**User Limit:** {channel.user_limit or 'Unlimited'}\n"
-                      f"**Connected Users:** {len(channel.members)}",
-                inline=False
-            )
-        elif isinstance(channel, discord.CategoryChannel):
-            embed.add_field(
-                name="Category Info",
-                value=f"**Channels:** {len(channel.channels)}\n"
-                      f"**Text Channels:** {len(channel.text_channels)}\n"
-                      f"**Voice Channels:** {len(channel.voice_channels)}",
-                inline=False
-            )
-        
-        await ctx.send(embed=embed)
-
-async def setup(bot):
+import discord
+from discord.ext import commands
+import config
+from datetime import datetime, timedelta
+import platform
+import os
+from typing import Optional, Union
+import time
+from utils.durations import Duration, format_duration
+
+class Utility(commands.Cog):
+    """Utility and information commands."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.start_time = datetime.utcnow()
+        self.presence_counts = {}  # guild_id -> (monotonic expiry, approximate online count)
+
+    def format_dt(self, dt: datetime) -> str:
+        """Format a datetime object to a readable string."""
+        return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+
+    @commands.command()
+    async def ping(self, ctx):
+        """Get the bot's latency."""
+        start = time.perf_counter()
+        message = await ctx.send("Pinging...")
+        end = time.perf_counter()
+        
+        duration = (end - start) * 1000
+        websocket_latency = self.bot.latency * 1000
+        
+        embed = discord.Embed(
+            title="🏓 Pong!",
+            color=config.INFO_COLOR
+        )
+        embed.add_field(name="Bot Latency", value=f"{duration:.2f}ms")
+        embed.add_field(name="Websocket Latency", value=f"{websocket_latency:.2f}ms")
+
+        # Per-shard latency across every cluster
+        shard_id = ctx.guild.shard_id if ctx.guild else 0
+        stats = await self.bot.get_cluster_stats()
+        if len(stats) > 1:
+            lines = []
+            for sid, shard in list(stats.items())[:20]:
+                if not shard['online']:
+                    status = "offline"
+                elif shard['latency'] is None:
+                    status = "connecting"
+                else:
+                    status = f"{shard['latency'] * 1000:.0f}ms"
+                marker = " ◀" if sid == shard_id else ""
+                lines.append(f"`#{sid:>3}` {status} • {shard['guilds']:,} guilds{marker}")
+            if len(stats) > 20:
+                lines.append(f"... and {len(stats) - 20} more")
+
+            latencies = [s['latency'] for s in stats.values() if s['online'] and s['latency'] is not None]
+            average = sum(latencies) / len(latencies) * 1000 if latencies else 0
+            embed.add_field(
+                name=f"Shards ({len(stats)}) • Avg {average:.0f}ms",
+                value="\n".join(lines),
+                inline=False
+            )
+        
+        await message.edit(content=None, embed=embed)
+
+    async def get_presence_count(self, guild_id):
+        """Discord's approximate online count, fetched at most once per SERVERINFO_COUNTS_TTL per guild."""
+        now = time.monotonic()
+        cached = self.presence_counts.get(guild_id)
+        if cached and cached[0] > now:
+            return cached[1]
+        try:
+            count = (await self.bot.fetch_guild(guild_id, with_counts=True)).approximate_presence_count
+        except discord.HTTPException:
+            count = None
+        # Failures are cached too, so a failing endpoint isn't hit on every call
+        self.presence_counts[guild_id] = (now + config.SERVERINFO_COUNTS_TTL, count)
+        if len(self.presence_counts) > 1000:
+            self.presence_counts = {k: v for k, v in self.presence_counts.items() if v[0] > now}
+        return count
+
+    @commands.command()
+    async def serverinfo(self, ctx):
+        """Get information about the server."""
+        guild = ctx.guild
+        
+        # Get channel counts
+        text_channels = len(guild.text_channels)
+        voice_channels = len(guild.voice_channels)
+        categories = len(guild.categories)
+        total_channels = text_channels + voice_channels
+        
+        # Get member counts. The member cache is only complete when the guild
+        # has been chunked; otherwise fall back to the counts Discord provides.
+        total_members = guild.member_count
+        if guild.chunked and self.bot.intents.presences:
+            online_members = len([m for m in guild.members if m.status != discord.Status.offline])
+        else:
+            online_members = await self.get_presence_count(guild.id)
+        bot_count = len([m for m in guild.members if m.bot]) if guild.chunked else None
+        
+        # Create embed
+        embed = discord.Embed(
+            title=f"Server Information - {guild.name}",
+            color=config.INFO_COLOR
+        )
+        
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+            
+        # General information
+        embed.add_field(
+            name="General",
+            value=f"**Owner:** {guild.owner.mention}\n"
+                  f"**Created:** {discord.utils.format_dt(guild.created_at, 'R')}\n"
+                  f"**Verification Level:** {str(guild.verification_level).title()}\n"
+                  f"**Server ID:** {guild.id}",
+            inline=False
+        )
+        
+        # Member information
+        member_stats = f"**Total:** {total_members:,}\n"
+        if online_members is not None:
+            member_stats += f"**Online:** {online_members:,}\n"
+        if bot_count is not None:
+            member_stats += f"**Humans:** {total_members - bot_count:,}\n" \
+                            f"**Bots:** {bot_count:,}"
+        embed.add_field(
+            name="Members",
+            value=member_stats,
+            inline=True
+        )
+        
+        # Channel information
+        embed.add_field(
+            name="Channels",
+            value=f"**Total:** {total_channels:,}\n"
+                  f"**Text:** {text_channels:,}\n"
+                  f"**Voice:** {voice_channels:,}\n"
+                  f"**Categories:** {categories:,}",
+            inline=True
+        )
+        
+        # Emoji information
+        emoji_stats = f"**Regular:** {len([e for e in guild.emojis if not e.animated])}\n" \
+                     f"**Animated:** {len([e for e in guild.emojis if e.animated])}\n" \
+                     f"**Total:** {len(guild.emojis)}"
+        embed.add_field(name="Emojis", value=emoji_stats, inline=True)
+        
+        # Server features
+        if guild.features:
+            features_str = "\n".join(f"✓ {feature.replace('_', ' ').title()}" for feature in guild.features)
+            if len(features_str) > 1024:  # Discord embed field value limit
+                features_str = features_str[:1021] + "..."
+            embed.add_field(
+                name="Features",
+                value=features_str,
+                inline=False
+            )
+            
+        # Server boost status
+        embed.add_field(
+            name="Boost Status",
+            value=f"**Level:** {guild.premium_tier}\n"
+                  f"**Boosts:** {guild.premium_subscription_count or 0}\n"
+                  f"**Boosters:** {len(guild.premium_subscribers) if guild.premium_subscribers else 0}",
+            inline=False
+        )
+        
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def userinfo(self, ctx, member: discord.Member = None):
+        """Get information about a user."""
+        member = member or ctx.author
+        
+        roles = [role.mention for role in member.roles[1:]]  # All roles except @everyone
+        
+        embed = discord.Embed(
+            title=f"User Information - {member}",
+            color=member.color or config.INFO_COLOR
+        )
+        
+        embed.set_thumbnail(url=member.display_avatar.url)
+        
+        # General information
+        embed.add_field(
+            name="General",
+            value=f"**Username:** {member}\n"
+                  f"**ID:** {member.id}\n"
+                  f"**Nickname:** {member.nick or 'None'}\n"
+                  f"**Bot:** {'Yes' if member.bot else 'No'}",
+            inline=False
+        )
+        
+        # Time information
+        embed.add_field(
+            name="Time Information",
+            value=f"**Account Created:** {discord.utils.format_dt(member.created_at, 'R')}\n"
+                  f"**Joined Server:** {discord.utils.format_dt(member.joined_at, 'R')}",
+            inline=False
+        )
+        
+        # Roles
+        if roles:
+            embed.add_field(
+                name=f"Roles [{len(roles)}]",
+                value=" ".join(roles) if len(roles) <= 10 else " ".join(roles[:10]) + f" ... and {len(roles)-10} more",
+                inline=False
+            )
+            
+        # Permissions
+        key_permissions = []
+        if member.guild_permissions.administrator:
+            key_permissions.append("Administrator")
+        if member.guild_permissions.manage_guild:
+            key_permissions.append("Manage Server")
+        if member.guild_permissions.manage_roles:
+            key_permissions.append("Manage Roles")
+        if member.guild_permissions.manage_channels:
+            key_permissions.append("Manage Channels")
+        if member.guild_permissions.manage_messages:
+            key_permissions.append("Manage Messages")
+        if member.guild_permissions.kick_members:
+            key_permissions.append("Kick Members")
+        if member.guild_permissions.ban_members:
+            key_permissions.append("Ban Members")
+            
+        if key_permissions:
+            embed.add_field(
+                name="Key Permissions",
+                value="\n".join(f"✓ {perm}" for perm in key_permissions),
+                inline=False
+            )
+            
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def avatar(self, ctx, member: discord.Member = None):
+        """Get a user's avatar."""
+        member = member or ctx.author
+        
+        embed = discord.Embed(
+            title=f"Avatar - {member}",
+            color=member.color or config.INFO_COLOR
+        )
+        embed.set_image(url=member.display_avatar.url)
+        
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def roleinfo(self, ctx, role: discord.Role):
+        """Get information about a role."""
+        embed = discord.Embed(
+            title=f"Role Information - {role.name}",
+            color=role.color or config.INFO_COLOR
+        )
+        
+        # General information
+        embed.add_field(
+            name="General",
+            value=f"**Name:** {role.name}\n"
+                  f"**ID:** {role.id}\n"
+                  f"**Color:** {str(role.color)}\n"
+                  f"**Position:** {role.position}\n"
+                  f"**Created:** {discord.utils.format_dt(role.created_at, 'R')}\n"
+                  f"**Mentionable:** {'Yes' if role.mentionable else 'No'}\n"
+                  f"**Hoisted:** {'Yes' if role.hoist else 'No'}\n"
+                  f"**Managed:** {'Yes' if role.managed else 'No'}",
+            inline=False
+        )
+        
+        # Members with this role
+        members_with_role = len(role.members)
+        embed.add_field(
+            name="Members",
+            value=f"{members_with_role:,} member{'s' if members_with_role != 1 else ''} have this role",
+            inline=False
+        )
+        
+        # Key permissions
+        key_permissions = []
+        if role.permissions.administrator:
+            key_permissions.append("Administrator")
+        if role.permissions.manage_guild:
+            key_permissions.append("Manage Server")
+        if role.permissions.manage_roles:
+            key_permissions.append("Manage Roles")
+        if role.permissions.manage_channels:
+            key_permissions.append("Manage Channels")
+        if role.permissions.manage_messages:
+            key_permissions.append("Manage Messages")
+        if role.permissions.kick_members:
+            key_permissions.append("Kick Members")
+        if role.permissions.ban_members:
+            key_permissions.append("Ban Members")
+            
+        if key_permissions:
+            embed.add_field(
+                name="Key Permissions",
+                value="\n".join(f"✓ {perm}" for perm in key_permissions),
+                inline=False
+            )
+            
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def botinfo(self, ctx):
+        """Get information about the bot."""
+        embed = discord.Embed(
+            title="Bot Information",
+            color=config.INFO_COLOR
+        )
+        
+        # Calculate uptime
+        uptime = datetime.utcnow() - self.start_time
+        days = uptime.days
+        hours, remainder = divmod(uptime.seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        
+        # Get system info (psutil is imported on first use to keep startup fast)
+        import psutil
+        process = psutil.Process()
+        memory_usage = process.memory_info().rss / 1024 / 1024  # Convert to MB
+        
+        # Bot stats, summed over every cluster
+        stats = await self.bot.get_cluster_stats()
+        total_guilds = sum(s['guilds'] for s in stats.values())
+        total_members = sum(s['members'] for s in stats.values())
+        total_channels = sum(len(guild.channels) for guild in self.bot.guilds)
+        online_shards = sum(1 for s in stats.values() if s['online'])
+        
+        embed.add_field(
+            name="Bot Stats",
+            value=f"**Guilds:** {total_guilds:,}\n"
+                  f"**Users:** {total_members:,}\n"
+                  f"**Channels:** {total_channels:,}\n"
+                  f"**Commands:** {len(self.bot.commands):,}\n"
+                  f"**Shards:** {online_shards}/{len(stats)}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="System Info",
+            value=f"**Python:** {platform.python_version()}\n"
+                  f"**Discord.py:** {discord.__version__}\n"
+                  f"**Memory:** {memory_usage:.1f} MB\n"
+                  f"**OS:** {platform.system()} {platform.release()}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Uptime",
+            value=f"{days}d {hours}h {minutes}m {seconds}s",
+            inline=True
+        )
+        
+        await ctx.send(embed=embed)
+
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def httpstats(self, ctx):
+        """Show request metrics for external APIs."""
+        client = self.bot.http_client
+        stats = client.stats
+        if not stats:
+            return await ctx.send("No external requests made yet!")
+
+        cache = client.cache
+        embed = discord.Embed(
+            title="🌐 HTTP Client Stats",
+            description=f"**Cache:** {len(cache.entries):,} entries • "
+                        f"{cache.hits:,} hits • {cache.stale_hits:,} stale • "
+                        f"{cache.misses:,} misses • {cache.revalidations:,} revalidated",
+            color=config.INFO_COLOR
+        )
+        for host, host_stats in sorted(stats.items(), key=lambda item: -item[1].requests)[:24]:
+            breaker = client.breakers[host]
+            embed.add_field(
+                name=host or "unknown",
+                value=f"**Requests:** {host_stats.requests:,}\n"
+                      f"**Failures:** {host_stats.failures:,}\n"
+                      f"**Retries:** {host_stats.retries:,}\n"
+                      f"**Avg Time:** {host_stats.average_ms:.0f}ms\n"
+                      f"**Breaker:** {breaker.state} ({breaker.trips} trips)",
+                inline=True
+            )
+
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def channelinfo(self, ctx, channel: Union[discord.TextChannel, discord.VoiceChannel, discord.CategoryChannel] = None):
+        """Get information about a channel."""
+        channel = channel or ctx.channel
+        
+        embed = discord.Embed(
+            title=f"Channel Information - #{channel.name}",
+            color=config.INFO_COLOR
+        )
+        
+        # General information
+        channel_type = str(channel.type).replace('_', ' ').title()
+        
+        embed.add_field(
+            name="General",
+            value=f"**Name:** {channel.name}\n"
+                  f"**ID:** {channel.id}\n"
+                  f"**Type:** {channel_type}\n"
+                  f"**Created:** {discord.utils.format_dt(channel.created_at, 'R')}",
+            inline=False
+        )
+        
+        # Category
+        if isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
+            embed.add_field(
+                name="Category",
+                value=channel.category.name if channel.category else "None",
+                inline=False
+            )
+        
+        # Channel-specific information
+        if isinstance(channel, discord.TextChannel):
+            embed.add_field(
+                name="Text Channel Info",
+                value=f"**Topic:** {channel.topic or 'None'}\n"
+                      f"**NSFW:** {'Yes' if channel.is_nsfw() else 'No'}\n"
+                      f"**Slowmode:** {channel.slowmode_delay}s",
+                inline=False
+            )
+        elif isinstance(channel, discord.VoiceChannel):
+            embed.add_field(
+                name="Voice Channel Info",
+                value=f"**Bitrate:** {channel.bitrate//1000}kbps\n"
+                      f"**User Limit:** {channel.user_limit or 'Unlimited'}\n"
+                      f"**Connected Users:** {len(channel.members)}",
+                inline=False
+            )
+        elif isinstance(channel, discord.CategoryChannel):
+            embed.add_field(
+                name="Category Info",
+                value=f"**Channels:** {len(channel.channels)}\n"
+                      f"**Text Channels:** {len(channel.text_channels)}\n"
+                      f"**Voice Channels:** {len(channel.voice_channels)}",
+                inline=False
+            )
+        
+        await ctx.send(embed=embed)
+
+    @commands.group(aliases=["remindme"], invoke_without_command=True)
+    async def remind(self, ctx, duration: Duration, *, text: str = "something"):
+        """Get reminded about something later, e.g. remind 2h check the oven."""
+        if duration > timedelta(days=config.MAX_REMINDER_DAYS):
+            return await ctx.send(f"❌ Reminders can be at most {config.MAX_REMINDER_DAYS} days away!")
+
+        pending = [
+            timer for timer in self.bot.scheduler.pending('reminder')
+            if timer.data['user_id'] == ctx.author.id
+        ]
+        if len(pending) >= config.MAX_REMINDERS:
+            return await ctx.send(f"❌ You already have {config.MAX_REMINDERS} reminders pending!")
+
+        when = discord.utils.utcnow() + duration
+        await self.bot.scheduler.create(
+            'reminder', when, guild_id=ctx.guild.id if ctx.guild else None,
+            user_id=ctx.author.id, channel_id=ctx.channel.id,
+            jump_url=ctx.message.jump_url, text=text[:1000]
+        )
+        await ctx.send(f"⏰ Okay, I'll remind you {discord.utils.format_dt(when, 'R')}: {text[:1000]}")
+
+    @remind.command(name="list")
+    async def remind_list(self, ctx):
+        """Show your pending reminders."""
+        pending = [
+            timer for timer in self.bot.scheduler.pending('reminder')
+            if timer.data['user_id'] == ctx.author.id
+        ]
+        if not pending:
+            return await ctx.send("You have no pending reminders!")
+
+        embed = discord.Embed(title="⏰ Your Reminders", color=config.INFO_COLOR)
+        for timer in pending[:10]:
+            embed.add_field(
+                name=f"#{timer.id} · {discord.utils.format_dt(timer.due_at, 'R')}",
+                value=timer.data['text'][:200],
+                inline=False
+            )
+        if len(pending) > 10:
+            embed.set_footer(text=f"And {len(pending) - 10} more")
+        await ctx.send(embed=embed)
+
+    @remind.command(name="cancel", aliases=["delete"])
+    async def remind_cancel(self, ctx, reminder_id: int):
+        """Cancel one of your reminders by its number."""
+        timer = self.bot.scheduler.get(reminder_id)
+        if not timer or timer.event != 'reminder' or timer.data['user_id'] != ctx.author.id:
+            return await ctx.send(f"❌ You have no reminder #{reminder_id}!")
+        await self.bot.scheduler.cancel(reminder_id)
+        await ctx.send(f"🗑️ Cancelled reminder #{reminder_id}!")
+
+    @commands.Cog.listener()
+    async def on_reminder_timer_complete(self, timer):
+        data = timer.data
+        late = (discord.utils.utcnow() - timer.due_at).total_seconds()
+        content = (
+            f"⏰ <@{data['user_id']}>, {discord.utils.format_dt(timer.created_at, 'R')} "
+            f"you asked me to remind you: {data['text']}"
+        )
+        if late > 60:
+            content += f"\n*(Sorry, this is {format_duration(late)} late — I was offline.)*"
+
+        channel = self.bot.get_channel(data['channel_id'])
+        mentions = discord.AllowedMentions(everyone=False, roles=False, users=[discord.Object(data['user_id'])])
+        if channel is not None:
+            try:
+                await channel.send(
+                    content,
+                    allowed_mentions=mentions,
+                    view=discord.ui.View().add_item(discord.ui.Button(label="Original message", url=data['jump_url']))
+                )
+                return
+            except discord.HTTPException:
+                pass
+
+        # Channel gone or not allowed to talk there; try a DM instead
+        try:
+            user = self.bot.get_user(data['user_id']) or await self.bot.fetch_user(data['user_id'])
+            await user.send(f"{content}\n{data['jump_url']}")
+        except discord.HTTPException:
+            pass
+
+async def setup(bot):
     await bot.add_cog(Utility(bot)) 
\ No newline at end of file
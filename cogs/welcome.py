@@ -1,281 +1,823 @@
-import discord
-from discord.ext import commands
-import config
-from PIL import Image, ImageDraw, ImageFont
-import io
-import aiohttp
-import os
-from datetime import datetime
-
-class Welcome(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-        self.session = aiohttp.ClientSession()
-        self._create_assets_directory()
-
-    def _create_assets_directory(self):
-        """Create assets directory if it doesn't exist."""
-        if not os.path.exists('assets'):
-            os.makedirs('assets')
-            
-    def cog_unload(self):
-        """Cleanup when cog is unloaded."""
-        if self.session and not self.session.closed:
-            self.bot.loop.create_task(self.session.close())
-
-    async def create_welcome_image(self, member: discord.Member) -> discord.File:
-        """Create a custom welcome image for new members."""
-        # Download the user's avatar
-        avatar_url = member.display_avatar.replace(size=256)
-        async with self.session.get(str(avatar_url)) as resp:
-            avatar_data = await resp.read()
-
-        # Create base image
-        base = Image.new('RGBA', (1000, 300), (47, 49, 54, 255))
-        draw = ImageDraw.Draw(base)
-
-        # Load and paste avatar
-        avatar = Image.open(io.BytesIO(avatar_data))
-        avatar = avatar.resize((200, 200))
-        mask = Image.new('L', avatar.size, 0)
-        mask_draw = ImageDraw.Draw(mask)
-        mask_draw.ellipse((0, 0, 200, 200), fill=255)
-        base.paste(avatar, (50, 50), mask)
-
-        # Add text
-        try:
-            font = ImageFont.truetype("assets/font.ttf", 60)
-            small_font = ImageFont.truetype("assets/font.ttf", 40)
-        except:
-            # Fallback to default font
-            font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-
-        # Add welcome text
-        draw.text(
-            (280, 50),
-            f"Welcome to {member.guild.name}!",
-            font=font,
-            fill=(255, 255, 255)
-        )
-        draw.text(
-            (280, 140),
-            f"{member.name}#{member.discriminator}",
-            font=small_font,
-            fill=(255, 255, 255)
-        )
-        draw.text(
-            (280, 200),
-            f"Member #{len(member.guild.members)}",
-            font=small_font,
-            fill=(255, 255, 255)
-        )
-
-        # Save and return
-        buffer = io.BytesIO()
-        base.save(buffer, 'PNG')
-        buffer.seek(0)
-        return discord.File(buffer, 'welcome.png')
-
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        """Handle new member joins."""
-        # Get guild settings
-        async with self.bot.db.execute("""
-            SELECT welcome_channel_id, welcome_message
-            FROM guild_settings
-            WHERE guild_id = ?
-        """, (member.guild.id,)) as cursor:
-            result = await cursor.fetchone()
-
-        if not result:
-            return
-
-        channel_id, custom_message = result
-        channel = member.guild.get_channel(channel_id) if channel_id else None
-
-        if not channel:
-            return
-
-        # Create and send welcome message
-        try:
-            welcome_image = await self.create_welcome_image(member)
-            
-            # Format custom message or use default
-            message = custom_message or config.DEFAULT_WELCOME_MESSAGE
-            message = message.format(
-                user=member.mention,
-                server=member.guild.name,
-                count=len(member.guild.members)
-            )
-
-            embed = discord.Embed(
-                title="Welcome!",
-                description=message,
-                color=config.INFO_COLOR,
-                timestamp=datetime.utcnow()
-            )
-            embed.set_image(url="attachment://welcome.png")
-            
-            await channel.send(
-                content=member.mention,
-                embed=embed,
-                file=welcome_image
-            )
-        except Exception as e:
-            print(f"Error sending welcome message: {e}")
-
-        # Handle auto-roles
-        async with self.bot.db.execute("""
-            SELECT role_id FROM autorole
-            WHERE guild_id = ?
-        """, (member.guild.id,)) as cursor:
-            autoroles = await cursor.fetchall()
-
-        for role_id, in autoroles:
-            role = member.guild.get_role(role_id)
-            if role:
-                try:
-                    await member.add_roles(role, reason="Auto-role on join")
-                except discord.HTTPException:
-                    continue
-
-    @commands.group(invoke_without_command=True)
-    @commands.has_permissions(manage_guild=True)
-    async def welcome(self, ctx):
-        """Manage welcome system settings."""
-        await ctx.send_help(ctx.command)
-
-    @welcome.command(name="channel")
-    @commands.has_permissions(manage_guild=True)
-    async def welcome_channel(self, ctx, channel: discord.TextChannel = None):
-        """Set the welcome channel."""
-        async with self.bot.db.cursor() as cursor:
-            if channel:
-                await cursor.execute("""
-                    UPDATE guild_settings
-                    SET welcome_channel_id = ?
-                    WHERE guild_id = ?
-                """, (channel.id, ctx.guild.id))
-                await self.bot.db.commit()
-                await ctx.send(f"Welcome channel set to {channel.mention}!")
-            else:
-                await cursor.execute("""
-                    UPDATE guild_settings
-                    SET welcome_channel_id = NULL
-                    WHERE guild_id = ?
-                """, (ctx.guild.id,))
-                await self.bot.db.commit()
-                await ctx.send("Welcome messages disabled!")
-
-    @welcome.command(name="message")
-    @commands.has_permissions(manage_guild=True)
-    async def welcome_message(self, ctx, *, message: str = None):
-        """Set the welcome message. Use {user} for mention, {server} for server name, {count} for member count."""
-        async with self.bot.db.cursor() as cursor:
-            if message:
-                await cursor.execute("""
-                    UPDATE guild_settings
-                    SET welcome_message = ?
-                    WHERE guild_id = ?
-                """, (message, ctx.guild.id))
-                await self.bot.db.commit()
-                
-                # Show preview
-                preview = message.format(
-                    user=ctx.author.mention,
-                    server=ctx.guild.name,
-                    count=len(ctx.guild.members)
-                )
-                await ctx.send(f"Welcome message set! Preview:\n{preview}")
-            else:
-                await cursor.execute("""
-                    UPDATE guild_settings
-                    SET welcome_message = NULL
-                    WHERE guild_id = ?
-                """, (ctx.guild.id,))
-                await self.bot.db.commit()
-                await ctx.send(f"Reset to default welcome message:\n{config.DEFAULT_WELCOME_MESSAGE}")
-
-    @welcome.command(name="test")
-    @commands.has_permissions(manage_guild=True)
-    async def welcome_test(self, ctx):
-        """Test the welcome message."""
-        await self.on_member_join(ctx.author)
-        await ctx.send("Sent test welcome message!")
-
-    @commands.group(invoke_without_command=True)
-    @commands.has_permissions(manage_guild=True)
-    async def autorole(self, ctx):
-        """Manage auto-role settings."""
-        await ctx.send_help(ctx.command)
-
-    @autorole.command(name="add")
-    @commands.has_permissions(manage_guild=True)
-    async def autorole_add(self, ctx, role: discord.Role):
-        """Add a role to be automatically assigned to new members."""
-        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
-            return await ctx.send("You cannot add an auto-role higher than your highest role!")
-
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                INSERT OR IGNORE INTO autorole (guild_id, role_id)
-                VALUES (?, ?)
-            """, (ctx.guild.id, role.id))
-        await self.bot.db.commit()
-
-        await ctx.send(f"Added {role.mention} to auto-roles!")
-
-    @autorole.command(name="remove")
-    @commands.has_permissions(manage_guild=True)
-    async def autorole_remove(self, ctx, role: discord.Role):
-        """Remove a role from auto-roles."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                DELETE FROM autorole
-                WHERE guild_id = ? AND role_id = ?
-            """, (ctx.guild.id, role.id))
-        await self.bot.db.commit()
-
-        await ctx.send(f"Removed {role.mention} from auto-roles!")
-
-    @autorole.command(name="list")
-    async def autorole_list(self, ctx):
-        """List all auto-roles."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                SELECT role_id FROM autorole
-                WHERE guild_id = ?
-            """, (ctx.guild.id,))
-            roles = await cursor.fetchall()
-
-        if not roles:
-            return await ctx.send("No auto-roles set up!")
-
-        embed = discord.Embed(
-            title="Auto-Roles",
-            description="Roles automatically assigned to new members:",
-            color=config.INFO_COLOR
-        )
-
-        for role_id, in roles:
-            role = ctx.guild.get_role(role_id)
-            if role:
-                embed.add_field(name=role.name, value=role.mention, inline=False)
-
-        await ctx.send(embed=embed)
-
-async def setup(bot):
-    # Create necessary tables
-    async with bot.db.cursor() as cursor:
-        # Auto-role table
-        await cursor.execute("""
-            CREATE TABLE IF NOT EXISTS autorole (
-                guild_id INTEGER,
-                role_id INTEGER,
-                PRIMARY KEY (guild_id, role_id)
-            )
-        """)
-    await bot.db.commit()
-    
+import discord
+from discord.ext import commands, tasks
+import config
+import asyncio
+import io
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from utils.antiraid import RaidDetector
+from utils.invites import InviteSnapshot, attribute
+
+logger = logging.getLogger('DiscordBot')
+
+class Welcome(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.raid_settings = {}  # guild_id -> (enabled, raise_verification)
+        self.raid_detectors = {}  # guild_id -> RaidDetector
+        self.invite_snapshots = {}  # guild_id -> InviteSnapshot
+        self.invite_waiters = {}  # guild_id -> [(member_id, future, monotonic join time)] joins waiting on the next refetch
+        self.invite_locks = {}  # guild_id -> asyncio.Lock around refetch and diff
+        self.pending_invite_joins = {}  # (guild_id, user_id) -> row waiting to be written
+        self.pending_invite_leaves = {}  # (guild_id, user_id) -> monotonic time of a leave waiting to be written
+        self._create_assets_directory()
+
+    async def cog_load(self):
+        self.check_raids.start()
+        self.flush_invites_task.start()
+        self.load_invites_task = asyncio.create_task(self.load_all_invites())
+
+    async def cog_unload(self):
+        self.check_raids.cancel()
+        self.flush_invites_task.cancel()
+        self.load_invites_task.cancel()
+        await self.flush_invites()
+
+    def _create_assets_directory(self):
+        """Create assets directory if it doesn't exist."""
+        if not os.path.exists('assets'):
+            os.makedirs('assets')
+
+    async def create_welcome_image(self, member: discord.Member) -> discord.File:
+        """Create a custom welcome image for new members."""
+        # Pillow is only needed here, so don't pay for importing it at startup
+        from PIL import Image, ImageDraw, ImageFont
+
+        # Download the user's avatar
+        avatar_url = member.display_avatar.replace(size=256)
+        response = await self.bot.http_client.get(str(avatar_url), max_size=config.AVATAR_MAX_BYTES)
+        avatar_data = response.body
+
+        # Create base image
+        base = Image.new('RGBA', (1000, 300), (47, 49, 54, 255))
+        draw = ImageDraw.Draw(base)
+
+        # Load and paste avatar
+        avatar = Image.open(io.BytesIO(avatar_data))
+        avatar = avatar.resize((200, 200))
+        mask = Image.new('L', avatar.size, 0)
+        mask_draw = ImageDraw.Draw(mask)
+        mask_draw.ellipse((0, 0, 200, 200), fill=255)
+        base.paste(avatar, (50, 50), mask)
+
+        # Add text
+        try:
+            font = ImageFont.truetype("assets/font.ttf", 60)
+            small_font = ImageFont.truetype("assets/font.ttf", 40)
+        except:
+            # Fallback to default font
+            font = ImageFont.load_default()
+            small_font = ImageFont.load_default()
+
+        # Add welcome text
+        draw.text(
+            (280, 50),
+            f"Welcome to {member.guild.name}!",
+            font=font,
+            fill=(255, 255, 255)
+        )
+        draw.text(
+            (280, 140),
+            f"{member.name}#{member.discriminator}",
+            font=small_font,
+            fill=(255, 255, 255)
+        )
+        draw.text(
+            (280, 200),
+            f"Member #{member.guild.member_count}",
+            font=small_font,
+            fill=(255, 255, 255)
+        )
+
+        # Save and return
+        buffer = io.BytesIO()
+        base.save(buffer, 'PNG')
+        buffer.seek(0)
+        return discord.File(buffer, 'welcome.png')
+
+    async def get_raid_settings(self, guild_id):
+        settings = self.raid_settings.get(guild_id)
+        if settings is None:
+            async with self.bot.db.execute(
+                "SELECT enabled, raise_verification FROM antiraid_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                result = await cursor.fetchone()
+            settings = self.raid_settings[guild_id] = (
+                (bool(result[0]), bool(result[1])) if result else (False, False)
+            )
+        return settings
+
+    async def check_raid(self, member):
+        """Feed a join to the guild's raid detector; True while the guild is in raid mode."""
+        enabled, _ = self.raid_settings.get(member.guild.id) or await self.get_raid_settings(member.guild.id)
+        detector = self.raid_detectors.get(member.guild.id)
+        if detector is None:
+            if not enabled:
+                return False
+            detector = self.raid_detectors[member.guild.id] = RaidDetector(
+                config.RAID_JOIN_LIMIT, config.RAID_JOIN_PER,
+                config.RAID_NEW_ACCOUNT_LIMIT, config.RAID_NEW_ACCOUNT_PER, config.RAID_QUEUE_MAX
+            )
+
+        now = time.monotonic()
+        new_account = discord.utils.utcnow() - member.created_at < timedelta(seconds=config.RAID_NEW_ACCOUNT_AGE)
+        if detector.record(member.id, new_account, now) and enabled:
+            if detector.active(now):
+                detector.extend(now, config.RAID_MODE_DURATION)
+            else:
+                await self.start_raid_mode(member.guild, detector, "Join rate or new-account threshold crossed")
+        return detector.active(now)
+
+    async def start_raid_mode(self, guild, detector, reason):
+        detector.start(time.monotonic(), config.RAID_MODE_DURATION)
+        _, raise_verification = await self.get_raid_settings(guild.id)
+
+        raised = False
+        if (
+            raise_verification
+            and guild.verification_level < discord.VerificationLevel.high
+            and guild.me.guild_permissions.manage_guild
+        ):
+            # Remember the old level so it can be restored, even after a restart
+            await self.bot.db.execute("""
+                UPDATE antiraid_settings SET saved_verification = ?
+                WHERE guild_id = ? AND saved_verification IS NULL
+            """, (guild.verification_level.value, guild.id))
+            await self.bot.db.commit()
+            try:
+                await guild.edit(verification_level=discord.VerificationLevel.high, reason=f"Raid mode: {reason}")
+                raised = True
+            except discord.HTTPException as e:
+                logger.warning(f"Couldn't raise verification in {guild.id}: {e}")
+
+        embed = discord.Embed(
+            title="🚨 Raid Mode On",
+            description=f"{reason}. Welcome messages and autoroles are paused"
+                        + (" and verification is raised to High" if raised else "") + ".",
+            color=config.ERROR_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Queued Joins", value=str(len(detector.queue)))
+        await self.bot.mod_log.send(guild, embed)
+
+    async def end_raid_mode(self, guild, detector):
+        detector.end()
+        await self.restore_verification(guild)
+
+        embed = discord.Embed(
+            title="✅ Raid Mode Off",
+            description=f"{len(detector.queue)} suspicious join(s) are queued. "
+                        "Review them with `antiraid queue`, then `antiraid ban` or `antiraid kick`.",
+            color=config.SUCCESS_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        await self.bot.mod_log.send(guild, embed)
+
+    async def restore_verification(self, guild):
+        """Put back the verification level raid mode raised, if it did."""
+        async with self.bot.db.execute(
+            "SELECT saved_verification FROM antiraid_settings WHERE guild_id = ?", (guild.id,)
+        ) as cursor:
+            result = await cursor.fetchone()
+        if result and result[0] is not None:
+            try:
+                await guild.edit(verification_level=discord.VerificationLevel(result[0]), reason="Raid mode ended")
+            except discord.HTTPException as e:
+                logger.warning(f"Couldn't restore verification in {guild.id}: {e}")
+            await self.bot.db.execute(
+                "UPDATE antiraid_settings SET saved_verification = NULL WHERE guild_id = ?", (guild.id,)
+            )
+            await self.bot.db.commit()
+
+    @tasks.loop(seconds=15)
+    async def check_raids(self):
+        """End raid modes that have gone quiet and drop idle detectors."""
+        now = time.monotonic()
+        for guild_id, detector in list(self.raid_detectors.items()):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                del self.raid_detectors[guild_id]
+            elif detector.started is not None and not detector.active(now):
+                await self.end_raid_mode(guild, detector)
+            elif detector.idle(now):
+                del self.raid_detectors[guild_id]
+
+    @check_raids.before_loop
+    async def before_check_raids(self):
+        await self.bot.wait_until_ready()
+        # Raid mode doesn't survive a restart; put back any verification level it raised
+        async with self.bot.db.execute(
+            "SELECT guild_id FROM antiraid_settings WHERE saved_verification IS NOT NULL"
+        ) as cursor:
+            guild_ids = [guild_id for guild_id, in await cursor.fetchall()]
+        for guild_id in guild_ids:
+            guild = self.bot.get_guild(guild_id)
+            if guild:
+                await self.restore_verification(guild)
+
+    async def load_invites(self, guild):
+        """Take a fresh snapshot of a guild's invites, if we're allowed to see them."""
+        if not guild.me.guild_permissions.manage_guild:
+            self.invite_snapshots.pop(guild.id, None)
+            self.invite_locks.pop(guild.id, None)
+            return
+        try:
+            self.invite_snapshots[guild.id] = InviteSnapshot(await guild.invites())
+        except discord.HTTPException as e:
+            self.invite_locks.pop(guild.id, None)
+            logger.warning(f"Couldn't load invites for {guild.id}: {e}")
+
+    async def load_all_invites(self):
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            if guild.id not in self.invite_snapshots:
+                await self.load_invites(guild)
+
+    def track_invite(self, member):
+        """Queue a join for invite attribution.
+
+        Joins are collected for INVITE_REFETCH_DELAY seconds and then
+        explained by a single refetch, so a burst of joins costs one
+        request. Returns a future for ``(code, inviter_id, exact)`` or None.
+        """
+        if member.bot:
+            return None
+        if member.guild.id not in self.invite_snapshots:
+            # Without a snapshot there's nothing to diff against; take one for next time
+            if member.guild.me.guild_permissions.manage_guild and member.guild.id not in self.invite_locks:
+                self.invite_locks[member.guild.id] = asyncio.Lock()
+                asyncio.create_task(self.load_invites(member.guild))
+            return None
+        future = self.bot.loop.create_future()
+        waiters = self.invite_waiters.get(member.guild.id)
+        if waiters is None:
+            waiters = self.invite_waiters[member.guild.id] = []
+            asyncio.create_task(self.resolve_invites(member.guild))
+        waiters.append((member.id, future, time.monotonic()))
+        return future
+
+    async def resolve_invites(self, guild):
+        await asyncio.sleep(config.INVITE_REFETCH_DELAY)
+        # Joins from here on wait for the next refetch
+        waiters = self.invite_waiters.pop(guild.id, [])
+        results = {}
+        try:
+            lock = self.invite_locks.setdefault(guild.id, asyncio.Lock())
+            async with lock:
+                snapshot = self.invite_snapshots.get(guild.id)
+                if snapshot is not None:
+                    credits = snapshot.diff(await guild.invites())
+                    results = attribute([member_id for member_id, *_ in waiters], credits)
+        except discord.Forbidden:
+            # Lost Manage Server; stop tracking until it's back
+            self.invite_snapshots.pop(guild.id, None)
+            self.invite_locks.pop(guild.id, None)
+        except discord.HTTPException as e:
+            logger.warning(f"Couldn't fetch invites for {guild.id}: {e}")
+        finally:
+            joined = datetime.utcnow()
+            for member_id, future, joined_at in waiters:
+                result = results.get(member_id)
+                code, inviter_id, exact = result or (None, None, False)
+                key = (guild.id, member_id)
+                self.pending_invite_joins[key] = (guild.id, member_id, inviter_id, code, int(exact), joined)
+                # A leave from before this join belongs to an earlier stay; one since then still counts
+                if self.pending_invite_leaves.get(key, joined_at) < joined_at:
+                    del self.pending_invite_leaves[key]
+                if not future.done():
+                    future.set_result(result)
+
+    @tasks.loop(seconds=config.INVITE_FLUSH_INTERVAL)
+    async def flush_invites_task(self):
+        await self.flush_invites()
+
+    async def flush_invites(self):
+        """Write accumulated joins and leaves in one batch."""
+        if not self.pending_invite_joins and not self.pending_invite_leaves:
+            return
+        joins, self.pending_invite_joins = self.pending_invite_joins, {}
+        leaves, self.pending_invite_leaves = self.pending_invite_leaves, {}
+        try:
+            if joins:
+                await self.bot.db.executemany("""
+                    INSERT OR REPLACE INTO invite_joins (guild_id, user_id, inviter_id, code, exact, joined, has_left)
+                    VALUES (?, ?, ?, ?, ?, ?, 0)
+                """, joins.values())
+            if leaves:
+                await self.bot.db.executemany("""
+                    UPDATE invite_joins SET has_left = 1
+                    WHERE guild_id = ? AND user_id = ?
+                """, leaves.keys())
+            await self.bot.db.commit()
+        except Exception as e:
+            logger.error(f"Invite flush failed: {e}")
+            # Keep the batch for the next run without overwriting anything newer.
+            # A join queued since supersedes an old leave; a leave after it is queued too.
+            for key, left_at in leaves.items():
+                if key not in self.pending_invite_joins:
+                    self.pending_invite_leaves.setdefault(key, left_at)
+            self.pending_invite_joins = {**joins, **self.pending_invite_joins}
+
+    @commands.Cog.listener()
+    async def on_invite_create(self, invite):
+        snapshot = invite.guild and self.invite_snapshots.get(invite.guild.id)
+        if snapshot:
+            snapshot.add(invite)
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite):
+        snapshot = invite.guild and self.invite_snapshots.get(invite.guild.id)
+        if snapshot:
+            snapshot.remove(invite.code)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.load_invites(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.invite_snapshots.pop(guild.id, None)
+        self.invite_locks.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        # Joins are written before leaves, so a join still pending is covered too
+        self.pending_invite_leaves[(payload.guild_id, payload.user.id)] = time.monotonic()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        """Handle new member joins."""
+        invite = self.track_invite(member)
+
+        # During a raid, skip the welcome post, its image and autoroles
+        if await self.check_raid(member):
+            return
+
+        await self.welcome_member(member, invite)
+
+    async def welcome_member(self, member, invite=None):
+        """Post the welcome message and hand out autoroles."""
+        # Get guild settings
+        async with self.bot.db.execute("""
+            SELECT welcome_channel_id, welcome_message
+            FROM guild_settings
+            WHERE guild_id = ?
+        """, (member.guild.id,)) as cursor:
+            result = await cursor.fetchone()
+
+        if not result:
+            return
+
+        channel_id, custom_message = result
+        channel = member.guild.get_channel(channel_id) if channel_id else None
+
+        if not channel:
+            return
+
+        # Create and send welcome message
+        try:
+            welcome_image = await self.create_welcome_image(member)
+
+            # The image was drawn while the invite refetch was pending
+            used = None
+            if invite is not None:
+                try:
+                    used = await asyncio.wait_for(invite, timeout=config.INVITE_REFETCH_DELAY + 10)
+                except asyncio.TimeoutError:
+                    pass
+            inviter = f"<@{used[1]}>" if used and used[1] else "someone"
+            
+            # Format custom message or use default
+            message = custom_message or config.DEFAULT_WELCOME_MESSAGE
+            message = message.format(
+                user=member.mention,
+                server=member.guild.name,
+                count=member.guild.member_count,
+                inviter=inviter
+            )
+
+            embed = discord.Embed(
+                title="Welcome!",
+                description=message,
+                color=config.INFO_COLOR,
+                timestamp=datetime.utcnow()
+            )
+            if used:
+                code, _, exact = used
+                embed.add_field(
+                    name="Invited by",
+                    value=f"{inviter} (`{code}`)" + ("" if exact else " · best guess")
+                )
+            embed.set_image(url="attachment://welcome.png")
+            
+            await channel.send(
+                content=member.mention,
+                embed=embed,
+                file=welcome_image
+            )
+        except Exception as e:
+            print(f"Error sending welcome message: {e}")
+
+        # Handle auto-roles
+        async with self.bot.db.execute("""
+            SELECT role_id FROM autorole
+            WHERE guild_id = ?
+        """, (member.guild.id,)) as cursor:
+            autoroles = await cursor.fetchall()
+
+        for role_id, in autoroles:
+            role = member.guild.get_role(role_id)
+            if role:
+                try:
+                    await member.add_roles(role, reason="Auto-role on join")
+                except discord.HTTPException:
+                    continue
+
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def welcome(self, ctx):
+        """Manage welcome system settings."""
+        await ctx.send_help(ctx.command)
+
+    @welcome.command(name="channel")
+    @commands.has_permissions(manage_guild=True)
+    async def welcome_channel(self, ctx, channel: discord.TextChannel = None):
+        """Set the welcome channel."""
+        async with self.bot.db.cursor() as cursor:
+            if channel:
+                await cursor.execute("""
+                    UPDATE guild_settings
+                    SET welcome_channel_id = ?
+                    WHERE guild_id = ?
+                """, (channel.id, ctx.guild.id))
+                await self.bot.db.commit()
+                await ctx.send(f"Welcome channel set to {channel.mention}!")
+            else:
+                await cursor.execute("""
+                    UPDATE guild_settings
+                    SET welcome_channel_id = NULL
+                    WHERE guild_id = ?
+                """, (ctx.guild.id,))
+                await self.bot.db.commit()
+                await ctx.send("Welcome messages disabled!")
+
+    @welcome.command(name="message")
+    @commands.has_permissions(manage_guild=True)
+    async def welcome_message(self, ctx, *, message: str = None):
+        """Set the welcome message. Use {user} for mention, {server} for server name, {count} for member count, {inviter} for who invited them."""
+        async with self.bot.db.cursor() as cursor:
+            if message:
+                await cursor.execute("""
+                    UPDATE guild_settings
+                    SET welcome_message = ?
+                    WHERE guild_id = ?
+                """, (message, ctx.guild.id))
+                await self.bot.db.commit()
+                
+                # Show preview
+                preview = message.format(
+                    user=ctx.author.mention,
+                    server=ctx.guild.name,
+                    count=ctx.guild.member_count,
+                    inviter=ctx.guild.me.mention
+                )
+                await ctx.send(f"Welcome message set! Preview:\n{preview}")
+            else:
+                await cursor.execute("""
+                    UPDATE guild_settings
+                    SET welcome_message = NULL
+                    WHERE guild_id = ?
+                """, (ctx.guild.id,))
+                await self.bot.db.commit()
+                await ctx.send(f"Reset to default welcome message:\n{config.DEFAULT_WELCOME_MESSAGE}")
+
+    @welcome.command(name="test")
+    @commands.has_permissions(manage_guild=True)
+    async def welcome_test(self, ctx):
+        """Test the welcome message."""
+        await self.welcome_member(ctx.author)
+        await ctx.send("Sent test welcome message!")
+
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def autorole(self, ctx):
+        """Manage auto-role settings."""
+        await ctx.send_help(ctx.command)
+
+    @autorole.command(name="add")
+    @commands.has_permissions(manage_guild=True)
+    async def autorole_add(self, ctx, role: discord.Role):
+        """Add a role to be automatically assigned to new members."""
+        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            return await ctx.send("You cannot add an auto-role higher than your highest role!")
+
+        async with self.bot.db.cursor() as cursor:
+            await cursor.execute("""
+                INSERT OR IGNORE INTO autorole (guild_id, role_id)
+                VALUES (?, ?)
+            """, (ctx.guild.id, role.id))
+        await self.bot.db.commit()
+
+        await ctx.send(f"Added {role.mention} to auto-roles!")
+
+    @autorole.command(name="remove")
+    @commands.has_permissions(manage_guild=True)
+    async def autorole_remove(self, ctx, role: discord.Role):
+        """Remove a role from auto-roles."""
+        async with self.bot.db.cursor() as cursor:
+            await cursor.execute("""
+                DELETE FROM autorole
+                WHERE guild_id = ? AND role_id = ?
+            """, (ctx.guild.id, role.id))
+        await self.bot.db.commit()
+
+        await ctx.send(f"Removed {role.mention} from auto-roles!")
+
+    @autorole.command(name="list")
+    async def autorole_list(self, ctx):
+        """List all auto-roles."""
+        async with self.bot.db.cursor() as cursor:
+            await cursor.execute("""
+                SELECT role_id FROM autorole
+                WHERE guild_id = ?
+            """, (ctx.guild.id,))
+            roles = await cursor.fetchall()
+
+        if not roles:
+            return await ctx.send("No auto-roles set up!")
+
+        embed = discord.Embed(
+            title="Auto-Roles",
+            description="Roles automatically assigned to new members:",
+            color=config.INFO_COLOR
+        )
+
+        for role_id, in roles:
+            role = ctx.guild.get_role(role_id)
+            if role:
+                embed.add_field(name=role.name, value=role.mention, inline=False)
+
+        await ctx.send(embed=embed)
+
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid(self, ctx):
+        """Show anti-raid settings and whether raid mode is on."""
+        enabled, raise_verification = await self.get_raid_settings(ctx.guild.id)
+        detector = self.raid_detectors.get(ctx.guild.id)
+        now = time.monotonic()
+        active = detector is not None and detector.active(now)
+
+        embed = discord.Embed(
+            title="🚨 Anti-Raid",
+            description=("Detection on ✅" if enabled else "Detection off ❌")
+                        + (" · **Raid mode active**" if active else ""),
+            color=config.ERROR_COLOR if active else config.INFO_COLOR
+        )
+        embed.add_field(
+            name="Triggers",
+            value=f"{config.RAID_JOIN_LIMIT} joins in {config.RAID_JOIN_PER}s, or "
+                  f"{config.RAID_NEW_ACCOUNT_LIMIT} accounts under "
+                  f"{config.RAID_NEW_ACCOUNT_AGE // 86400} day(s) old in {config.RAID_NEW_ACCOUNT_PER}s",
+            inline=False
+        )
+        embed.add_field(name="Raise Verification", value="on" if raise_verification else "off")
+        embed.add_field(name="Queued Joins", value=str(len(detector.queue) if detector else 0))
+        if active:
+            embed.add_field(name="Ends", value=f"<t:{int(time.time() + detector.until - now)}:R> if it stays quiet")
+        await ctx.send(embed=embed)
+
+    async def _set_raid_option(self, guild_id, option, value):
+        await self.bot.db.execute(
+            "INSERT OR IGNORE INTO antiraid_settings (guild_id) VALUES (?)", (guild_id,)
+        )
+        await self.bot.db.execute(
+            f"UPDATE antiraid_settings SET {option} = ? WHERE guild_id = ?", (int(value), guild_id)
+        )
+        await self.bot.db.commit()
+        self.raid_settings.pop(guild_id, None)
+
+    @antiraid.command(name="on", aliases=["enable"])
+    async def antiraid_on(self, ctx):
+        """Start watching joins for raids."""
+        await self._set_raid_option(ctx.guild.id, 'enabled', True)
+        await ctx.send("✅ Anti-raid detection enabled!")
+
+    @antiraid.command(name="off", aliases=["disable"])
+    async def antiraid_off(self, ctx):
+        """Stop watching joins for raids."""
+        await self._set_raid_option(ctx.guild.id, 'enabled', False)
+        await ctx.send("✅ Anti-raid detection disabled!")
+
+    @antiraid.command(name="verification")
+    async def antiraid_verification(self, ctx, enabled: bool):
+        """Choose whether raid mode raises the server's verification level to High."""
+        await self._set_raid_option(ctx.guild.id, 'raise_verification', enabled)
+        await ctx.send(f"✅ Raid mode will {'now' if enabled else 'no longer'} raise the verification level.")
+
+    @antiraid.command(name="start")
+    async def antiraid_start(self, ctx):
+        """Turn raid mode on by hand."""
+        detector = self.raid_detectors.get(ctx.guild.id)
+        if detector is None:
+            detector = self.raid_detectors[ctx.guild.id] = RaidDetector(
+                config.RAID_JOIN_LIMIT, config.RAID_JOIN_PER,
+                config.RAID_NEW_ACCOUNT_LIMIT, config.RAID_NEW_ACCOUNT_PER, config.RAID_QUEUE_MAX
+            )
+        if detector.active(time.monotonic()):
+            return await ctx.send("❌ Raid mode is already on!")
+        await self.start_raid_mode(ctx.guild, detector, f"Started by {ctx.author}")
+        await ctx.send("🚨 Raid mode on. It ends after a quiet spell, or with `antiraid end`.")
+
+    @antiraid.command(name="end", aliases=["stop"])
+    async def antiraid_end(self, ctx):
+        """Turn raid mode off now."""
+        detector = self.raid_detectors.get(ctx.guild.id)
+        if detector is None or detector.started is None:
+            return await ctx.send("❌ Raid mode isn't on!")
+        await self.end_raid_mode(ctx.guild, detector)
+        await ctx.send("✅ Raid mode off.")
+
+    @antiraid.command(name="queue")
+    async def antiraid_queue(self, ctx):
+        """List the suspicious joins waiting for a bulk action."""
+        detector = self.raid_detectors.get(ctx.guild.id)
+        if not detector or not detector.queue:
+            return await ctx.send("✨ No suspicious joins queued!")
+
+        lines = []
+        for member_id in list(detector.queue)[-20:]:
+            member = ctx.guild.get_member(member_id)
+            if member:
+                lines.append(f"{member.mention} · account made <t:{int(member.created_at.timestamp())}:R>")
+            else:
+                lines.append(f"`{member_id}` (left)")
+        embed = discord.Embed(
+            title=f"Suspicious Joins ({len(detector.queue)})",
+            description="\n".join(lines),
+            color=config.WARNING_COLOR
+        )
+        if len(detector.queue) > 20:
+            embed.set_footer(text="Showing the latest 20")
+        await ctx.send(embed=embed)
+
+    @antiraid.command(name="clear")
+    async def antiraid_clear(self, ctx):
+        """Forget the queued joins without acting on them."""
+        detector = self.raid_detectors.get(ctx.guild.id)
+        if detector:
+            detector.queue.clear()
+        await ctx.send("✅ Queue cleared.")
+
+    async def _act_on_queue(self, ctx, action, reason):
+        moderation = self.bot.get_cog('Moderation')
+        detector = self.raid_detectors.get(ctx.guild.id)
+        if moderation is None:
+            return await ctx.send("❌ The moderation module isn't loaded!")
+        if not detector or not detector.queue:
+            return await ctx.send("✨ No suspicious joins queued!")
+
+        # Reuse massban/masskick: preview, confirmation, progress and logging
+        queued = list(detector.queue)
+        flags = SimpleNamespace(
+            ids=" ".join(map(str, queued)), joined=None, match=None,
+            reason=f"Raid cleanup: {reason or 'No reason provided'}"
+        )
+        done = await moderation.mass_action(ctx, flags, action)
+        if not isinstance(done, list):
+            # Cancelled or nothing to do: leave the queue as it was
+            return
+        # Drop whoever was handled; failures stay queued for another try
+        handled = set(done)
+        if action == "kick":
+            # Members who already left can't be kicked and shouldn't linger
+            handled.update(member_id for member_id in queued if ctx.guild.get_member(member_id) is None)
+        remaining = [member_id for member_id in detector.queue if member_id not in handled]
+        detector.queue.clear()
+        detector.queue.extend(remaining)
+
+    @antiraid.command(name="ban")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def antiraid_ban(self, ctx, *, reason=None):
+        """Ban every queued join."""
+        await self._act_on_queue(ctx, "ban", reason)
+
+    @antiraid.command(name="kick")
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    async def antiraid_kick(self, ctx, *, reason=None):
+        """Kick every queued join that's still here."""
+        await self._act_on_queue(ctx, "kick", reason)
+
+    @commands.group(invoke_without_command=True)
+    @commands.guild_only()
+    async def invites(self, ctx, member: discord.Member = None):
+        """Show how many people someone has invited."""
+        member = member or ctx.author
+        await self.flush_invites()
+        async with self.bot.db.execute("""
+            SELECT COUNT(*), COALESCE(SUM(has_left), 0)
+            FROM invite_joins
+            WHERE guild_id = ? AND inviter_id = ?
+        """, (ctx.guild.id, member.id)) as cursor:
+            total, left = await cursor.fetchone()
+        async with self.bot.db.execute("""
+            SELECT inviter_id, code, exact FROM invite_joins
+            WHERE guild_id = ? AND user_id = ?
+        """, (ctx.guild.id, member.id)) as cursor:
+            joined_with = await cursor.fetchone()
+
+        embed = discord.Embed(
+            title=f"📨 Invites for {member.display_name}",
+            description=f"**{total - left:,}** still here · {total:,} joined · {left:,} left",
+            color=config.INFO_COLOR
+        )
+        if joined_with and joined_with[0]:
+            inviter_id, code, exact = joined_with
+            embed.add_field(
+                name="Invited by",
+                value=f"<@{inviter_id}> (`{code}`)" + ("" if exact else " · best guess")
+            )
+        if ctx.guild.id not in self.invite_snapshots:
+            embed.set_footer(text="Invites aren't being tracked here: I need Manage Server")
+        await ctx.send(embed=embed)
+
+    @invites.command(name="top", aliases=["leaderboard", "lb"])
+    async def invites_top(self, ctx, page: int = 1):
+        """Show the server's invite leaderboard."""
+        if page < 1:
+            return await ctx.send("Page number must be 1 or higher!")
+
+        await self.flush_invites()
+        per_page = config.INVITES_PER_PAGE
+        async with self.bot.db.execute("""
+            SELECT inviter_id, COUNT(*) - SUM(has_left) AS here, COUNT(*)
+            FROM invite_joins
+            WHERE guild_id = ? AND inviter_id IS NOT NULL
+            GROUP BY inviter_id
+            ORDER BY here DESC, COUNT(*) DESC
+            LIMIT ? OFFSET ?
+        """, (ctx.guild.id, per_page + 1, (page - 1) * per_page)) as cursor:
+            rows = await cursor.fetchall()
+
+        if not rows:
+            return await ctx.send("No tracked invites yet!" if page == 1 else "There aren't that many pages!")
+
+        embed = discord.Embed(title=f"📨 Invite Leaderboard - Page {page}", color=discord.Color.gold())
+        lines = []
+        for i, (inviter_id, here, total) in enumerate(rows[:per_page], start=(page - 1) * per_page + 1):
+            medal = {1: "🥇", 2: "🥈", 3: "🥉"}.get(i, f"#{i}")
+            lines.append(f"{medal} <@{inviter_id}> · **{here:,}** ({total:,} joined)")
+        embed.description = "\n".join(lines)
+        if len(rows) > per_page:
+            embed.set_footer(text=f"Use {ctx.prefix}invites top {page + 1} to see more")
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    # Create necessary tables
+    async with bot.db.cursor() as cursor:
+        # Auto-role table
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS autorole (
+                guild_id INTEGER,
+                role_id INTEGER,
+                PRIMARY KEY (guild_id, role_id)
+            )
+        """)
+
+        # Anti-raid table
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS antiraid_settings (
+                guild_id INTEGER PRIMARY KEY,
+                enabled INTEGER DEFAULT 0,
+                raise_verification INTEGER DEFAULT 0,
+                saved_verification INTEGER
+            )
+        """)
+
+        # Invite tracking table
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS invite_joins (
+                guild_id INTEGER,
+                user_id INTEGER,
+                inviter_id INTEGER,
+                code TEXT,
+                exact INTEGER DEFAULT 0,
+                joined TIMESTAMP,
+                has_left INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id)
+            )
+        """)
+        await cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_invite_joins_inviter
+            ON invite_joins (guild_id, inviter_id)
+        """)
+    await bot.db.commit()
+    
     await bot.add_cog(Welcome(bot)) 
\ No newline at end of file
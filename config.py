@@ -1,20 +1,184 @@
-# Bot Configuration
-TOKEN = 'YOUR_BOT_TOKEN_HERE'  # Replace with your bot token
-DEFAULT_PREFIX = '!'  # Default command prefix
-DATABASE_PATH = 'data/bot.db'  # SQLite database path
-
-# Bot Settings
-OWNER_IDS = []  # List of user IDs that have owner privileges
-SUPPORT_SERVER = ''  # Your support server invite link
-
-# Feature Settings
-MAX_WARNINGS = 3  # Maximum number of warnings before action
-XP_COOLDOWN = 60  # Cooldown between XP gains in seconds
-MIN_XP_GAIN = 15  # Minimum XP gained per message
-MAX_XP_GAIN = 25  # Maximum XP gained per message
-
-# Embed Colors
-SUCCESS_COLOR = 0x2ecc71  # Green
-ERROR_COLOR = 0xe74c3c    # Red
-INFO_COLOR = 0x3498db     # Blue
+# Bot Configuration
+TOKEN = 'YOUR_BOT_TOKEN_HERE'  # Replace with your bot token
+DEFAULT_PREFIX = '!'  # Default command prefix
+DATABASE_PATH = 'data/bot.db'  # SQLite database path
+DATABASE_TIMEOUT = 10.0  # Seconds to wait for the database lock (shared between clusters)
+
+# Bot Settings
+OWNER_IDS = []  # List of user IDs that have owner privileges
+SUPPORT_SERVER = ''  # Your support server invite link
+
+# Sharding Settings
+SHARD_COUNT = None  # Total shards, None lets Discord decide
+SHARD_IDS = None  # Shards this process runs, None runs all of them
+CLUSTER_COUNT = 1  # Worker processes started by launcher.py
+CLUSTER_START_DELAY = 5  # Seconds between starting clusters (identify rate limit)
+CLUSTER_RESTART_BACKOFF = 5  # Initial restart delay for a crashed cluster, doubles on each crash
+CLUSTER_RESTART_BACKOFF_MAX = 300  # Maximum restart delay in seconds
+SHARD_STATS_INTERVAL = 30  # Seconds between shard stats updates
+
+# Gateway and Cache Settings
+CACHE_PROFILE = 'full'  # 'full' or 'lean', see the README for what each one costs
+CACHE_PROFILES = {
+    'full': {
+        'intents': 'all',  # Every intent, including presence updates
+        'member_cache': 'all',  # Cache every member the intents allow
+        'max_messages': 100,  # Size of the message cache (None disables it); nothing relies on it
+        'chunk_guilds_at_startup': True  # Download every member list on connect
+    },
+    'lean': {
+        # No presences or typing events; members is still needed for joins
+        'intents': [
+            'guilds', 'members', 'moderation', 'emojis_and_stickers', 'integrations',
+            'webhooks', 'invites', 'voice_states', 'guild_messages', 'dm_messages',
+            'guild_reactions', 'dm_reactions', 'message_content'
+        ],
+        'member_cache': ['voice'],  # Only members in voice channels (voice XP)
+        'max_messages': None,
+        'chunk_guilds_at_startup': False
+    }
+}
+
+# HTTP Client Settings (external APIs)
+HTTP_TIMEOUT = 10  # Total seconds allowed per request attempt
+HTTP_CONNECT_TIMEOUT = 5  # Seconds allowed to open a connection
+HTTP_RETRIES = 2  # Extra attempts after timeouts, connection errors and 5xx/429 responses
+HTTP_RETRY_BACKOFF = 0.5  # Seconds before the first retry, doubled for each one after
+HTTP_RETRY_BACKOFF_MAX = 10  # Longest delay between retries
+HTTP_CONNECTION_LIMIT = 100  # Open connections across all hosts
+HTTP_CONNECTION_LIMIT_PER_HOST = 10  # Open connections to a single host
+HTTP_KEEPALIVE_TIMEOUT = 30  # Seconds to keep idle connections open
+HTTP_DNS_CACHE_TTL = 300  # Seconds to cache DNS lookups
+HTTP_CACHE_MAX_ENTRIES = 512  # Responses kept in the shared response cache
+HTTP_CACHE_DEFAULT_POLICY = {  # Seconds; used for hosts not listed below
+    'ttl': 60,  # Serve from cache without asking the API
+    'stale_while_revalidate': 300,  # Serve the old copy while refreshing it in the background
+    'stale_if_error': 3600  # Serve the old copy when the API is failing
+}
+HTTP_CACHE_POLICIES = {  # Random-content APIs: always fetch, only fall back when they're down
+    'meme-api.com': {'ttl': 0, 'stale_while_revalidate': 0, 'stale_if_error': 86400},
+    'v2.jokeapi.dev': {'ttl': 0, 'stale_while_revalidate': 0, 'stale_if_error': 86400},
+    'uselessfacts.jsph.pl': {'ttl': 0, 'stale_while_revalidate': 0, 'stale_if_error': 86400}
+}
+CIRCUIT_BREAKER_THRESHOLD = 5  # Consecutive failed requests before a host is cut off
+CIRCUIT_BREAKER_RESET = 60  # Seconds before trying a cut-off host again
+AVATAR_MAX_BYTES = 8 * 1024 * 1024  # Largest avatar downloaded for welcome images
+HTTP_USER_AGENT = 'ResonanceBot (+https://github.com/M1tsumi/resonance-discord-bot)'
+
+# Fun Settings
+FUN_API_URLS = {  # {count} is replaced with PREFETCH_BATCH_SIZE where the API supports batches
+    'meme': 'https://meme-api.com/gimme/{count}',
+    'joke': 'https://v2.jokeapi.dev/joke/Any?safe-mode&amount={count}',
+    'fact': 'https://uselessfacts.jsph.pl/random.json?language=en'
+}
+PREFETCH_BUFFER_SIZE = 10  # Ready items kept per content source
+PREFETCH_LOW_WATERMARK = 3  # Refill the buffer when it drops below this
+PREFETCH_BATCH_SIZE = 5  # Items requested per call from batch-capable APIs
+PREFETCH_DEDUPE_WINDOW = 100  # Recently served items that won't be shown again
+
+# Custom Command Settings
+MAX_CUSTOM_COMMANDS = 50  # Custom commands allowed per server
+CUSTOM_COMMAND_MAX_NAME = 32  # Longest custom command name
+CUSTOM_COMMAND_MAX_LENGTH = 1500  # Longest custom command response
+CUSTOM_COMMAND_COOLDOWN = 3  # Seconds between uses of custom commands per member
+CUSTOM_COMMAND_FLUSH_INTERVAL = 60  # Seconds between usage counter writes
+
+# AutoMod Settings
+AUTOMOD_DEFAULTS = {  # Used until a server changes them with the automod command
+    'filter_invites': True,  # Delete invites to other servers
+    'filter_links': False,  # Delete all links
+    'max_mentions': 6,  # Mentions per message (0 disables)
+    'max_emojis': 15,  # Emojis per message (0 disables)
+    'caps_ratio': 0.8,  # Share of capital letters (0 disables)
+    'caps_min_length': 12,  # Letters needed before the caps check applies
+    'spam_limit': 6,  # Messages per member...
+    'spam_per': 5,  # ...within this many seconds
+    'duplicate_limit': 10,  # Copies of one message across members or channels (0 disables)
+    'scan_images': True  # Check image attachments against the image blocklist
+}
+AUTOMOD_CHANNEL_LIMIT = 30  # Messages per channel...
+AUTOMOD_CHANNEL_PER = 5  # ...within this many seconds before a flood is logged
+AUTOMOD_SPAM_TIMEOUT = 300  # Seconds a spammer is timed out for
+AUTOMOD_BUDGET_MS = 2.0  # Processing time per message before it counts as over budget
+DUPLICATE_WINDOW = 60  # Seconds a message is remembered for copy-paste detection
+DUPLICATE_SIMILARITY = 0.4  # How alike two messages must be to count as copies (0-1)
+DUPLICATE_MAX_TRACKED = 5000  # Most messages remembered per server
+DOMAIN_BLOCKLIST_FILE = 'data/domain_blocklist.txt'  # Shared blocklist, one domain per line (optional)
+MAX_DOMAIN_RULES = 500  # Allow/deny domain rules per server
+IMAGE_SCAN_MAX_BYTES = 8 * 1024 * 1024  # Larger attachments aren't downloaded for scanning
+IMAGE_HASH_WORKERS = 2  # Processes hashing images
+IMAGE_HASH_CACHE_SIZE = 10000  # Attachments whose hashes are remembered
+IMAGE_MATCH_DISTANCE = 6  # Differing pHash bits allowed for a blocklist match (of 64)
+
+# Mod Log
+MOD_LOG_FLUSH_INTERVAL = 2  # Seconds between mod log deliveries
+MOD_LOG_MAX_QUEUE = 500  # Entries queued per server before the oldest are dropped
+MOD_LOG_WEBHOOK_NAME = 'Mod Log'  # Name of the webhook the bot creates in log channels
+MOD_LOG_WEBHOOK_RETRY = 300  # Seconds before trying again to set up a webhook that couldn't be made
+CASES_PER_PAGE = 10  # Cases per page of history, warnings and modsearch results
+
+# Adaptive Slowmode
+SLOWMODE_TARGET = 60  # Default messages per minute a channel is kept under
+SLOWMODE_MAX_DELAY = 30  # Default longest slowmode it will set, in seconds
+SLOWMODE_STEPS = (0, 2, 5, 10, 15, 30, 60, 120, 300)  # Delays it moves between, one step at a time
+SLOWMODE_CHECK_INTERVAL = 10  # Seconds between adjustments
+SLOWMODE_MIN_CHANGE_INTERVAL = 60  # Seconds a channel keeps a delay before it can change again
+SLOWMODE_MAX_EDITS = 5  # Channel edits per adjustment run across every server
+
+# Anti-Raid
+RAID_JOIN_LIMIT = 10  # Joins allowed...
+RAID_JOIN_PER = 10  # ...within this many seconds before raid mode starts
+RAID_NEW_ACCOUNT_AGE = 3 * 86400  # Accounts younger than this many seconds count as new
+RAID_NEW_ACCOUNT_LIMIT = 5  # New accounts allowed to join...
+RAID_NEW_ACCOUNT_PER = 60  # ...within this many seconds before raid mode starts
+RAID_MODE_DURATION = 300  # Seconds without a suspicious join before raid mode ends
+RAID_QUEUE_MAX = 1000  # Suspicious joins kept per server for a bulk action
+
+# Invite Tracking
+INVITE_REFETCH_DELAY = 2  # Seconds joins are collected before one invite refetch explains them all
+INVITE_FLUSH_INTERVAL = 30  # Seconds between writes of tracked joins and leaves
+INVITES_PER_PAGE = 10  # Inviters per page of the invite leaderboard
+
+# Message Archive
+ARCHIVE_RETENTION_DAYS = 14  # Days archived messages are kept for edit/delete logs
+ARCHIVE_FLUSH_INTERVAL = 5  # Seconds between batched archive writes
+ARCHIVE_PRUNE_INTERVAL = 3600  # Seconds between retention sweeps
+ARCHIVE_PRUNE_CHUNK = 1000  # Rows deleted per transaction while pruning
+ARCHIVE_COMPRESSION_LEVEL = 9  # zlib level for archived text
+ARCHIVE_DICT_SIZE = 16 * 1024  # Bytes of each server's trained compression dictionary (zlib uses up to 32 KB)
+ARCHIVE_DICT_SAMPLE_BYTES = 256 * 1024  # Text collected from a server before its dictionary is trained
+ARCHIVE_ATTACHMENT_MAX_BYTES = 2 * 1024 * 1024  # Larger attachments are logged by name only
+ARCHIVE_DOWNLOAD_CONCURRENCY = 4  # Attachment downloads in flight per flush
+
+# Mass Actions
+MASS_ACTION_MAX = 1000  # Most members one massban/masskick can target
+MASS_ACTION_WORKERS = 5  # Concurrent requests when members are actioned one by one
+MASS_ACTION_PROGRESS_INTERVAL = 3  # Seconds between progress message edits
+PURGE_MAX_SCAN = 10000  # Most messages one purge searches per channel
+PURGE_CONCURRENCY = 3  # Channels purged at the same time
+LOCKDOWN_CONCURRENCY = 10  # Channel permission edits in flight during lockdown/unlock
+
+# Feature Settings
+DEFAULT_WELCOME_MESSAGE = "Welcome {user} to **{server}**! You're member #{count}."
+MAX_WARNINGS = 3  # Maximum number of warnings before action
+WARNING_EXPIRY_DAYS = None  # Days until a warning stops counting, None keeps them forever
+WARNING_ESCALATION = {  # Active warnings -> (action, seconds muted); applied when a warn reaches the count
+    MAX_WARNINGS: ('mute', 3600),
+    MAX_WARNINGS + 2: ('kick', None),
+    MAX_WARNINGS + 4: ('ban', None),
+}
+XP_COOLDOWN = 60  # Cooldown between XP gains in seconds
+MIN_XP_GAIN = 15  # Minimum XP gained per message
+MAX_XP_GAIN = 25  # Maximum XP gained per message
+REACTION_XP = 5  # XP for adding a reaction
+REACTION_XP_COOLDOWN = 30  # Seconds between reactions that earn XP
+MAX_REMINDERS = 25  # Pending reminders per user
+MAX_TEMPBAN_DAYS = 365  # Longest tempban
+MAX_REMINDER_DAYS = 365  # Furthest ahead a reminder can be set
+SERVERINFO_COUNTS_TTL = 300  # Seconds serverinfo reuses Discord's online count when presences aren't cached
+
+# Embed Colors
+SUCCESS_COLOR = 0x2ecc71  # Green
+ERROR_COLOR = 0xe74c3c    # Red
+INFO_COLOR = 0x3498db     # Blue
 WARNING_COLOR = 0xf1c40f  # Yellow 
\ No newline at end of file
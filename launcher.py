@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+
+import aiohttp
+
+import config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('launcher.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('Launcher')
+
+# A cluster that stays up this long is considered healthy again
+STABLE_UPTIME = 600
+
+
+async def fetch_recommended_shards(token):
+    """Ask Discord how many shards the bot should run."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data["shards"]
+
+
+def split_shards(shard_count, cluster_count):
+    """Split shard IDs into contiguous ranges, one per cluster."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    per_cluster, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for i in range(cluster_count):
+        size = per_cluster + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def run_cluster(cluster_id, shard_ids, shard_count):
+    """Entry point for a cluster worker process."""
+    # Imported here so the launcher itself doesn't set up the bot's logging
+    import main
+
+    main.logger.info(f"Cluster {cluster_id} starting shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}")
+    try:
+        asyncio.run(main.main(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id))
+    except KeyboardInterrupt:
+        pass
+
+
+class Cluster:
+    """A worker process owning a range of shards."""
+
+    def __init__(self, cluster_id, shard_ids, shard_count, ctx):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.ctx = ctx
+        self.process = None
+        self.started_at = 0
+        self.backoff = config.CLUSTER_RESTART_BACKOFF
+        self.restart_at = None
+
+    def start(self):
+        self.process = self.ctx.Process(
+            target=run_cluster,
+            args=(self.cluster_id, self.shard_ids, self.shard_count),
+            name=f"cluster-{self.cluster_id}",
+            daemon=False
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        logger.info(f"Started cluster {self.cluster_id} (PID {self.process.pid}, shards {self.shard_ids})")
+
+    def stop(self, timeout=30):
+        if self.process and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+
+    def check(self):
+        """Restart the worker with exponential backoff if it has died."""
+        if self.process.is_alive():
+            if time.monotonic() - self.started_at > STABLE_UPTIME:
+                self.backoff = config.CLUSTER_RESTART_BACKOFF
+            return
+
+        now = time.monotonic()
+        if self.restart_at is None:
+            logger.warning(
+                f"Cluster {self.cluster_id} exited with code {self.process.exitcode}, "
+                f"restarting in {self.backoff}s"
+            )
+            self.restart_at = now + self.backoff
+            self.backoff = min(self.backoff * 2, config.CLUSTER_RESTART_BACKOFF_MAX)
+        elif now >= self.restart_at:
+            self.start()
+
+
+class Launcher:
+    """Spawns and supervises one process per shard range."""
+
+    def __init__(self, shard_count, cluster_count):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.clusters = [
+            Cluster(i, shard_ids, shard_count, self.ctx)
+            for i, shard_ids in enumerate(split_shards(shard_count, cluster_count))
+        ]
+
+    def run(self):
+        try:
+            for i, cluster in enumerate(self.clusters):
+                if i:
+                    # Stagger identifies so clusters don't trip the session start limit
+                    time.sleep(config.CLUSTER_START_DELAY)
+                cluster.start()
+
+            while True:
+                time.sleep(1)
+                for cluster in self.clusters:
+                    cluster.check()
+        except KeyboardInterrupt:
+            logger.info("Shutting down clusters...")
+        finally:
+            for cluster in self.clusters:
+                cluster.stop()
+
+
+def main():
+    shard_count = config.SHARD_COUNT or asyncio.run(fetch_recommended_shards(config.TOKEN))
+    logger.info(f"Launching {shard_count} shards across {config.CLUSTER_COUNT} clusters")
+    Launcher(shard_count, config.CLUSTER_COUNT).run()
+
+
+if __name__ == "__main__":
+    main()
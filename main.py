@@ -1,187 +1,392 @@
-import discord
-from discord.ext import commands
-import config
-import asyncio
-import aiosqlite
-import logging
-import os
-from datetime import datetime
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger('DiscordBot')
-
-class AdvancedBot(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.all()
-        super().__init__(
-            command_prefix=self.get_prefix,
-            intents=intents,
-            case_insensitive=True,
-            help_command=None  # We'll create a custom help command
-        )
-        self.db = None
-        self.config = config
-        self.start_time = datetime.utcnow()
-        
-    async def get_prefix(self, message):
-        # Default prefix
-        prefix = config.DEFAULT_PREFIX
-        
-        # If DM, return default prefix
-        if not message.guild:
-            return prefix
-            
-        # Get custom prefix from database if exists
-        async with self.db.execute(
-            "SELECT prefix FROM guild_settings WHERE guild_id = ?",
-            (message.guild.id,)
-        ) as cursor:
-            result = await cursor.fetchone()
-            if result:
-                prefix = result[0]
-                
-        return commands.when_mentioned_or(prefix)(self, message)
-
-    async def setup_hook(self):
-        # Create data directory if it doesn't exist
-        os.makedirs('data', exist_ok=True)
-        
-        # Initialize database connection
-        self.db = await aiosqlite.connect(config.DATABASE_PATH)
-        
-        # Create necessary tables
-        await self.init_db()
-        
-        # Load extensions
-        await self.load_extensions()
-        
-        logger.info("Bot is ready to start!")
-
-    async def init_db(self):
-        # Create tables for various features
-        async with self.db.cursor() as cursor:
-            # Guild settings
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS guild_settings (
-                    guild_id INTEGER PRIMARY KEY,
-                    prefix TEXT DEFAULT '!',
-                    welcome_channel_id INTEGER,
-                    log_channel_id INTEGER,
-                    welcome_message TEXT,
-                    leveling_enabled BOOLEAN DEFAULT 1,
-                    automod_enabled BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Leveling system
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS levels (
-                    user_id INTEGER,
-                    guild_id INTEGER,
-                    xp INTEGER DEFAULT 0,
-                    level INTEGER DEFAULT 0,
-                    last_xp_time TEXT,
-                    PRIMARY KEY (user_id, guild_id)
-                )
-            """)
-            
-            # Warnings
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS warnings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    guild_id INTEGER,
-                    moderator_id INTEGER,
-                    reason TEXT,
-                    timestamp TEXT
-                )
-            """)
-            
-            # Custom commands
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS custom_commands (
-                    guild_id INTEGER,
-                    command_name TEXT,
-                    response TEXT,
-                    creator_id INTEGER,
-                    created_at TEXT,
-                    PRIMARY KEY (guild_id, command_name)
-                )
-            """)
-            
-            # Role rewards
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS role_rewards (
-                    guild_id INTEGER,
-                    role_id INTEGER,
-                    level_requirement INTEGER,
-                    PRIMARY KEY (guild_id, role_id)
-                )
-            """)
-            
-        await self.db.commit()
-
-    async def load_extensions(self):
-        """Load all cogs from the cogs directory."""
-        for filename in os.listdir("cogs"):
-            if filename.endswith(".py"):
-                # Skip music cog for now
-                if filename == "music.py":
-                    continue
-                try:
-                    await self.load_extension(f"cogs.{filename[:-3]}")
-                    logger.info(f"Loaded extension: {filename[:-3]}")
-                except Exception as e:
-                    logger.error(f"Failed to load extension {filename[:-3]}: {e}")
-
-    async def on_ready(self):
-        logger.info(f'Logged in as {self.user.name} (ID: {self.user.id})')
-        logger.info(f'Connected to {len(self.guilds)} guilds')
-        
-        # Set custom status
-        await self.change_presence(
-            activity=discord.Activity(
-                type=discord.ActivityType.watching,
-                name=f"{config.DEFAULT_PREFIX}help | {len(self.guilds)} servers"
-            )
-        )
-
-    async def on_guild_join(self, guild):
-        """Initialize guild settings when bot joins a new server."""
-        async with self.db.cursor() as cursor:
-            await cursor.execute(
-                "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
-                (guild.id,)
-            )
-        await self.db.commit()
-        logger.info(f"Joined new guild: {guild.name} (ID: {guild.id})")
-
-    async def close(self):
-        """Cleanup before bot shutdown."""
-        if self.db:
-            await self.db.close()
-        await super().close()
-
-async def main():
-    """Main function to start the bot."""
-    async with AdvancedBot() as bot:
-        try:
-            await bot.start(config.TOKEN)
-        except Exception as e:
-            logger.error(f"Error starting bot: {e}")
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        logger.info("Bot shutdown by user")
-    except Exception as e:
+import discord
+from discord.ext import commands, tasks
+import config
+from utils.http import HTTPClient
+from utils.modlog import ModLog
+from utils.scheduler import Scheduler
+import asyncio
+import aiosqlite
+import logging
+import math
+import os
+import time
+from datetime import datetime
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('bot.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('DiscordBot')
+
+# Extensions that must finish loading before another one starts,
+# e.g. {'automod': {'moderation'}}. Everything else loads in parallel.
+EXTENSION_DEPENDENCIES = {}
+
+def build_cache_options(profile_name):
+    """Turn a cache profile from config.py into client keyword arguments."""
+    profile = config.CACHE_PROFILES[profile_name]
+
+    if profile['intents'] == 'all':
+        intents = discord.Intents.all()
+    else:
+        intents = discord.Intents.none()
+        for name in profile['intents']:
+            setattr(intents, name, True)
+
+    if profile['member_cache'] == 'all':
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    else:
+        member_cache_flags = discord.MemberCacheFlags.none()
+        for name in profile['member_cache']:
+            setattr(member_cache_flags, name, True)
+
+    return {
+        'intents': intents,
+        'member_cache_flags': member_cache_flags,
+        'max_messages': profile['max_messages'],
+        'chunk_guilds_at_startup': profile['chunk_guilds_at_startup']
+    }
+
+class AdvancedBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None, cluster_id=None):
+        super().__init__(
+            command_prefix=self.get_prefix,
+            **build_cache_options(config.CACHE_PROFILE),
+            case_insensitive=True,
+            help_command=None,  # We'll create a custom help command
+            shard_ids=shard_ids if shard_ids is not None else config.SHARD_IDS,
+            shard_count=shard_count or config.SHARD_COUNT
+        )
+        self.db = None
+        self.prefix_cache = {}
+        self.http_client = HTTPClient()
+        self.scheduler = Scheduler(self)
+        self.mod_log = ModLog(self)
+        self.config = config
+        self.cluster_id = cluster_id
+        self.cache_profile = config.CACHE_PROFILE
+        self.start_time = datetime.utcnow()
+        
+    async def get_prefix(self, message):
+        # Default prefix
+        prefix = config.DEFAULT_PREFIX
+        
+        # If DM, return default prefix
+        if not message.guild:
+            return prefix
+            
+        # Get custom prefix, from the cache or the database
+        guild_id = message.guild.id
+        if guild_id in self.prefix_cache:
+            prefix = self.prefix_cache[guild_id]
+        else:
+            async with self.db.execute(
+                "SELECT prefix FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                result = await cursor.fetchone()
+                if result:
+                    prefix = result[0]
+            self.prefix_cache[guild_id] = prefix
+                
+        return commands.when_mentioned_or(prefix)(self, message)
+
+    def invalidate_prefix(self, guild_id):
+        """Forget a cached prefix after it changes in the database."""
+        self.prefix_cache.pop(guild_id, None)
+
+    async def setup_hook(self):
+        # Create data directory if it doesn't exist
+        os.makedirs('data', exist_ok=True)
+        
+        # Initialize database connection. WAL mode plus a busy timeout lets
+        # every cluster process share the same database file safely.
+        self.db = await aiosqlite.connect(config.DATABASE_PATH, timeout=config.DATABASE_TIMEOUT)
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.execute(f"PRAGMA busy_timeout={int(config.DATABASE_TIMEOUT * 1000)}")
+        
+        # Create necessary tables
+        await self.init_db()
+
+        # Shared session for external APIs, borrowed by the cogs
+        await self.http_client.start()
+
+        # Pending timers are loaded before the cogs that listen for them
+        await self.scheduler.start()
+
+        # Batched mod log delivery, used through bot.mod_log.send()
+        self.mod_log.start()
+        
+        # Load extensions
+        await self.load_extensions()
+
+        # Publish shard stats so other clusters can aggregate them
+        self.shard_stats_task.start()
+        
+        logger.info("Bot is ready to start!")
+
+    async def init_db(self):
+        # Create tables for various features
+        async with self.db.cursor() as cursor:
+            # Guild settings
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS guild_settings (
+                    guild_id INTEGER PRIMARY KEY,
+                    prefix TEXT DEFAULT '!',
+                    welcome_channel_id INTEGER,
+                    log_channel_id INTEGER,
+                    welcome_message TEXT,
+                    leveling_enabled BOOLEAN DEFAULT 1,
+                    automod_enabled BOOLEAN DEFAULT 1
+                )
+            """)
+            
+            # Leveling system
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS levels (
+                    user_id INTEGER,
+                    guild_id INTEGER,
+                    xp INTEGER DEFAULT 0,
+                    level INTEGER DEFAULT 0,
+                    last_xp_time TEXT,
+                    PRIMARY KEY (user_id, guild_id)
+                )
+            """)
+            
+            # Custom commands
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS custom_commands (
+                    guild_id INTEGER,
+                    command_name TEXT,
+                    response TEXT,
+                    creator_id INTEGER,
+                    created_at TEXT,
+                    PRIMARY KEY (guild_id, command_name)
+                )
+            """)
+            
+            # Role rewards
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS role_rewards (
+                    guild_id INTEGER,
+                    role_id INTEGER,
+                    level_requirement INTEGER,
+                    PRIMARY KEY (guild_id, role_id)
+                )
+            """)
+
+            # Per-shard stats, written by every cluster process
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS shard_stats (
+                    shard_id INTEGER PRIMARY KEY,
+                    cluster_id INTEGER,
+                    latency REAL,
+                    guild_count INTEGER,
+                    member_count INTEGER,
+                    updated_at REAL
+                )
+            """)
+
+            # Durable timers (tempbans, tempmutes, reminders)
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS timers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event TEXT,
+                    due REAL,
+                    guild_id INTEGER,
+                    data TEXT,
+                    created REAL
+                )
+            """)
+            
+        await self.db.commit()
+
+    async def load_extensions(self):
+        """Load all cogs from the cogs directory.
+
+        Extensions load concurrently in waves; an extension starts as soon as
+        everything it lists in EXTENSION_DEPENDENCIES has loaded.
+        """
+        pending = {
+            filename[:-3] for filename in os.listdir("cogs")
+            # Skip music cog for now
+            if filename.endswith(".py") and filename != "music.py"
+        }
+        loaded, failed = set(), set()
+        start = time.perf_counter()
+
+        while pending:
+            # Anything depending on a failed extension can't load either
+            for name in sorted(pending):
+                missing = EXTENSION_DEPENDENCIES.get(name, set()) & failed
+                if missing:
+                    logger.error(f"Skipping extension {name}: dependency {', '.join(sorted(missing))} failed to load")
+                    pending.discard(name)
+                    failed.add(name)
+
+            ready = sorted(n for n in pending if EXTENSION_DEPENDENCIES.get(n, set()) <= loaded)
+            if not ready:
+                if pending:
+                    logger.error(f"Unresolvable extension dependencies: {', '.join(sorted(pending))}")
+                    failed |= pending
+                break
+
+            results = await asyncio.gather(*(self._load_extension_timed(name) for name in ready))
+            for name, ok in zip(ready, results):
+                pending.discard(name)
+                (loaded if ok else failed).add(name)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Loaded {len(loaded)} extensions in {elapsed:.1f}ms ({len(failed)} failed)")
+
+    async def load_extension(self, name, *, package=None):
+        await super().load_extension(name, package=package)
+        self.dispatch('extension_change', name)
+
+    async def unload_extension(self, name, *, package=None):
+        await super().unload_extension(name, package=package)
+        self.dispatch('extension_change', name)
+
+    async def reload_extension(self, name, *, package=None):
+        await super().reload_extension(name, package=package)
+        self.dispatch('extension_change', name)
+
+    async def on_command_error(self, ctx, error):
+        # Unknown commands aren't errors worth a traceback; let cogs react instead
+        if isinstance(error, commands.CommandNotFound):
+            self.dispatch('unknown_command', ctx)
+            return
+        await super().on_command_error(ctx, error)
+
+    async def _load_extension_timed(self, name):
+        """Load one extension and log how long it took."""
+        start = time.perf_counter()
+        try:
+            await self.load_extension(f"cogs.{name}")
+        except Exception as e:
+            logger.error(f"Failed to load extension {name}: {e}")
+            return False
+        logger.info(f"Loaded extension: {name} ({(time.perf_counter() - start) * 1000:.1f}ms)")
+        return True
+
+    @tasks.loop(seconds=config.SHARD_STATS_INTERVAL)
+    async def shard_stats_task(self):
+        """Write latency and guild counts for the shards this process owns."""
+        rows = []
+        now = time.time()
+        for shard_id, latency in self.latencies:
+            guilds = [g for g in self.guilds if g.shard_id == shard_id]
+            rows.append((
+                shard_id,
+                self.cluster_id,
+                latency if math.isfinite(latency) else None,  # inf before first heartbeat
+                len(guilds),
+                sum(g.member_count or 0 for g in guilds),
+                now
+            ))
+
+        await self.db.executemany("""
+            INSERT OR REPLACE INTO shard_stats
+                (shard_id, cluster_id, latency, guild_count, member_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        await self.db.commit()
+
+    @shard_stats_task.before_loop
+    async def before_shard_stats(self):
+        await self.wait_until_ready()
+
+    async def get_cluster_stats(self):
+        """Get stats for every shard in the cluster.
+
+        Shards owned by this process use live values, others come from the
+        shard_stats table. Rows that haven't been refreshed recently are
+        marked offline.
+        """
+        stale_after = config.SHARD_STATS_INTERVAL * 3
+        now = time.time()
+        stats = {}
+
+        async with self.db.execute("""
+            SELECT shard_id, cluster_id, latency, guild_count, member_count, updated_at
+            FROM shard_stats
+        """) as cursor:
+            for shard_id, cluster_id, latency, guilds, members, updated_at in await cursor.fetchall():
+                stats[shard_id] = {
+                    'cluster_id': cluster_id,
+                    'latency': latency,
+                    'guilds': guilds,
+                    'members': members,
+                    'online': now - updated_at < stale_after
+                }
+
+        for shard_id, latency in self.latencies:
+            guilds = [g for g in self.guilds if g.shard_id == shard_id]
+            stats[shard_id] = {
+                'cluster_id': self.cluster_id,
+                'latency': latency if math.isfinite(latency) else None,
+                'guilds': len(guilds),
+                'members': sum(g.member_count or 0 for g in guilds),
+                'online': not self.is_closed()
+            }
+
+        return dict(sorted(stats.items()))
+
+    async def on_ready(self):
+        logger.info(f'Logged in as {self.user.name} (ID: {self.user.id})')
+        logger.info(f'Connected to {len(self.guilds)} guilds on shards {sorted(self.shards)}')
+        
+        # Set custom status
+        await self.change_presence(
+            activity=discord.Activity(
+                type=discord.ActivityType.watching,
+                name=f"{config.DEFAULT_PREFIX}help | {len(self.guilds)} servers"
+            )
+        )
+
+    async def on_guild_join(self, guild):
+        """Initialize guild settings when bot joins a new server."""
+        async with self.db.cursor() as cursor:
+            await cursor.execute(
+                "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
+                (guild.id,)
+            )
+        await self.db.commit()
+        logger.info(f"Joined new guild: {guild.name} (ID: {guild.id})")
+
+    async def close(self):
+        """Cleanup before bot shutdown."""
+        self.shard_stats_task.cancel()
+        self.scheduler.stop()
+        # Deliver queued log entries while the connection is still up
+        await self.mod_log.close()
+        # Unload cogs first so they can still use the database and HTTP client
+        await super().close()
+        await self.http_client.close()
+        if self.db:
+            await self.db.close()
+
+async def main(shard_ids=None, shard_count=None, cluster_id=None):
+    """Main function to start the bot.
+
+    The launcher passes a shard range and cluster ID when running several
+    processes; a plain ``python main.py`` uses the settings in config.py.
+    """
+    async with AdvancedBot(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id) as bot:
+        try:
+            await bot.start(config.TOKEN)
+        except Exception as e:
+            logger.error(f"Error starting bot: {e}")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Bot shutdown by user")
+    except Exception as e:
         logger.error(f"Unexpected error: {e}") 
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Copy-paste flood detection: DuplicateTracker and who the flood action times out."""
+from datetime import timedelta
+from types import SimpleNamespace
+
+import discord
+
+import config
+from cogs.moderation import Moderation
+from utils.duplicates import DuplicateTracker
+
+LIMIT = config.AUTOMOD_DEFAULTS['duplicate_limit']
+
+
+def tracker():
+    return DuplicateTracker(config.DUPLICATE_WINDOW, config.DUPLICATE_SIMILARITY, config.DUPLICATE_MAX_TRACKED)
+
+
+def test_chat_train_below_the_limit_is_left_alone():
+    duplicates = tracker()
+    texts = ["happy birthday!", "Happy Birthday!!", "happy birthday 🎉", "HAPPY BIRTHDAY", "happy birthday!!!"]
+    clusters = [
+        duplicates.add(text, 1, message_id, author_id=message_id, now=message_id)
+        for message_id, text in enumerate(texts)
+    ]
+    # Every wish lands in one cluster, but five members isn't a flood
+    assert len({id(cluster) for cluster in clusters}) == 1
+    assert not clusters[-1].is_flood(LIMIT)
+
+
+def test_multi_author_flood_at_the_limit_is_caught():
+    duplicates = tracker()
+    for message_id in range(LIMIT):
+        cluster = duplicates.add("join my server for free nitro", 1, message_id, author_id=message_id % 3)
+    assert cluster.is_flood(LIMIT)
+
+
+def test_one_member_in_one_channel_is_left_to_the_spam_check():
+    duplicates = tracker()
+    for message_id in range(LIMIT * 2):
+        cluster = duplicates.add("join my server for free nitro", 1, message_id, author_id=1)
+    assert not cluster.is_flood(LIMIT)
+
+
+def test_short_messages_are_not_fingerprinted():
+    assert tracker().add("gg", 1, 1, 1) is None
+
+
+def test_only_repeat_or_new_senders_are_timed_out():
+    duplicates = tracker()
+    for message_id, author_id in enumerate([1, 2, 2, 3] + [4] * (LIMIT - 4)):
+        cluster = duplicates.add("happy birthday!", 1, message_id, author_id)
+    now = discord.utils.utcnow()
+    old = now - timedelta(days=365)
+    new = now - timedelta(seconds=config.RAID_NEW_ACCOUNT_AGE // 2)
+
+    def member(member_id, created_at):
+        return SimpleNamespace(id=member_id, created_at=created_at)
+
+    assert not Moderation.is_flood_sender(cluster, member(1, old), now)
+    assert Moderation.is_flood_sender(cluster, member(2, old), now)
+    assert Moderation.is_flood_sender(cluster, member(3, new), now)
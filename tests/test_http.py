@@ -0,0 +1,88 @@
+"""HTTPClient failure handling against a local aiohttp stub."""
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import config
+from utils.http import HTTPClient, HTTPError
+
+
+@pytest.fixture(autouse=True)
+def fast_http(monkeypatch):
+    monkeypatch.setattr(config, 'HTTP_RETRIES', 1)
+    monkeypatch.setattr(config, 'HTTP_RETRY_BACKOFF', 0)
+    monkeypatch.setitem(
+        config.HTTP_CACHE_POLICIES, '127.0.0.1', {'ttl': 0, 'stale_while_revalidate': 0, 'stale_if_error': 3600}
+    )
+
+
+def run(handler, scenario):
+    """Serve ``handler`` at /data and run ``scenario(client, url)`` against it."""
+    async def main():
+        app = web.Application()
+        app.router.add_get('/data', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        client = HTTPClient()
+        await client.start()
+        try:
+            await scenario(client, f'http://127.0.0.1:{port}/data')
+        finally:
+            await client.close()
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_oversized_trial_does_not_wedge_breaker():
+    async def handler(request):
+        return web.Response(body=b'x' * 1000)
+
+    async def scenario(client, url):
+        breaker = client.breakers['127.0.0.1']
+        breaker.opened_at = time.monotonic() - breaker.reset_timeout  # Half-open
+        with pytest.raises(HTTPError):
+            await client.request('GET', url, max_size=10)
+        assert not breaker.trial_in_flight
+        # The next request is let through as a new trial and closes the breaker
+        assert (await client.request('GET', url)).status == 200
+        assert breaker.state == breaker.CLOSED
+
+    run(handler, scenario)
+
+
+def test_persistent_429_serves_stale_copy():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            return web.json_response({'n': 1})
+        return web.Response(status=429, headers={'Retry-After': '0'})
+
+    async def scenario(client, url):
+        assert (await client.get_json(url, cache=True)) == {'n': 1}
+        assert (await client.get_json(url, cache=True)) == {'n': 1}
+        assert len(calls) == 3  # One success, then a 429 and its retry
+
+    run(handler, scenario)
+
+
+def test_not_modified_after_eviction_uses_old_entry():
+    async def handler(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({'v': 1}, headers={'ETag': '"v1"'})
+
+    async def scenario(client, url):
+        await client.get(url, cache=True)
+        entry = client.cache.get(url)
+        client.cache.entries.clear()  # Evicted while the revalidation was in flight
+        response = await client._fetch_and_store(url, entry, {})
+        assert response.json() == {'v': 1}
+
+    run(handler, scenario)
@@ -0,0 +1,34 @@
+"""GlobPattern, the wildcard search used for user-supplied purge and mass action patterns."""
+import time
+
+import pytest
+
+from utils.matching import GlobPattern
+
+
+@pytest.mark.parametrize('pattern, text, expected', [
+    ('spam', 'this is SPAM here', True),
+    ('free*nitro', 'get FREE discord nitro now', True),
+    ('free*nitro', 'nitro for free', False),
+    ('b?t', 'a bot account', True),
+    ('b?t', 'bt', False),
+    ('a*b*c', 'xxaxxbxxcxx', True),
+    ('a*b*c', 'cba', False),
+    ('1+1', '1+1=2', True),  # Regex syntax is literal
+])
+def test_matches(pattern, text, expected):
+    assert GlobPattern(pattern).matches(text) is expected
+
+
+@pytest.mark.parametrize('pattern', ['', '*', '*?*', 'x' * 201])
+def test_rejects_useless_or_long_patterns(pattern):
+    with pytest.raises(ValueError):
+        GlobPattern(pattern)
+
+
+def test_adversarial_pattern_stays_fast():
+    pattern = GlobPattern('*'.join('a' * 100) + 'b')
+    started = time.perf_counter()
+    assert not GlobPattern('(a+)+$').matches('a' * 4000)
+    assert not pattern.matches('a' * 4000)
+    assert time.perf_counter() - started < 1
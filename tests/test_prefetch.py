@@ -0,0 +1,152 @@
+"""Prefetcher and HTTPClient against a local aiohttp stub of a batch API."""
+import asyncio
+import itertools
+
+import pytest
+from aiohttp import web
+
+import config
+from utils.http import HTTPClient, HTTPError
+from utils.prefetch import Prefetcher
+
+
+class StubAPI:
+    """Serves batches of ``{"id": n}`` items; ``repeat`` makes every batch the same."""
+
+    def __init__(self, batch=5, repeat=False):
+        self.batch = batch
+        self.repeat = repeat
+        self.hits = 0
+        self.fail = False
+        self.ids = itertools.count()
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request):
+        self.hits += 1
+        if self.fail:
+            return web.json_response({'error': True}, status=500)
+        if self.repeat:
+            items = [{'id': n} for n in range(self.batch)]
+        else:
+            items = [{'id': next(self.ids)} for _ in range(self.batch)]
+        return web.json_response({'items': items})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/items', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/items'
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+@pytest.fixture(autouse=True)
+def fast_http(monkeypatch):
+    # Random-content policy like the real fun APIs, and no waiting between retries
+    monkeypatch.setitem(
+        config.HTTP_CACHE_POLICIES, '127.0.0.1', {'ttl': 0, 'stale_while_revalidate': 0, 'stale_if_error': 0}
+    )
+    monkeypatch.setattr(config, 'HTTP_RETRIES', 0)
+    monkeypatch.setattr(config, 'HTTP_RETRY_BACKOFF', 0)
+
+
+def run(scenario, **stub_options):
+    async def main():
+        client = HTTPClient()
+        await client.start()
+        try:
+            async with StubAPI(**stub_options) as stub:
+                async def fetch():
+                    return (await client.get_json(stub.url, cache=True))['items']
+                await scenario(stub, fetch)
+        finally:
+            await client.close()
+    asyncio.run(main())
+
+
+async def wait_for(condition, timeout=5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def make_prefetcher(fetch, **options):
+    options = {'size': 10, 'low_watermark': 3, 'dedupe_window': 100, **options}
+    return Prefetcher('test', fetch, key=lambda item: item['id'], retry_delay=0.01, **options)
+
+
+def test_refills_only_below_low_watermark():
+    async def scenario(stub, fetch):
+        prefetcher = make_prefetcher(fetch)
+        prefetcher.start()
+        try:
+            await wait_for(lambda: len(prefetcher.buffer) == 10)
+            assert stub.hits == 2  # Two batches of 5 fill it
+
+            # Draining down to the watermark doesn't trigger a refill...
+            for _ in range(7):
+                await prefetcher.get()
+            await asyncio.sleep(0.1)
+            assert stub.hits == 2 and len(prefetcher.buffer) == 3
+
+            # ...dropping below it does
+            await prefetcher.get()
+            await wait_for(lambda: len(prefetcher.buffer) == 10)
+            assert stub.hits == 4
+            assert prefetcher.misses == 0
+        finally:
+            await prefetcher.stop()
+
+    run(scenario)
+
+
+def test_dedupes_buffered_and_recently_served_items():
+    async def scenario(stub, fetch):
+        prefetcher = make_prefetcher(fetch, size=10)
+        prefetcher.start()
+        try:
+            # The source only ever has 5 items: the buffer holds each once,
+            # and the refill gives up after rounds that add nothing
+            await wait_for(lambda: stub.hits >= 4)
+            await asyncio.sleep(0.1)
+            assert [item['id'] for item in prefetcher.buffer] == [0, 1, 2, 3, 4]
+            assert stub.hits == 4
+
+            served = [(await prefetcher.get())['id'] for _ in range(5)]
+            assert served == [0, 1, 2, 3, 4]
+            await asyncio.sleep(0.1)
+            # Everything the source has was served recently, so nothing is buffered again
+            assert not prefetcher.buffer
+        finally:
+            await prefetcher.stop()
+
+    run(scenario, repeat=True)
+
+
+def test_fetches_directly_when_buffer_is_empty():
+    async def scenario(stub, fetch):
+        # Not started, so the buffer is empty and nothing refills it
+        prefetcher = make_prefetcher(fetch)
+        item = await prefetcher.get()
+        assert item == {'id': 0}
+        assert stub.hits == 1 and prefetcher.misses == 1
+        # The rest of the batch is kept for the next calls
+        assert [item['id'] for item in prefetcher.buffer] == [1, 2, 3, 4]
+
+        prefetcher.buffer.clear()
+        prefetcher.buffered_keys.clear()
+        stub.fail = True
+        assert await prefetcher.get() is None
+        assert stub.hits == 2 and prefetcher.misses == 2
+        with pytest.raises(HTTPError):
+            await fetch()
+
+    run(scenario)
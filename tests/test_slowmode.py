@@ -0,0 +1,91 @@
+"""RateEstimator and SlowmodeController, driven with explicit timestamps."""
+import pytest
+
+from utils.slowmode import BUCKET_SECONDS, RateEstimator, SlowmodeController
+
+STEPS = (0, 2, 5, 10, 15, 30, 60, 120, 300)
+
+
+def feed(estimator, per_minute, start, seconds):
+    """Add messages evenly at ``per_minute`` from ``start`` for ``seconds``; returns the end time."""
+    gap = 60 / per_minute
+    now = start
+    while now < start + seconds:
+        estimator.add(now)
+        now += gap
+    return start + seconds
+
+
+def test_estimator_converges_on_a_steady_rate():
+    estimator = RateEstimator()
+    end = feed(estimator, 120, 0, 120)
+    # Still inside the last bucket, so the buffer holds a full minute
+    assert estimator.last_minute(end - 1) == 120
+    assert estimator.per_minute(end) == pytest.approx(120, rel=0.05)
+
+
+def test_estimator_barely_moves_for_a_single_burst():
+    estimator = RateEstimator()
+    for _ in range(30):
+        estimator.add(0)
+    # The whole burst lands in one bucket, and only part of that reaches the average
+    assert estimator.per_minute(BUCKET_SECONDS) < 30 * 60 / BUCKET_SECONDS
+
+
+def test_estimator_decays_over_a_long_silence():
+    estimator = RateEstimator()
+    end = feed(estimator, 120, 0, 60)
+    assert estimator.per_minute(end + 3600) < 0.01
+    assert estimator.last_minute(end + 3600) == 0
+
+
+def test_controller_steps_up_one_step_at_a_time():
+    controller = SlowmodeController(0, now=0)
+    end = feed(controller.estimator, 300, 0, 60)
+    assert controller.decide(60, STEPS, 30, 60, end) == 2
+    controller.applied(2, end)
+    # Held for min_interval before the next step
+    assert controller.decide(60, STEPS, 30, 60, end + 10) is None
+
+
+def test_controller_respects_max_delay():
+    controller = SlowmodeController(30, now=0)
+    end = feed(controller.estimator, 300, 0, 120)
+    assert controller.decide(60, STEPS, 30, 60, end) is None
+
+
+def test_controller_never_lowers_below_a_manual_slowmode():
+    controller = SlowmodeController(60, now=0)
+    now = 0
+    for _ in range(10):
+        now += 60
+        assert controller.decide(60, STEPS, 30, 60, now) is None
+    assert controller.idle(now)
+
+
+def test_controller_returns_to_baseline_after_a_rush():
+    controller = SlowmodeController(5, now=0)
+    end = feed(controller.estimator, 300, 0, 60)
+    assert controller.decide(60, STEPS, 30, 60, end) == 10
+    controller.applied(10, end)
+    now = end
+    delays = []
+    for _ in range(5):
+        now += 60
+        delay = controller.decide(60, STEPS, 30, 60, now)
+        if delay is not None:
+            controller.applied(delay, now)
+            delays.append(delay)
+    assert delays == [5]
+    assert controller.idle(now)
+
+
+def test_controller_adopts_a_manual_change_as_baseline():
+    controller = SlowmodeController(0, now=0)
+    controller.applied(10, 0)
+    controller.observe(30, 10)
+    assert controller.baseline == 30
+    # Left alone for min_interval, then never lowered below the moderator's choice
+    assert controller.decide(60, STEPS, 30, 60, 20) is None
+    assert controller.decide(60, STEPS, 300, 60, 600) is None
+    assert controller.idle(600)
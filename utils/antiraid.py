@@ -0,0 +1,57 @@
+from collections import deque
+
+from utils.ratelimit import RateWindow
+
+
+class RaidDetector:
+    """Join tracking for one guild: overall join rate, new-account join rate
+    and the raid mode state they drive.
+
+    Both rates are RateWindows, so each join costs O(1) and memory is fixed
+    by the thresholds. The last burst of joiners is kept so that when raid
+    mode starts, the members who triggered it are queued along with
+    everyone who joins while it lasts.
+    """
+
+    __slots__ = ('joins', 'new_accounts', 'recent', 'queue', 'until', 'started', 'triggers')
+
+    def __init__(self, join_limit, join_per, new_limit, new_per, queue_size):
+        self.joins = RateWindow(join_limit, join_per)
+        self.new_accounts = RateWindow(new_limit, new_per)
+        self.recent = deque(maxlen=join_limit)  # IDs of the latest joiners
+        self.queue = deque(maxlen=queue_size)  # Suspicious joins waiting for a bulk action
+        self.until = 0.0  # Raid mode lasts until this monotonic time
+        self.started = None
+        self.triggers = 0  # Suspicious joins during the current raid
+
+    def active(self, now):
+        return now < self.until
+
+    def record(self, member_id, new_account, now):
+        """Record a join; True if it crossed the join-rate or new-account threshold."""
+        flood = self.joins.hit(now)
+        young = new_account and self.new_accounts.hit(now)
+        self.recent.append(member_id)
+        if self.active(now):
+            self.queue.append(member_id)
+        return flood or young
+
+    def start(self, now, duration):
+        """Enter raid mode, queueing the burst that led up to it."""
+        if not self.active(now):
+            self.started = now
+            self.triggers = 0
+            self.queue.extend(member_id for member_id in self.recent if member_id not in self.queue)
+        self.until = now + duration
+
+    def extend(self, now, duration):
+        self.triggers += 1
+        self.until = now + duration
+
+    def end(self):
+        self.until = 0.0
+        self.started = None
+
+    def idle(self, now):
+        """Nothing going on and nothing queued, so it can be dropped."""
+        return not self.active(now) and not self.queue and self.joins.idle(now) and self.new_accounts.idle(now)
@@ -0,0 +1,374 @@
+import asyncio
+import hashlib
+import logging
+import re
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+import discord
+from discord.ext import tasks
+
+import config
+from utils.http import HTTPError
+
+logger = logging.getLogger('DiscordBot')
+
+# How a message's content is stored
+RAW, DEFLATE, DEFLATE_DICT = 0, 1, 2
+WORDS = re.compile(r'\S+\s*')
+
+
+def train_dictionary(samples, size):
+    """Build a zlib preset dictionary from sample messages.
+
+    Words and word pairs are scored by how many bytes they'd save (length
+    times repeats) and the best are packed in, best last: deflate reaches
+    the end of the dictionary with the shortest distances.
+    """
+    counts = Counter()
+    for sample in samples:
+        words = WORDS.findall(sample)
+        counts.update(words)
+        counts.update(a + b for a, b in zip(words, words[1:]))
+
+    ranked = sorted(
+        (token for token, count in counts.items() if count > 1 and len(token) > 2),
+        key=lambda token: counts[token] * len(token),
+        reverse=True
+    )
+    picked, total = [], 0
+    for token in ranked:
+        data = token.encode()
+        if total + len(data) > size:
+            continue
+        picked.append(data)
+        total += len(data)
+    return b''.join(reversed(picked))
+
+
+def compress(text, dictionary=None, level=9):
+    """Return ``(codec, blob)`` for whichever encoding of ``text`` is smallest."""
+    raw = text.encode()
+    best = (RAW, raw)
+    # Raw deflate (negative wbits): no header or checksum, which matters for short messages
+    plain = zlib.compressobj(level, zlib.DEFLATED, -15)
+    candidates = [(DEFLATE, plain.compress(raw) + plain.flush())]
+    if dictionary:
+        primed = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+        candidates.append((DEFLATE_DICT, primed.compress(raw) + primed.flush()))
+    for codec, blob in candidates:
+        if len(blob) < len(best[1]):
+            best = (codec, blob)
+    return best
+
+
+def decompress(codec, blob, dictionary=None):
+    if codec == RAW:
+        return blob.decode()
+    if codec == DEFLATE_DICT:
+        decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj(-15)
+    return (decompressor.decompress(blob) + decompressor.flush()).decode()
+
+
+class ArchivedMessage:
+    __slots__ = ('id', 'guild_id', 'channel_id', 'author_id', 'content', 'attachments', 'edited')
+
+    def __init__(self, id, guild_id, channel_id, author_id, content, attachments, edited=False):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.content = content
+        # [(filename, size, url, content_type)] when new, [(filename, size, sha256)] once stored,
+        # None when an edit leaves the stored attachments alone
+        self.attachments = attachments
+        self.edited = edited
+
+
+class MessageArchive:
+    """Compressed copies of the messages in opted-in channels.
+
+    Messages are buffered in memory and written in batches. Content is
+    deflated, with a preset dictionary trained on each guild's own
+    messages once enough have been seen; whichever encoding is smallest
+    is kept. Attachments are stored once per distinct file, keyed by
+    SHA-256. Old messages are pruned by snowflake in small chunks so the
+    database is never locked for long.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.channels = set()  # Opted-in channel IDs
+        self.pending = {}  # message_id -> ArchivedMessage waiting to be written
+        self.flushing = {}  # The batch being written, still readable
+        self.dictionaries = {}  # dict_id -> bytes
+        self.guild_dictionaries = {}  # guild_id -> dict_id used for new messages
+        self.samples = {}  # guild_id -> [content] collected to train a dictionary
+        self.sample_sizes = Counter()
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        async with self.bot.db.execute("SELECT channel_id FROM archive_channels") as cursor:
+            self.channels = {channel_id for channel_id, in await cursor.fetchall()}
+        async with self.bot.db.execute("""
+            SELECT guild_id, dict_id, data FROM archive_dicts
+            WHERE dict_id IN (SELECT MAX(dict_id) FROM archive_dicts GROUP BY guild_id)
+        """) as cursor:
+            for guild_id, dict_id, data in await cursor.fetchall():
+                self.guild_dictionaries[guild_id] = dict_id
+                self.dictionaries[dict_id] = data
+        self.flush_task.start()
+        self.prune_task.start()
+
+    async def close(self):
+        self.flush_task.cancel()
+        self.prune_task.cancel()
+        await self.flush()
+
+    def covers(self, channel_id):
+        """Whether a channel, or the channel a thread is in, is archived."""
+        if channel_id in self.channels:
+            return True
+        channel = self.bot.get_channel(channel_id)
+        return getattr(channel, 'parent_id', None) in self.channels
+
+    def add(self, message):
+        """Buffer a new message if its channel is archived."""
+        if message.author.bot or not (message.content or message.attachments):
+            return
+        if not self.covers(message.channel.id):
+            return
+        self.pending[message.id] = ArchivedMessage(
+            message.id, message.guild.id, message.channel.id, message.author.id, message.content,
+            [(a.filename, a.size, a.url, a.content_type) for a in message.attachments]
+        )
+        if message.content and message.guild.id not in self.guild_dictionaries:
+            self.sample(message.guild.id, message.content)
+
+    def sample(self, guild_id, content):
+        samples = self.samples.setdefault(guild_id, [])
+        samples.append(content)
+        self.sample_sizes[guild_id] += len(content)
+        if self.sample_sizes[guild_id] >= config.ARCHIVE_DICT_SAMPLE_BYTES:
+            self.guild_dictionaries[guild_id] = None  # Training; don't collect more
+            asyncio.create_task(self.train(guild_id, self.samples.pop(guild_id)))
+            del self.sample_sizes[guild_id]
+
+    async def train(self, guild_id, samples):
+        try:
+            data = await asyncio.to_thread(train_dictionary, samples, config.ARCHIVE_DICT_SIZE)
+            if not data:
+                self.guild_dictionaries.pop(guild_id, None)
+                return
+            async with self.bot.db.execute(
+                "INSERT INTO archive_dicts (guild_id, data) VALUES (?, ?)", (guild_id, data)
+            ) as cursor:
+                dict_id = cursor.lastrowid
+            await self.bot.db.commit()
+        except Exception as e:
+            logger.error(f"Training an archive dictionary for {guild_id} failed: {e}")
+            # Collect samples again for another try
+            self.guild_dictionaries.pop(guild_id, None)
+            return
+        self.dictionaries[dict_id] = data
+        self.guild_dictionaries[guild_id] = dict_id
+
+    async def get(self, message_id):
+        """Find an archived message, pending or stored, with its content decoded."""
+        entry = self.pending.get(message_id) or self.flushing.get(message_id)
+        if entry is None:
+            return await self.load(message_id)
+        if entry.attachments is None:
+            # An edit: the attachments were written with the original
+            stored = await self.load(message_id)
+            attachments = stored.attachments if stored else []
+        else:
+            attachments = [(filename, size, None) for filename, size, *_ in entry.attachments]
+        return ArchivedMessage(
+            entry.id, entry.guild_id, entry.channel_id, entry.author_id, entry.content, attachments, entry.edited
+        )
+
+    async def load(self, message_id):
+        async with self.bot.db.execute("""
+            SELECT guild_id, channel_id, author_id, codec, dict_id, content, edited
+            FROM archived_messages WHERE message_id = ?
+        """, (message_id,)) as cursor:
+            row = await cursor.fetchone()
+        if not row:
+            return None
+        guild_id, channel_id, author_id, codec, dict_id, blob, edited = row
+        async with self.bot.db.execute("""
+            SELECT filename, size, hash FROM archive_attachments
+            WHERE message_id = ? ORDER BY position
+        """, (message_id,)) as cursor:
+            attachments = await cursor.fetchall()
+        content = decompress(codec, blob, await self.get_dictionary(dict_id))
+        return ArchivedMessage(message_id, guild_id, channel_id, author_id, content, attachments, bool(edited))
+
+    async def get_dictionary(self, dict_id):
+        if dict_id is None:
+            return None
+        if dict_id not in self.dictionaries:
+            async with self.bot.db.execute(
+                "SELECT data FROM archive_dicts WHERE dict_id = ?", (dict_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            self.dictionaries[dict_id] = row[0] if row else None
+        return self.dictionaries[dict_id]
+
+    async def update(self, message_id, content):
+        """Record an edit; returns the message as it was before, or None if it isn't archived or didn't change."""
+        before = await self.get(message_id)
+        if before is None or before.content == content:
+            return None
+        self.pending[message_id] = ArchivedMessage(
+            message_id, before.guild_id, before.channel_id, before.author_id, content,
+            self.pending[message_id].attachments if message_id in self.pending else None,
+            edited=True
+        )
+        return before
+
+    async def fetch_files(self, entries):
+        """Download the batch's attachments, returning {url: sha256} for the ones stored."""
+        urls = {
+            url: content_type
+            for entry in entries if entry.attachments
+            for _, size, url, content_type in entry.attachments
+            if size <= config.ARCHIVE_ATTACHMENT_MAX_BYTES
+        }
+        hashes, files = {}, {}
+        semaphore = asyncio.Semaphore(config.ARCHIVE_DOWNLOAD_CONCURRENCY)
+
+        async def download(url, content_type):
+            async with semaphore:
+                try:
+                    response = await self.bot.http_client.request(
+                        'GET', url, retries=1, max_size=config.ARCHIVE_ATTACHMENT_MAX_BYTES
+                    )
+                except HTTPError:
+                    return
+            if response.status == 200:
+                digest = hashlib.sha256(response.body).digest()
+                hashes[url] = digest
+                files[digest] = (digest, content_type, response.body)
+
+        await asyncio.gather(*(download(url, content_type) for url, content_type in urls.items()))
+        return hashes, files
+
+    @tasks.loop(seconds=config.ARCHIVE_FLUSH_INTERVAL)
+    async def flush_task(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Archive flush failed: {e}")
+
+    async def flush(self):
+        """Compress and write everything buffered in one transaction."""
+        async with self.lock:
+            if not self.pending:
+                return
+            self.flushing, self.pending = self.pending, {}
+            try:
+                entries = list(self.flushing.values())
+                hashes, files = await self.fetch_files(entries)
+
+                messages, attachments = [], []
+                for entry in entries:
+                    dict_id = self.guild_dictionaries.get(entry.guild_id)
+                    codec, blob = compress(
+                        entry.content, self.dictionaries.get(dict_id), config.ARCHIVE_COMPRESSION_LEVEL
+                    )
+                    messages.append((
+                        entry.id, entry.guild_id, entry.channel_id, entry.author_id, codec,
+                        dict_id if codec == DEFLATE_DICT else None, blob, len(entry.content.encode()),
+                        int(entry.edited)
+                    ))
+                    for position, (filename, size, url, _) in enumerate(entry.attachments or ()):
+                        attachments.append((entry.id, position, filename, size, hashes.get(url)))
+
+                await self.bot.db.executemany("""
+                    INSERT INTO archived_messages
+                        (message_id, guild_id, channel_id, author_id, codec, dict_id, content, size, edited)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (message_id) DO UPDATE SET
+                        codec = excluded.codec, dict_id = excluded.dict_id,
+                        content = excluded.content, size = excluded.size, edited = excluded.edited
+                """, messages)
+                if files:
+                    await self.bot.db.executemany(
+                        "INSERT OR IGNORE INTO archive_files (hash, content_type, data) VALUES (?, ?, ?)",
+                        files.values()
+                    )
+                if attachments:
+                    await self.bot.db.executemany("""
+                        INSERT OR IGNORE INTO archive_attachments (message_id, position, filename, size, hash)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, attachments)
+                await self.bot.db.commit()
+            except Exception:
+                # Keep the batch for the next try, without overwriting anything newer. An edit
+                # queued meanwhile has no attachments of its own; they come from the original.
+                for message_id, entry in self.flushing.items():
+                    newer = self.pending.get(message_id)
+                    if newer is None:
+                        self.pending[message_id] = entry
+                    elif newer.attachments is None:
+                        newer.attachments = entry.attachments
+                raise
+            finally:
+                self.flushing = {}
+
+    @tasks.loop(seconds=config.ARCHIVE_PRUNE_INTERVAL)
+    async def prune_task(self):
+        try:
+            await self.prune()
+        except Exception as e:
+            logger.error(f"Archive prune failed: {e}")
+
+    @prune_task.before_loop
+    async def before_prune(self):
+        await self.bot.wait_until_ready()
+
+    async def prune(self):
+        """Delete messages past ARCHIVE_RETENTION_DAYS, and files nothing uses any more.
+
+        Message IDs are snowflakes, so age is a primary key range and every
+        chunk is an index seek. Each chunk is its own transaction.
+        """
+        cutoff = discord.utils.time_snowflake(
+            discord.utils.utcnow() - timedelta(days=config.ARCHIVE_RETENTION_DAYS)
+        )
+        removed = await self.delete_in_chunks("""
+            DELETE FROM archived_messages WHERE message_id IN (
+                SELECT message_id FROM archived_messages WHERE message_id < ? LIMIT ?
+            )
+        """, cutoff)
+        await self.delete_in_chunks("""
+            DELETE FROM archive_attachments WHERE rowid IN (
+                SELECT rowid FROM archive_attachments WHERE message_id < ? LIMIT ?
+            )
+        """, cutoff)
+        await self.delete_in_chunks("""
+            DELETE FROM archive_files WHERE hash IN (
+                SELECT hash FROM archive_files AS f
+                WHERE NOT EXISTS (SELECT 1 FROM archive_attachments AS a WHERE a.hash = f.hash)
+                LIMIT ?
+            )
+        """)
+        if removed:
+            logger.info(f"Pruned {removed:,} archived messages")
+        return removed
+
+    async def delete_in_chunks(self, query, *params):
+        total = 0
+        while True:
+            async with self.bot.db.execute(query, (*params, config.ARCHIVE_PRUNE_CHUNK)) as cursor:
+                deleted = cursor.rowcount
+            await self.bot.db.commit()
+            total += deleted
+            if deleted < config.ARCHIVE_PRUNE_CHUNK:
+                return total
+            await asyncio.sleep(0.1)  # Let other queries in between chunks
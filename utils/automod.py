@@ -0,0 +1,144 @@
+import re
+import time
+from collections import deque
+
+from utils.domains import ALLOW, DENY, DomainBlocklist, DomainTrie, url_host
+from utils.matching import WordMatcher
+
+INVITE_PATTERN = re.compile(
+    r'(?:discord(?:app)?\.com/invite|discord\.gg|discord\.me|dsc\.gg)/[a-zA-Z0-9-]+',
+    re.IGNORECASE
+)
+CUSTOM_EMOJI_PATTERN = re.compile(r'<a?:\w{2,32}:\d{15,25}>')
+
+
+def count_unicode_emoji(text):
+    """Rough count of unicode emoji (pictographs, symbols and dingbats)."""
+    return sum(
+        1 for char in text
+        if 0x1F300 <= ord(char) <= 0x1FAFF or 0x2600 <= ord(char) <= 0x27BF
+    )
+
+
+class AutoModSettings:
+    """A guild's automod configuration with its word and domain matchers compiled."""
+
+    __slots__ = (
+        'enabled', 'filter_invites', 'filter_links', 'max_mentions', 'max_emojis',
+        'caps_ratio', 'caps_min_length', 'spam_limit', 'spam_per', 'duplicate_limit', 'scan_images', 'matcher', 'domains', 'images'
+    )
+
+    def __init__(self, enabled=True, banned_words=(), domain_rules=(), **options):
+        self.enabled = enabled
+        for name, default in options.items():
+            setattr(self, name, default)
+        self.matcher = WordMatcher(banned_words) if banned_words else None
+        self.domains = DomainTrie(domain_rules) if domain_rules else None
+        self.images = None  # BKTree of blocked image hashes, set by the cog
+
+
+class AutoModEngine:
+    """Content checks that don't depend on discord objects.
+
+    Works on plain strings and counts so the same code runs for live
+    messages and for the benchmark.
+    """
+
+    def __init__(self, url_pattern, blocklist=None):
+        self.url_pattern = url_pattern
+        self.blocklist = blocklist or DomainBlocklist()  # Shared by every guild
+
+    def analyze(self, settings, content, mention_count):
+        """Return the reason a message breaks the rules, or None."""
+        if settings.max_mentions and mention_count >= settings.max_mentions:
+            return f"Too many mentions ({mention_count})"
+
+        if not content:
+            return None
+
+        if settings.matcher and settings.matcher.find(content):
+            return "Banned word"
+
+        if settings.filter_invites and INVITE_PATTERN.search(content):
+            return "Server invite"
+
+        reason = self.check_links(settings, content)
+        if reason:
+            return reason
+
+        if settings.max_emojis:
+            emojis = len(CUSTOM_EMOJI_PATTERN.findall(content)) + count_unicode_emoji(content)
+            if emojis >= settings.max_emojis:
+                return f"Too many emojis ({emojis})"
+
+        if settings.caps_ratio and len(content) >= settings.caps_min_length:
+            letters = [char for char in content if char.isalpha()]
+            if len(letters) >= settings.caps_min_length:
+                upper = sum(1 for char in letters if char.isupper())
+                if upper / len(letters) >= settings.caps_ratio:
+                    return "Excessive caps"
+
+        return None
+
+    def check_links(self, settings, content):
+        """Apply the guild's domain rules, then the shared blocklist, then filter_links.
+
+        An allow rule exempts a domain from both the blocklist and
+        filter_links, so a guild can block all links except a few sites.
+        """
+        if not (settings.filter_links or settings.domains or self.blocklist):
+            return None
+
+        for url in self.url_pattern.findall(content):
+            host = url_host(url)
+            if not host:
+                continue
+            action = settings.domains.lookup(host) if settings.domains else None
+            if action == ALLOW:
+                continue
+            if action == DENY:
+                return "Blocked domain"
+            if self.blocklist.match(host):
+                return "Known scam domain"
+            if settings.filter_links:
+                return "Link"
+        return None
+
+
+class LatencyTracker:
+    """Keeps recent per-message processing times for reporting."""
+
+    def __init__(self, budget, samples=1000):
+        self.budget = budget
+        self.samples = deque(maxlen=samples)
+        self.total = 0
+        self.over_budget = 0
+
+    def record(self, elapsed):
+        self.samples.append(elapsed)
+        self.total += 1
+        if elapsed > self.budget:
+            self.over_budget += 1
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def timer(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('tracker', 'start')
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracker.record(time.perf_counter() - self.start)
@@ -0,0 +1,135 @@
+import os
+import re
+from array import array
+from urllib.parse import urlsplit
+
+DOMAIN_PATTERN = re.compile(r'^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)*[a-z0-9-]{1,63}$')
+ALLOW = 'allow'
+DENY = 'deny'
+
+
+def normalize_domain(domain):
+    """Lowercase a domain or URL's host, dropping any scheme, path, port and ``*.``."""
+    domain = domain.strip().lower()
+    if '/' in domain:
+        domain = urlsplit(domain if '//' in domain else f'//{domain}').hostname or ''
+    domain = domain.split(':')[0].strip('.')
+    if domain.startswith('*.'):
+        domain = domain[2:]
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain if DOMAIN_PATTERN.match(domain) else None
+
+
+def url_host(url):
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    return host.strip('.') if host else None
+
+
+class DomainTrie:
+    """Allow/deny rules keyed by domain, stored as a trie of reversed labels.
+
+    A rule for ``example.com`` covers it and every subdomain, and the most
+    specific rule wins, so "deny ru" plus "allow yandex.ru" allows
+    mail.yandex.ru but not other .ru sites. Lookups walk one node per
+    label of the host, however many rules there are.
+    """
+
+    __slots__ = ('root', 'rules')
+
+    def __init__(self, rules=()):
+        self.root = {}
+        self.rules = {}
+        for domain, action in rules:
+            self.add(domain, action)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def add(self, domain, action):
+        node = self.root
+        for label in reversed(domain.split('.')):
+            node = node.setdefault(label, {})
+        node[None] = action  # None can't clash with a label
+        self.rules[domain] = action
+
+    def lookup(self, host):
+        """Return the action of the most specific rule covering ``host``, or None."""
+        node = self.root
+        action = None
+        for label in reversed(host.split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            action = node.get(None, action)
+        return action
+
+
+class DomainBlocklist:
+    """A large read-only list of blocked domains shared by every guild.
+
+    Domains are kept sorted in one bytes buffer with an array of offsets
+    (a few bytes per entry instead of a Python string each) and found by
+    binary search, checking the host and then each parent domain.
+    """
+
+    def __init__(self, domains=()):
+        domains = sorted({domain.encode() for domain in domains})
+        self.data = b'\n'.join(domains)
+        self.offsets = array('I')
+        position = 0
+        for domain in domains:
+            self.offsets.append(position)
+            position += len(domain) + 1
+
+    @classmethod
+    def from_file(cls, path):
+        """Load one domain per line, skipping blanks, comments and hosts-file prefixes."""
+        if not path or not os.path.exists(path):
+            return cls()
+
+        domains = []
+        with open(path, encoding='utf-8', errors='ignore') as file:
+            for line in file:
+                line = line.split('#', 1)[0].split()
+                if not line:
+                    continue
+                domain = normalize_domain(line[-1])  # "0.0.0.0 bad.com" or "bad.com"
+                if domain:
+                    domains.append(domain)
+        return cls(domains)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _entry(self, index):
+        start = self.offsets[index]
+        end = self.data.find(b'\n', start)
+        return self.data[start:end if end != -1 else len(self.data)]
+
+    def _contains(self, domain):
+        low, high = 0, len(self.offsets)
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            if entry == domain:
+                return True
+            if entry < domain:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+
+    def match(self, host):
+        """Return the blocked domain covering ``host``, or None."""
+        if not self.offsets:
+            return None
+        labels = host.lower().split('.')
+        for i in range(len(labels) - 1):  # Never match a bare TLD
+            domain = '.'.join(labels[i:])
+            if self._contains(domain.encode()):
+                return domain
+        return None
@@ -0,0 +1,165 @@
+import heapq
+import re
+import time
+import unicodedata
+from collections import Counter, deque
+
+MENTION_PATTERN = re.compile(r'<(?:@[!&]?|#)\d+>')
+INVISIBLE_PATTERN = re.compile('[\u200b-\u200f\u2060\ufeff]')
+SEPARATOR_PATTERN = re.compile(r'[\W_]+')
+
+SHINGLE = 4  # Characters per shingle
+SKETCH_SIZE = 16  # Smallest shingle hashes kept per message
+MAX_TEXT = 1000  # Characters of a message that are fingerprinted
+
+
+def normalize(text):
+    """Reduce a message to the text raiders can't cheaply vary.
+
+    Mentions, case, compatibility lookalikes, zero-width characters and
+    punctuation are dropped, so "Free NITRO @a" and "free nitro!! @b"
+    normalize to the same string.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = MENTION_PATTERN.sub(' ', text)
+    text = INVISIBLE_PATTERN.sub('', text)
+    return SEPARATOR_PATTERN.sub(' ', text.lower()).strip()
+
+
+def sketch(text):
+    """Bottom-k MinHash sketch: the smallest hashes of a text's shingles.
+
+    Texts that share most of their shingles share most of their sketch,
+    so comparing two 16-value sets estimates how alike the messages are.
+    """
+    text = text[:MAX_TEXT]
+    shingles = {hash(text[i:i + SHINGLE]) for i in range(max(1, len(text) - SHINGLE + 1))}
+    return frozenset(heapq.nsmallest(SKETCH_SIZE, shingles))
+
+
+def similarity(a, b):
+    return len(a & b) / len(a | b)
+
+
+class Cluster:
+    """Messages sharing one fingerprint (or a near one) within the window."""
+
+    __slots__ = ('keys', 'sketch', 'messages', 'authors', 'channels', 'drained', 'flagged')
+
+    def __init__(self, sketch):
+        self.keys = set()  # Exact text hashes that map here
+        self.sketch = sketch
+        self.messages = deque()  # (time, channel_id, message_id, author_id)
+        self.authors = Counter()
+        self.channels = Counter()
+        self.drained = 0  # Leading messages already handed out by drain()
+        self.flagged = False
+
+    def __len__(self):
+        return len(self.messages)
+
+    def is_flood(self, limit):
+        """Whether there are enough copies, from more than one member or channel, to act on.
+
+        One member repeating themselves in one channel is left to the spam check.
+        """
+        return len(self.messages) >= limit and (len(self.authors) > 1 or len(self.channels) > 1)
+
+
+class DuplicateTracker:
+    """One guild's recent message fingerprints.
+
+    Exact repeats are found through a dict of normalized-text hashes and
+    near repeats through an inverted index of sketch values, so only
+    clusters sharing part of a sketch are compared. Entries older than
+    ``window`` seconds are dropped as new ones arrive, and at most
+    ``max_entries`` are kept however busy the guild is.
+    """
+
+    def __init__(self, window, min_similarity=0.4, max_entries=5000):
+        self.window = window
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self.entries = deque()  # (time, cluster) in arrival order
+        self.exact = {}  # text hash -> Cluster
+        self.sketch_index = {}  # sketch value -> {Cluster}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, content, channel_id, message_id, author_id, now=None):
+        """Record a message and return its cluster, or None if it is too short to judge."""
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+
+        text = normalize(content)
+        if len(text) < SHINGLE * 2:
+            return None
+
+        key = hash(text)
+        cluster = self.exact.get(key)
+        if cluster is None:
+            text_sketch = sketch(text)
+            cluster = self._find_near(text_sketch)
+            if cluster is None:
+                cluster = Cluster(text_sketch)
+                for value in text_sketch:
+                    self.sketch_index.setdefault(value, set()).add(cluster)
+            cluster.keys.add(key)
+            self.exact[key] = cluster
+
+        cluster.messages.append((now, channel_id, message_id, author_id))
+        cluster.authors[author_id] += 1
+        cluster.channels[channel_id] += 1
+        self.entries.append((now, cluster))
+        if len(self.entries) > self.max_entries:
+            self._pop_oldest()
+        return cluster
+
+    def _find_near(self, text_sketch):
+        candidates = set()
+        for value in text_sketch:
+            candidates.update(self.sketch_index.get(value, ()))
+
+        best, best_score = None, self.min_similarity
+        for cluster in candidates:
+            score = similarity(text_sketch, cluster.sketch)
+            if score >= best_score:
+                best, best_score = cluster, score
+        return best
+
+    def expire(self, now=None):
+        now = time.monotonic() if now is None else now
+        while self.entries and now - self.entries[0][0] > self.window:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        _, cluster = self.entries.popleft()
+        _, channel_id, _, author_id = cluster.messages.popleft()
+        if cluster.drained:
+            cluster.drained -= 1
+        for counter, key in ((cluster.authors, author_id), (cluster.channels, channel_id)):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+
+        if not cluster.messages:
+            for value in cluster.sketch:
+                members = self.sketch_index.get(value)
+                if members is not None:
+                    members.discard(cluster)
+                    if not members:
+                        del self.sketch_index[value]
+            for key in cluster.keys:
+                if self.exact.get(key) is cluster:
+                    del self.exact[key]
+
+    def drain(self, cluster):
+        """Return (channel_id, message_id, author_id) for messages not handed out yet.
+
+        The cluster keeps counting them until they age out, so a flagged
+        cluster stays flagged and later copies are caught straight away.
+        """
+        messages = list(cluster.messages)[cluster.drained:]
+        cluster.drained = len(cluster.messages)
+        return [message[1:] for message in messages]
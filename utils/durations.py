@@ -0,0 +1,42 @@
+import re
+from datetime import timedelta
+
+from discord.ext import commands
+
+DURATION_PATTERN = re.compile(r'(\d+)\s*(w|d|h|m|s)', re.IGNORECASE)
+UNITS = {'w': 604800, 'd': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+
+def parse_duration(text):
+    """Parse "1h30m", "2d" or "45s" into a timedelta, or None if it isn't a duration."""
+    text = text.strip()
+    if not text or DURATION_PATTERN.sub('', text).strip():
+        return None
+    seconds = sum(int(amount) * UNITS[unit.lower()] for amount, unit in DURATION_PATTERN.findall(text))
+    return timedelta(seconds=seconds) if seconds else None
+
+
+def format_duration(seconds):
+    """Format seconds as "1d 2h 5m", dropping zero units."""
+    seconds = int(seconds)
+    parts = []
+    for unit, size in UNITS.items():
+        if unit == 'w':
+            continue
+        amount, seconds = divmod(seconds, size)
+        if amount:
+            parts.append(f"{amount}{unit}")
+    return " ".join(parts) or "0s"
+
+
+class Duration(commands.Converter):
+    """Command argument converter for durations like 10m or 1d12h."""
+
+    async def convert(self, ctx, argument):
+        try:
+            duration = parse_duration(argument)
+        except OverflowError:
+            raise commands.BadArgument(f"`{argument}` is far too long!")
+        if duration is None:
+            raise commands.BadArgument(f"`{argument}` isn't a duration! Try something like `10m`, `2h` or `1d`.")
+        return duration
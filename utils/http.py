@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import config
+from utils.http_cache import CircuitBreaker, ResponseCache
+
+logger = logging.getLogger('DiscordBot.http')
+
+# Statuses worth retrying; everything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HTTPError(Exception):
+    """Raised when a request fails without producing a usable response."""
+
+
+class CircuitOpenError(HTTPError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class Response:
+    """A fully read HTTP response."""
+
+    __slots__ = ('url', 'status', 'headers', 'body')
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HostStats:
+    """Request counters for a single host."""
+
+    __slots__ = ('requests', 'failures', 'retries', 'total_time')
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_time = 0.0
+
+    @property
+    def average_ms(self):
+        return self.total_time / self.requests * 1000 if self.requests else 0.0
+
+
+def cache_policy(url):
+    """Cache timings for a URL, looked up by host."""
+    policy = dict(config.HTTP_CACHE_DEFAULT_POLICY)
+    policy.update(config.HTTP_CACHE_POLICIES.get(urlsplit(url).hostname, {}))
+    return policy
+
+
+class HTTPClient:
+    """Bot-wide aiohttp session for talking to external APIs.
+
+    Cogs borrow it through ``bot.http_client`` instead of creating their own
+    sessions. The bot starts it in ``setup_hook`` and closes it in ``close``.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.stats = defaultdict(HostStats)
+        self.cache = ResponseCache(config.HTTP_CACHE_MAX_ENTRIES)
+        self.breakers = defaultdict(lambda: CircuitBreaker(
+            config.CIRCUIT_BREAKER_THRESHOLD,
+            config.CIRCUIT_BREAKER_RESET
+        ))
+        self._revalidating = {}
+
+    async def start(self):
+        """Create the session. Must be called from inside the running loop."""
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_CONNECTION_LIMIT,
+            limit_per_host=config.HTTP_CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=config.HTTP_DNS_CACHE_TTL
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=config.HTTP_TIMEOUT,
+                sock_connect=config.HTTP_CONNECT_TIMEOUT
+            ),
+            headers={'User-Agent': config.HTTP_USER_AGENT}
+        )
+
+    async def close(self):
+        for task in self._revalidating.values():
+            task.cancel()
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def request(self, method, url, *, retries=None, max_size=None, **kwargs):
+        """Send a request, retrying timeouts, connection errors and 5xx/429s.
+
+        Returns the last response received, even if its status is an error.
+        Raises HTTPError if no response could be read at all, or if the body
+        is larger than ``max_size`` bytes, and CircuitOpenError without
+        sending anything if the host has been failing.
+        """
+        retries = config.HTTP_RETRIES if retries is None else retries
+        host = urlsplit(url).hostname
+        stats = self.stats[host]
+        breaker = self.breakers[host]
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}")
+        last_error = None
+        settled = False
+
+        try:
+            for attempt in range(retries + 1):
+                if attempt:
+                    stats.retries += 1
+                    await asyncio.sleep(self._backoff(attempt, last_error))
+
+                start = time.perf_counter()
+                stats.requests += 1
+                try:
+                    async with self.session.request(method, url, **kwargs) as resp:
+                        body = await self._read_body(resp, max_size)
+                        response = Response(url, resp.status, resp.headers, body)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    stats.failures += 1
+                    last_error = e
+                    continue
+                finally:
+                    stats.total_time += time.perf_counter() - start
+
+                if response.status not in RETRY_STATUSES:
+                    breaker.record_success()
+                    settled = True
+                    return response
+
+                stats.failures += 1
+                last_error = response
+
+            breaker.record_failure()
+            settled = True
+        finally:
+            if not settled:
+                # Cancelled, or the body was too large: not the host's fault,
+                # but a half-open trial must not stay in flight forever
+                breaker.release()
+        if isinstance(last_error, Response):
+            return last_error
+        logger.warning(f"{method} {url} failed after {retries + 1} attempts: {last_error!r}")
+        raise HTTPError(f"{method} {url} failed: {last_error!r}")
+
+    async def get(self, url, *, cache=False, **kwargs):
+        """GET a URL, optionally through the response cache.
+
+        Cached requests follow the policy for the URL's host in
+        HTTP_CACHE_POLICIES: fresh entries are served without a request,
+        entries within the stale-while-revalidate window are served while a
+        background request refreshes them, and entries within the
+        stale-if-error window are served when the host is failing or its
+        circuit breaker is open.
+        """
+        if not cache:
+            return await self.request('GET', url, **kwargs)
+
+        policy = cache_policy(url)
+        entry = self.cache.get(url)
+        if entry and entry.age < policy['ttl']:
+            self.cache.hits += 1
+            return entry.response
+
+        if entry and entry.age < policy['ttl'] + policy['stale_while_revalidate']:
+            self.cache.stale_hits += 1
+            if url not in self._revalidating:
+                task = asyncio.create_task(self._revalidate(url, entry, kwargs))
+                self._revalidating[url] = task
+                task.add_done_callback(lambda _: self._revalidating.pop(url, None))
+            return entry.response
+
+        self.cache.misses += 1
+        try:
+            response = await self._fetch_and_store(url, entry, kwargs)
+        except HTTPError:
+            response = None
+
+        if response is not None and response.status < 500 and response.status not in RETRY_STATUSES:
+            return response
+        if entry and entry.age < policy['ttl'] + policy['stale_if_error']:
+            self.cache.stale_hits += 1
+            return entry.response
+        if response is None:
+            raise HTTPError(f"GET {url} failed and nothing usable is cached")
+        return response
+
+    async def _fetch_and_store(self, url, entry, kwargs):
+        """Send a conditional GET and update the cache with the result."""
+        if entry:
+            headers = {**entry.conditional_headers(), **kwargs.pop('headers', {})}
+            kwargs = {**kwargs, 'headers': headers}
+        response = await self.request('GET', url, **kwargs)
+
+        if response.status == 304 and entry:
+            # The entry may have been evicted while the request was in flight
+            touched = self.cache.touch(url)
+            return (touched or entry).response
+        if response.status == 200:
+            self.cache.store(url, response)
+        return response
+
+    async def _revalidate(self, url, entry, kwargs):
+        try:
+            await self._fetch_and_store(url, entry, dict(kwargs))
+        except HTTPError as e:
+            logger.debug(f"Background revalidation of {url} failed: {e!r}")
+
+    async def get_json(self, url, **kwargs):
+        """GET a URL and decode the JSON body, raising HTTPError on a non-200 status."""
+        response = await self.get(url, **kwargs)
+        if response.status != 200:
+            raise HTTPError(f"GET {url} returned {response.status}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise HTTPError(f"GET {url} returned invalid JSON") from e
+
+    async def _read_body(self, resp, max_size):
+        if max_size is None:
+            return await resp.read()
+        if resp.content_length and resp.content_length > max_size:
+            raise HTTPError(f"Response is {resp.content_length} bytes, limit is {max_size}")
+
+        chunks = []
+        size = 0
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPError(f"Response is larger than {max_size} bytes")
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def _backoff(self, attempt, last_error):
+        """Exponential backoff with jitter, honouring Retry-After on 429s."""
+        delay = config.HTTP_RETRY_BACKOFF * (2 ** (attempt - 1))
+        if isinstance(last_error, Response) and last_error.status == 429:
+            try:
+                delay = max(delay, float(last_error.headers.get('Retry-After', 0)))
+            except ValueError:
+                pass
+        return min(delay, config.HTTP_RETRY_BACKOFF_MAX) * random.uniform(0.8, 1.2)
@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """A cached response plus the validators needed to revalidate it."""
+
+    __slots__ = ('response', 'stored_at', 'etag', 'last_modified')
+
+    def __init__(self, response):
+        self.response = response
+        self.stored_at = time.monotonic()
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+
+    @property
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+    def conditional_headers(self):
+        """Headers that let the server answer 304 if nothing changed."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """LRU cache of GET responses keyed by URL."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.revalidations = 0
+
+    def get(self, url):
+        entry = self.entries.get(url)
+        if entry:
+            self.entries.move_to_end(url)
+        return entry
+
+    def store(self, url, response):
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return None
+        entry = CacheEntry(response)
+        self.entries[url] = entry
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def touch(self, url):
+        """Mark an entry fresh again after a 304 Not Modified."""
+        entry = self.entries.get(url)
+        if entry:
+            entry.stored_at = time.monotonic()
+            self.revalidations += 1
+        return entry
+
+
+class CircuitBreaker:
+    """Stops calling a host after repeated failures.
+
+    After ``threshold`` consecutive failures the breaker opens and requests
+    are refused for ``reset_timeout`` seconds. It then lets a single trial
+    request through (half-open); success closes it, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a request may be sent right now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def release(self):
+        """Give up a request's slot without judging the host, e.g. when it was cancelled."""
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.opened_at = time.monotonic()
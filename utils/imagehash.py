@@ -0,0 +1,144 @@
+import io
+import math
+
+HASH_SIZE = 8  # 8x8 = 64-bit hashes
+DCT_SIZE = 32
+
+# cos((2x + 1) * u * pi / 64) for the 8 lowest DCT frequencies
+_DCT_COS = [
+    [math.cos((2 * x + 1) * u * math.pi / (2 * DCT_SIZE)) for x in range(DCT_SIZE)]
+    for u in range(HASH_SIZE)
+]
+
+
+def _bits(values, threshold):
+    result = 0
+    for value in values:
+        result = (result << 1) | (value > threshold)
+    return result
+
+
+def _grayscale(image, size):
+    from PIL import Image
+
+    return list(image.resize(size, Image.LANCZOS).getdata())
+
+
+def average_hash(image):
+    pixels = _grayscale(image, (HASH_SIZE, HASH_SIZE))
+    return _bits(pixels, sum(pixels) / len(pixels))
+
+
+def difference_hash(image):
+    """Each bit says whether a pixel is brighter than its right-hand neighbour."""
+    pixels = _grayscale(image, (HASH_SIZE + 1, HASH_SIZE))
+    result = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            result = (result << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return result
+
+
+def perceptual_hash(image):
+    """Low-frequency DCT coefficients of a 32x32 thumbnail, compared to their median.
+
+    Only the 8 lowest frequencies are computed in each direction, so the
+    transform costs about 10k multiplications per image.
+    """
+    pixels = _grayscale(image, (DCT_SIZE, DCT_SIZE))
+    rows = [pixels[i * DCT_SIZE:(i + 1) * DCT_SIZE] for i in range(DCT_SIZE)]
+
+    # DCT along rows, keeping 8 coefficients per row
+    row_dct = [[sum(c * p for c, p in zip(cosines, row)) for cosines in _DCT_COS] for row in rows]
+    # Then down the columns of those
+    coefficients = [
+        sum(_DCT_COS[v][y] * row_dct[y][u] for y in range(DCT_SIZE))
+        for v in range(HASH_SIZE) for u in range(HASH_SIZE)
+    ]
+
+    ordered = sorted(coefficients[1:])  # The DC term would dominate the median
+    median = (ordered[len(ordered) // 2 - 1] + ordered[len(ordered) // 2]) / 2
+    return _bits(coefficients, median)
+
+
+def hash_image(data):
+    """Return (ahash, dhash, phash) for encoded image bytes, or None if they can't be read.
+
+    Runs in a worker process, so it only takes and returns plain values.
+    """
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft('L', (DCT_SIZE * 4, DCT_SIZE * 4))  # Let JPEGs decode at a reduced size
+        image = image.convert('L')  # First frame of animated images
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    return average_hash(image), difference_hash(image), perceptual_hash(image)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def to_signed(value):
+    """Fit an unsigned 64-bit hash into an SQLite INTEGER."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance.
+
+    Children are keyed by their distance to the parent, and the triangle
+    inequality lets a search skip every subtree whose key is further than
+    ``max_distance`` from the query's distance to the parent.
+    """
+
+    __slots__ = ('root', 'size')
+
+    def __init__(self, items=()):
+        self.root = None  # [hash, payload, {distance: node}]
+        self.size = 0
+        for value, payload in items:
+            self.add(value, payload)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value, payload):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, payload, {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, payload, {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """Return (distance, payload) for every entry within ``max_distance``, closest first."""
+        if self.root is None:
+            return []
+
+        results = []
+        stack = [self.root]
+        while stack:
+            node_value, payload, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                results.append((distance, payload))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
@@ -0,0 +1,69 @@
+class InviteSnapshot:
+    """Use counts of one guild's invites, as last seen.
+
+    Kept current by invite create/delete events, so a join only needs one
+    refetch to see which counts went up. Discord deletes an invite the
+    moment its last use is spent, often before the join arrives, so
+    invites deleted one use short of their limit are remembered until the
+    next diff as possible explanations for a join.
+    """
+
+    __slots__ = ('uses', 'vanished')
+
+    def __init__(self, invites=()):
+        self.uses = {}  # code -> (uses, max_uses, inviter_id)
+        self.vanished = {}  # code -> inviter_id of invites that may have been used up
+        for invite in invites:
+            self.add(invite)
+
+    def add(self, invite):
+        self.uses[invite.code] = (invite.uses or 0, invite.max_uses or 0, invite.inviter and invite.inviter.id)
+
+    def remove(self, code):
+        entry = self.uses.pop(code, None)
+        if entry:
+            uses, max_uses, inviter_id = entry
+            if max_uses and uses + 1 >= max_uses:
+                self.vanished[code] = inviter_id
+
+    def diff(self, invites):
+        """Replace the snapshot with ``invites`` and return what changed in between.
+
+        Returns ``(code, inviter_id, count)`` credits: first every invite
+        whose count went up, then any used-up invites that went missing.
+        """
+        credits = []
+        fresh = {}
+        for invite in invites:
+            entry = (invite.uses or 0, invite.max_uses or 0, invite.inviter and invite.inviter.id)
+            fresh[invite.code] = entry
+            before = self.uses.get(invite.code, (0,))[0]
+            if entry[0] > before:
+                credits.append((invite.code, entry[2], entry[0] - before))
+
+        for code, entry in self.uses.items():
+            uses, max_uses, inviter_id = entry
+            if code not in fresh and max_uses and uses + 1 >= max_uses:
+                self.vanished.setdefault(code, inviter_id)
+        credits.extend((code, inviter_id, 1) for code, inviter_id in self.vanished.items() if code not in fresh)
+
+        self.uses = fresh
+        self.vanished = {}
+        return credits
+
+
+def attribute(members, credits):
+    """Match a burst of joins to the invite uses seen for them.
+
+    Returns ``{member_id: (code, inviter_id, exact)}``. Uses are handed out
+    in join order; when they all came from one invite every match is
+    certain, otherwise the totals per invite are right but who used which
+    one is a best guess. Joins left over once the uses run out aren't
+    included.
+    """
+    slots = [(code, inviter_id) for code, inviter_id, count in credits for _ in range(count)]
+    exact = len(credits) == 1
+    return {
+        member_id: (code, inviter_id, exact)
+        for member_id, (code, inviter_id) in zip(members, slots)
+    }
@@ -0,0 +1,111 @@
+import re
+from collections import deque
+
+
+class WordMatcher:
+    """Aho-Corasick automaton matching many words in a single pass.
+
+    Matching costs O(len(text)) however many words are loaded. Words match
+    case-insensitively as whole words; a leading or trailing ``*`` lets the
+    word match inside longer words (``*bad*`` matches "notbadatall").
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # state -> [(length, open_start, open_end, word)]
+        self.words = []
+
+        for word in words:
+            self._add(word)
+        self._build()
+
+    def __len__(self):
+        return len(self.words)
+
+    def _add(self, word):
+        open_start = word.startswith('*')
+        open_end = word.endswith('*')
+        core = word.strip('*').lower()
+        if not core:
+            return
+        self.words.append(word)
+
+        state = 0
+        for char in core:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = next_state
+            state = next_state
+        self.output[state].append((len(core), open_start, open_end, word))
+
+    def _build(self):
+        """Compute failure links breadth-first."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text):
+        """Return the first loaded word found in ``text``, or None."""
+        text = text.lower()
+        goto, fail, output = self.goto, self.fail, self.output
+        end = len(text)
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, open_start, open_end, word in output[state]:
+                start = i - length + 1
+                if not open_start and start > 0 and text[start - 1].isalnum():
+                    continue
+                if not open_end and i + 1 < end and text[i + 1].isalnum():
+                    continue
+                return word
+        return None
+
+
+class GlobPattern:
+    """Case-insensitive wildcard search for user-supplied patterns.
+
+    ``*`` matches any run of characters and ``?`` any single one, and the
+    pattern may match anywhere in the text. The pieces between ``*``s are
+    found in order, each at its leftmost place after the last, which is
+    always enough, so nothing is ever retried: unlike a user-supplied
+    regex, no pattern can stall the event loop.
+    """
+
+    MAX_LENGTH = 200
+
+    def __init__(self, pattern):
+        if len(pattern) > self.MAX_LENGTH:
+            raise ValueError(f"Patterns can be at most {self.MAX_LENGTH} characters!")
+        if not pattern.replace('*', '').replace('?', ''):
+            raise ValueError("That pattern matches everything!")
+        self.pattern = pattern
+        self.pieces = [
+            re.compile(''.join('.' if char == '?' else re.escape(char) for char in piece), re.IGNORECASE | re.DOTALL)
+            for piece in pattern.split('*') if piece
+        ]
+
+    def matches(self, text):
+        position = 0
+        for piece in self.pieces:
+            found = piece.search(text, position)
+            if found is None:
+                return False
+            position = found.end()
+        return True
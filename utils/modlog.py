@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+import discord
+from discord.ext import tasks
+
+import config
+
+logger = logging.getLogger('DiscordBot')
+
+MAX_EMBEDS = 10  # Per message
+MAX_EMBED_CHARS = 6000  # Combined embed text allowed per message
+
+
+class ModLog:
+    """Queues mod log embeds per guild and delivers them in batches.
+
+    Every flush packs each guild's queued embeds into as few messages as
+    possible (up to 10 embeds each) and sends them through a webhook the
+    bot owns in the log channel. Webhooks have their own rate limit
+    bucket, so a raid's worth of log entries doesn't compete with the
+    bot's regular messages. Without Manage Webhooks it falls back to
+    sending in the channel directly.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.queues = {}  # guild_id -> deque of embeds
+        self.dropped = {}  # guild_id -> embeds dropped because the queue was full
+        self.channels = {}  # guild_id -> log channel id (None if unset)
+        self.webhooks = {}  # guild_id -> Webhook, or None if we can't manage them
+        self.webhook_retry = {}  # guild_id -> monotonic time a missing webhook is looked for again
+
+    def start(self):
+        self.flush_task.start()
+
+    async def close(self):
+        self.flush_task.cancel()
+        await self.flush()
+
+    async def get_channel_id(self, guild_id):
+        if guild_id not in self.channels:
+            async with self.bot.db.execute(
+                "SELECT log_channel_id FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                result = await cursor.fetchone()
+            self.channels[guild_id] = result[0] if result else None
+        return self.channels[guild_id]
+
+    def invalidate(self, guild_id):
+        """Forget a guild's log channel and webhook after the setting changes."""
+        self.channels.pop(guild_id, None)
+        self.webhooks.pop(guild_id, None)
+        self.webhook_retry.pop(guild_id, None)
+
+    async def send(self, guild, embed):
+        """Queue an embed for the guild's log channel, if it has one."""
+        if await self.get_channel_id(guild.id) is None:
+            return
+
+        queue = self.queues.setdefault(guild.id, deque())
+        if len(queue) >= config.MOD_LOG_MAX_QUEUE:
+            queue.popleft()
+            self.dropped[guild.id] = self.dropped.get(guild.id, 0) + 1
+        queue.append(embed)
+
+    @tasks.loop(seconds=config.MOD_LOG_FLUSH_INTERVAL)
+    async def flush_task(self):
+        await self.flush()
+
+    async def flush(self):
+        guild_ids = [guild_id for guild_id, queue in self.queues.items() if queue]
+        if guild_ids:
+            await asyncio.gather(*(self.flush_guild(guild_id) for guild_id in guild_ids))
+
+    async def flush_guild(self, guild_id):
+        queue = self.queues.pop(guild_id, None)
+        dropped = self.dropped.pop(guild_id, 0)
+        guild = self.bot.get_guild(guild_id)
+        channel_id = self.channels.get(guild_id)
+        channel = guild.get_channel(channel_id) if guild and channel_id else None
+        if not queue or channel is None:
+            return
+
+        if dropped:
+            queue.appendleft(discord.Embed(
+                description=f"⚠️ {dropped} older log entries were dropped during a burst.",
+                color=config.WARNING_COLOR
+            ))
+
+        for batch in self.pack(queue):
+            await self.deliver(guild, channel, batch)
+
+    @staticmethod
+    def pack(embeds):
+        """Group embeds into messages within Discord's count and size limits."""
+        batch, size = [], 0
+        for embed in embeds:
+            length = len(embed)
+            if batch and (len(batch) == MAX_EMBEDS or size + length > MAX_EMBED_CHARS):
+                yield batch
+                batch, size = [], 0
+            batch.append(embed)
+            size += length
+        if batch:
+            yield batch
+
+    async def get_webhook(self, guild, channel):
+        if guild.id in self.webhooks:
+            webhook = self.webhooks[guild.id]
+            # Permissions can be granted later, so a missing webhook is only remembered for a while
+            if webhook is not None or time.monotonic() < self.webhook_retry.get(guild.id, 0):
+                return webhook
+
+        webhook = None
+        if channel.permissions_for(guild.me).manage_webhooks:
+            try:
+                for existing in await channel.webhooks():
+                    if existing.user == self.bot.user and existing.name == config.MOD_LOG_WEBHOOK_NAME:
+                        webhook = existing
+                        break
+                else:
+                    webhook = await channel.create_webhook(
+                        name=config.MOD_LOG_WEBHOOK_NAME, reason="Mod log delivery"
+                    )
+            except discord.HTTPException as e:
+                logger.warning(f"Couldn't set up a mod log webhook in {guild.id}: {e}")
+        self.webhooks[guild.id] = webhook
+        if webhook is None:
+            self.webhook_retry[guild.id] = time.monotonic() + config.MOD_LOG_WEBHOOK_RETRY
+        else:
+            self.webhook_retry.pop(guild.id, None)
+        return webhook
+
+    async def deliver(self, guild, channel, embeds):
+        webhook = await self.get_webhook(guild, channel)
+        if webhook is not None:
+            try:
+                await webhook.send(
+                    embeds=embeds,
+                    username=self.bot.user.name,
+                    avatar_url=self.bot.user.display_avatar.url
+                )
+                return
+            except discord.NotFound:
+                self.webhooks.pop(guild.id, None)  # Deleted; make a new one next time
+            except discord.HTTPException as e:
+                logger.warning(f"Mod log webhook failed in {guild.id}: {e}")
+
+        try:
+            await channel.send(embeds=embeds)
+        except discord.HTTPException as e:
+            logger.warning(f"Couldn't deliver {len(embeds)} mod log entries in {guild.id}: {e}")
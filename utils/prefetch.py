@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger('DiscordBot.prefetch')
+
+
+class Prefetcher:
+    """Keeps a bounded buffer of ready-to-serve items from a slow source.
+
+    ``fetch`` is a coroutine function returning a list of new items. A
+    background task refills the buffer whenever it drops below
+    ``low_watermark``. Items whose ``key`` was served recently, or is already
+    buffered, are dropped so users don't see repeats.
+    """
+
+    def __init__(self, name, fetch, *, size, low_watermark, dedupe_window, key=None,
+                 retry_delay=5, max_retry_delay=300):
+        self.name = name
+        self.fetch = fetch
+        self.size = size
+        self.low_watermark = low_watermark
+        self.key = key or (lambda item: item)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.buffer = deque()
+        self.buffered_keys = set()
+        self.recent = deque(maxlen=dedupe_window)
+        self.recent_keys = set()
+
+        self.failures = 0
+        self.served = 0
+        self.misses = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run(), name=f"prefetch-{self.name}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get(self):
+        """Get an item, from the buffer if possible.
+
+        Falls back to fetching directly when the buffer is empty and returns
+        None if that fails too.
+        """
+        if self.buffer:
+            item = self.buffer.popleft()
+            self.buffered_keys.discard(self.key(item))
+        else:
+            self.misses += 1
+            try:
+                items = await self.fetch()
+            except Exception as e:
+                logger.warning(f"Prefetcher {self.name}: direct fetch failed: {e!r}")
+                items = None
+            if not items:
+                return None
+            item = items[0]
+            self._add(items[1:])
+
+        self._remember(self.key(item))
+        self.served += 1
+        if len(self.buffer) < self.low_watermark:
+            self._wakeup.set()
+        return item
+
+    def _remember(self, key):
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_keys.discard(self.recent[0])
+        self.recent.append(key)
+        self.recent_keys.add(key)
+
+    def _add(self, items):
+        """Buffer new items, skipping duplicates. Returns how many were kept."""
+        added = 0
+        for item in items:
+            if len(self.buffer) >= self.size:
+                break
+            key = self.key(item)
+            if key in self.recent_keys or key in self.buffered_keys:
+                continue
+            self.buffer.append(item)
+            self.buffered_keys.add(key)
+            added += 1
+        return added
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Stop after a couple of rounds that only produce repeats, so a
+            # source with little content doesn't get hammered
+            stale_rounds = 0
+            while len(self.buffer) < self.size and stale_rounds < 3:
+                try:
+                    items = await self.fetch()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.failures += 1
+                    delay = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+                    logger.warning(f"Prefetcher {self.name}: refill failed ({e!r}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.failures = 0
+                stale_rounds = 0 if self._add(items or ()) else stale_rounds + 1
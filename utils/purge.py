@@ -0,0 +1,119 @@
+import asyncio
+import re
+from datetime import timedelta
+
+import discord
+
+LINK_PATTERN = re.compile(r'https?://\S+|discord(?:\.gg|(?:app)?\.com/invite)/\S+', re.IGNORECASE)
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)  # A little under Discord's limit
+BULK_DELETE_SIZE = 100
+
+
+def from_user(user_id):
+    return lambda message: message.author.id == user_id
+
+
+def matches(pattern):
+    return lambda message: pattern.matches(message.content)
+
+
+def from_bots(bots=True):
+    return lambda message: message.author.bot == bots
+
+
+def has_links(message):
+    return LINK_PATTERN.search(message.content) is not None
+
+
+def has_attachments(message):
+    return bool(message.attachments)
+
+
+def has_embeds(message):
+    return bool(message.embeds)
+
+
+def all_of(predicates):
+    """Combine predicates into one check that needs every one of them to pass."""
+    predicates = tuple(predicates)
+    return lambda message: all(predicate(message) for predicate in predicates)
+
+
+class PurgeProgress:
+    """Counters shared by every channel of one purge, read by the progress reporter."""
+
+    __slots__ = ('scanned', 'deleted', 'failed', 'channels_done', 'per_channel')
+
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.channels_done = 0
+        self.per_channel = {}  # channel_id -> deleted
+
+
+async def purge_channel(channel, check, limit, before, after=None, progress=None, reason=None):
+    """Delete messages matching ``check`` among the latest ``limit`` before ``before``.
+
+    History is streamed a page at a time and only matching IDs are kept.
+    Messages young enough for bulk deletion go out 100 at a time, with the
+    next page fetched while the previous chunk is being deleted; older
+    ones can only be deleted one by one. History runs newest first, so
+    once a message is past the cutoff every later one is too.
+    """
+    progress = progress or PurgeProgress()
+    cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+    chunk = []
+    pending = None  # The bulk delete currently in flight
+    deleted = 0
+
+    async def bulk_delete(ids):
+        nonlocal deleted
+        try:
+            await channel.delete_messages([discord.Object(id=message_id) for message_id in ids], reason=reason)
+        except discord.NotFound:
+            # Someone else removed one of them; fall back to deleting the rest individually
+            for message_id in ids:
+                await single_delete(message_id)
+            return
+        except discord.HTTPException:
+            progress.failed += len(ids)
+            return
+        deleted += len(ids)
+        progress.deleted += len(ids)
+
+    async def single_delete(message_id):
+        nonlocal deleted
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except discord.NotFound:
+            return
+        except discord.HTTPException:
+            progress.failed += 1
+            return
+        deleted += 1
+        progress.deleted += 1
+
+    async for message in channel.history(limit=limit, before=before, after=after, oldest_first=False):
+        progress.scanned += 1
+        if not check(message):
+            continue
+        if message.created_at < cutoff:
+            await single_delete(message.id)
+            continue
+
+        chunk.append(message.id)
+        if len(chunk) == BULK_DELETE_SIZE:
+            if pending:
+                await pending
+            pending = asyncio.create_task(bulk_delete(chunk))
+            chunk = []
+
+    if pending:
+        await pending
+    if chunk:
+        await bulk_delete(chunk)
+
+    progress.channels_done += 1
+    progress.per_channel[channel.id] = deleted
+    return deleted
@@ -0,0 +1,47 @@
+import time
+from array import array
+
+
+class RateWindow:
+    """Sliding-window event counter backed by a fixed-size ring buffer.
+
+    Keeps the timestamps of the last ``limit`` events, so checking whether
+    ``limit`` events happened within ``per`` seconds is O(1) per event and
+    memory stays at ``limit`` floats no matter how busy the source is.
+    """
+
+    __slots__ = ('limit', 'per', 'times', 'index')
+
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.times = array('d', [float('-inf')] * limit)
+        self.index = 0
+
+    def hit(self, now=None):
+        """Record an event; True if it is the ``limit``-th within ``per`` seconds."""
+        now = time.monotonic() if now is None else now
+        oldest = self.times[self.index]
+        self.times[self.index] = now
+        self.index = (self.index + 1) % self.limit
+        return now - oldest <= self.per
+
+    @property
+    def last(self):
+        """Timestamp of the most recent event."""
+        return self.times[self.index - 1]
+
+    def count(self, now=None):
+        """Events within the window (O(limit), for display only)."""
+        now = time.monotonic() if now is None else now
+        return sum(1 for t in self.times if now - t <= self.per)
+
+    def reset(self):
+        for i in range(self.limit):
+            self.times[i] = float('-inf')
+        self.index = 0
+
+    def idle(self, now=None):
+        """True when nothing happened within the window, so it can be dropped."""
+        now = time.monotonic() if now is None else now
+        return now - self.last > self.per
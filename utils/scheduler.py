@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger('DiscordBot')
+
+MAX_SLEEP = 3600  # Re-check the clock at least hourly
+
+
+class Timer:
+    """A pending timed action. ``data`` holds whatever the creator stored."""
+
+    __slots__ = ('id', 'event', 'due', 'guild_id', 'data', 'created')
+
+    def __init__(self, id, event, due, guild_id, data, created):
+        self.id = id
+        self.event = event
+        self.due = due  # Unix timestamp
+        self.guild_id = guild_id
+        self.data = data
+        self.created = created
+
+    @property
+    def due_at(self):
+        return datetime.fromtimestamp(self.due, timezone.utc)
+
+    @property
+    def created_at(self):
+        return datetime.fromtimestamp(self.created, timezone.utc)
+
+    def __repr__(self):
+        return f"<Timer id={self.id} event={self.event!r} due={self.due_at.isoformat()}>"
+
+
+class Scheduler:
+    """Durable timers: rows in the ``timers`` table plus an in-memory min-heap.
+
+    One task sleeps until the earliest timer is due, deletes it and
+    dispatches ``<event>_timer_complete`` with the Timer, so cogs handle
+    expiries with listeners such as ``on_tempban_timer_complete``. Pending
+    timers are reloaded at startup and overdue ones fire straight away.
+
+    Cancelling or rescheduling only touches the ``timers`` dict and pushes
+    at most one heap entry; outdated heap entries are skipped when they
+    reach the top, and the heap is rebuilt if too many pile up.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.timers = {}  # id -> Timer
+        self.heap = []  # (due, id), possibly outdated
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def owns(self, guild_id):
+        """Whether this process runs timers for a guild (clusters split them by shard)."""
+        shard_ids = self.bot.shard_ids
+        if shard_ids is None or not self.bot.shard_count:
+            return True
+        shard_id = (guild_id >> 22) % self.bot.shard_count if guild_id else 0
+        return shard_id in shard_ids
+
+    async def start(self):
+        """Load pending timers and start the sleeper task."""
+        async with self.bot.db.execute(
+            "SELECT id, event, due, guild_id, data, created FROM timers"
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        for timer_id, event, due, guild_id, data, created in rows:
+            if self.owns(guild_id):
+                self.timers[timer_id] = Timer(timer_id, event, due, guild_id, json.loads(data), created)
+        self.heap = [(timer.due, timer.id) for timer in self.timers.values()]
+        heapq.heapify(self.heap)
+
+        overdue = sum(1 for timer in self.timers.values() if timer.due <= time.time())
+        logger.info(f"Loaded {len(self.timers)} timers ({overdue} overdue)")
+        self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    async def create(self, event, when, guild_id=None, **data):
+        """Schedule ``event`` for ``when`` (a datetime or Unix timestamp) and return the Timer."""
+        due = when.timestamp() if isinstance(when, datetime) else when
+        created = time.time()
+        async with self.bot.db.execute("""
+            INSERT INTO timers (event, due, guild_id, data, created)
+            VALUES (?, ?, ?, ?, ?)
+        """, (event, due, guild_id, json.dumps(data), created)) as cursor:
+            timer_id = cursor.lastrowid
+        await self.bot.db.commit()
+
+        timer = Timer(timer_id, event, due, guild_id, data, created)
+        self.timers[timer_id] = timer
+        heapq.heappush(self.heap, (due, timer_id))
+        self.wakeup.set()
+        return timer
+
+    async def cancel(self, timer_id):
+        """Cancel a pending timer. Returns False if it doesn't exist or already fired."""
+        if self.timers.pop(timer_id, None) is None:
+            return False
+        await self.bot.db.execute("DELETE FROM timers WHERE id = ?", (timer_id,))
+        await self.bot.db.commit()
+        self._compact()
+        return True
+
+    async def reschedule(self, timer_id, when):
+        """Move a pending timer to a new time. Returns False if it doesn't exist."""
+        timer = self.timers.get(timer_id)
+        if timer is None:
+            return False
+        timer.due = when.timestamp() if isinstance(when, datetime) else when
+        await self.bot.db.execute("UPDATE timers SET due = ? WHERE id = ?", (timer.due, timer_id))
+        await self.bot.db.commit()
+        heapq.heappush(self.heap, (timer.due, timer_id))
+        self._compact()
+        self.wakeup.set()
+        return True
+
+    def get(self, timer_id):
+        return self.timers.get(timer_id)
+
+    def pending(self, event=None, guild_id=None):
+        """Pending timers, optionally filtered by event and guild, soonest first."""
+        timers = [
+            timer for timer in self.timers.values()
+            if (event is None or timer.event == event)
+            and (guild_id is None or timer.guild_id == guild_id)
+        ]
+        timers.sort(key=lambda timer: timer.due)
+        return timers
+
+    def _compact(self):
+        if len(self.heap) > 2 * len(self.timers) + 64:
+            self.heap = [(timer.due, timer.id) for timer in self.timers.values()]
+            heapq.heapify(self.heap)
+
+    def _peek(self):
+        """The earliest live heap entry, dropping outdated ones."""
+        while self.heap:
+            due, timer_id = self.heap[0]
+            timer = self.timers.get(timer_id)
+            if timer is not None and timer.due == due:
+                return timer
+            heapq.heappop(self.heap)
+        return None
+
+    async def run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            timer = self._peek()
+            delay = timer.due - time.time() if timer else MAX_SLEEP
+            if delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Fire everything that's due in one batch (a burst after downtime)
+            now = time.time()
+            fired = []
+            while (timer := self._peek()) is not None and timer.due <= now:
+                heapq.heappop(self.heap)
+                del self.timers[timer.id]
+                fired.append(timer)
+
+            try:
+                await self.bot.db.executemany(
+                    "DELETE FROM timers WHERE id = ?", [(timer.id,) for timer in fired]
+                )
+                await self.bot.db.commit()
+            except Exception as e:
+                logger.error(f"Failed to delete fired timers: {e}")
+
+            for timer in fired:
+                self.bot.dispatch(f"{timer.event}_timer_complete", timer)
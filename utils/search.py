@@ -0,0 +1,81 @@
+import re
+from collections import defaultdict
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words too common in help text to say anything about a command
+STOPWORDS = {
+    "the", "and", "for", "you", "your", "with", "from", "this", "that", "set",
+    "get", "all", "are", "can", "use", "into", "its", "who", "not"
+}
+
+
+def trigrams(text):
+    """Character trigrams of a term, padded so short terms still match."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Fuzzy index of short terms (command names, aliases, help words).
+
+    Each term is broken into character trigrams and stored in an inverted
+    index, so a lookup only scores terms that share at least one trigram
+    with the query. Scores are Dice coefficients scaled by the term's weight.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(list)  # trigram -> [term id]
+        self.terms = []  # term id -> (key, trigram count, weight)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, key, term, weight=1.0):
+        grams = trigrams(term.lower())
+        term_id = len(self.terms)
+        self.terms.append((key, len(grams), weight))
+        for gram in grams:
+            self.postings[gram].append(term_id)
+
+    def add_text(self, key, text, weight=0.5):
+        """Index every meaningful word of a longer text."""
+        for word in set(WORD_PATTERN.findall(text.lower())):
+            if len(word) > 2 and word not in STOPWORDS:
+                self.add(key, word, weight)
+
+    def _score_term(self, term):
+        """Best score per key for a single query term."""
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for term_id in self.postings.get(gram, ()):
+                shared[term_id] += 1
+
+        best = {}
+        for term_id, count in shared.items():
+            key, size, weight = self.terms[term_id]
+            score = 2 * count / (len(grams) + size) * weight
+            if score > best.get(key, 0):
+                best[key] = score
+        return best
+
+    def search(self, query, limit=5, threshold=0.3):
+        """Return up to ``limit`` (key, score) pairs, best first.
+
+        Multi-word queries score each word separately and average the
+        results, so every word has to match something for a high score.
+        """
+        words = WORD_PATTERN.findall(query.lower())
+        if not words:
+            return []
+
+        totals = defaultdict(float)
+        for word in words:
+            for key, score in self._score_term(word).items():
+                totals[key] += score
+
+        results = [(key, total / len(words)) for key, total in totals.items()]
+        results = [result for result in results if result[1] >= threshold]
+        results.sort(key=lambda result: -result[1])
+        return results[:limit]
@@ -0,0 +1,112 @@
+import time
+from array import array
+
+BUCKET_SECONDS = 5
+BUCKETS = 12  # One minute of history
+SMOOTHING = 0.3  # Weight of the newest bucket in the moving average
+RAISE_AT = 1.0  # Step up when the rate is above the target...
+LOWER_AT = 0.5  # ...and down only once it's under half of it
+
+
+class RateEstimator:
+    """Messages-per-minute estimate for one channel.
+
+    Messages are counted into 5 second buckets kept in a ring buffer. When
+    a bucket closes, its rate is folded into an exponentially weighted
+    moving average, so one burst only nudges the estimate while a
+    sustained rush moves it within a few buckets. Recording a message is
+    O(1); quiet stretches are caught up when the estimator is next touched.
+    """
+
+    __slots__ = ('counts', 'index', 'started', 'rate')
+
+    def __init__(self):
+        self.counts = array('I', [0] * BUCKETS)
+        self.index = 0
+        self.started = None  # Start of the current bucket
+        self.rate = 0.0
+
+    def _advance(self, now):
+        if self.started is None:
+            self.started = now
+            return
+        elapsed = int((now - self.started) // BUCKET_SECONDS)
+        if elapsed <= 0:
+            return
+
+        for _ in range(min(elapsed, BUCKETS)):
+            bucket_rate = self.counts[self.index] * 60 / BUCKET_SECONDS
+            self.rate += SMOOTHING * (bucket_rate - self.rate)
+            self.index = (self.index + 1) % BUCKETS
+            self.counts[self.index] = 0
+        if elapsed > BUCKETS:
+            # Every further bucket was empty: decay in one step
+            self.rate *= (1 - SMOOTHING) ** (elapsed - BUCKETS)
+        self.started += elapsed * BUCKET_SECONDS
+
+    def add(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._advance(now)
+        self.counts[self.index] += 1
+
+    def per_minute(self, now=None):
+        """The smoothed rate in messages per minute."""
+        self._advance(time.monotonic() if now is None else now)
+        return self.rate
+
+    def last_minute(self, now=None):
+        """Raw count of messages in the buffered minute, for display."""
+        self._advance(time.monotonic() if now is None else now)
+        return sum(self.counts)
+
+
+class SlowmodeController:
+    """Moves a channel's slowmode one step at a time to keep its rate near a target.
+
+    The gap between RAISE_AT and LOWER_AT keeps it from flapping around the
+    target, and ``min_interval`` holds each delay for a while, which also
+    caps how often the channel is edited.
+    """
+
+    __slots__ = ('estimator', 'delay', 'baseline', 'changed')
+
+    def __init__(self, delay, now=None):
+        self.estimator = RateEstimator()
+        self.delay = delay
+        self.baseline = delay  # The delay before we touched it, restored when turned off
+        self.changed = time.monotonic() if now is None else now
+
+    def observe(self, delay, now=None):
+        """Adopt a delay someone set by hand as the new floor, and leave it alone for a while."""
+        if delay != self.delay:
+            self.delay = self.baseline = delay
+            self.changed = time.monotonic() if now is None else now
+
+    def decide(self, target, steps, max_delay, min_interval, now=None):
+        """Return the delay the channel should move to, or None to leave it."""
+        now = time.monotonic() if now is None else now
+        rate = self.estimator.per_minute(now)
+        if now - self.changed < min_interval:
+            return None
+
+        steps = [step for step in steps if step <= max_delay]
+        if rate > target * RAISE_AT:
+            higher = [step for step in steps if step > self.delay]
+            return higher[0] if higher else None
+        if rate < target * LOWER_AT:
+            # Never below what the channel had before; that's a moderator's choice
+            lower = [step for step in steps if self.baseline <= step < self.delay]
+            return lower[-1] if lower else None
+        return None
+
+    def applied(self, delay, now=None):
+        self.delay = delay
+        self.changed = time.monotonic() if now is None else now
+
+    def idle(self, now=None):
+        """True when there's no traffic and nothing to undo, so it can be dropped."""
+        return (
+            self.delay == self.baseline
+            and self.estimator.last_minute(now) == 0
+            and self.estimator.per_minute(now) < 0.5
+        )